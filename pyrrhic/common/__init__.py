@@ -7,6 +7,7 @@ _prefs_dir = os.path.join(os.path.expanduser('~'), '.pyrrhic')
 _prefs_file = os.path.join(_prefs_dir, 'prefs')
 
 _logs_dir = os.path.join(_prefs_dir, 'logs')
+_cache_dir = os.path.join(_prefs_dir, 'cache')
 _log_file = os.path.join(_logs_dir, '{}.log'.format(
     datetime.now().strftime('%Y%M%d_%H%M%S')
 ))
@@ -16,3 +17,6 @@ if not os.path.exists(_prefs_dir):
 
 if not os.path.exists(_logs_dir):
     os.makedirs(_logs_dir)
+
+if not os.path.exists(_cache_dir):
+    os.makedirs(_cache_dir)
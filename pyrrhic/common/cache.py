@@ -0,0 +1,145 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import gc
+import hashlib
+import logging
+import os
+import pickle
+
+from collections.abc import MutableMapping
+
+_logger = logging.getLogger(__name__)
+
+def file_stat(fpath):
+    """Returns a `2-tuple` (`mtime_ns`, `size`) for the given file.
+
+    Used as a cheap key to determine whether a file has changed since
+    it was last read.
+    """
+    st = os.stat(fpath)
+    return (st.st_mtime_ns, st.st_size)
+
+def fingerprint(stats):
+    """Returns a `str` digest uniquely identifying a set of files.
+
+    Arguments:
+    - `stats`: `dict` of {`path`: `file_stat(path)`} key-val pairs
+    """
+    h = hashlib.sha1()
+    for path in sorted(stats):
+        mtime, size = stats[path]
+        h.update('{}\0{}\0{}\n'.format(path, mtime, size).encode('utf-8'))
+    return h.hexdigest()
+
+class PersistentCache(MutableMapping):
+    """Dictionary persisted to disk as a single pickle file.
+
+    The stored file is tagged with a version, and is discarded on load
+    if the version doesn't match, so that any change to the format of
+    the cached data only requires bumping the version passed in.
+    Failing to read or write the cache is never fatal; the cache simply
+    starts out empty.
+    """
+
+    def __init__(self, fpath, version=1):
+        """Initializer.
+
+        Arguments:
+        - `fpath`: `str` containing absolute path to the cache file
+
+        Keywords [Default]:
+        - `version` [`1`]: version tag of the cached data format
+        """
+        self._fpath = fpath
+        self._version = version
+        self._data = {}
+        self.load()
+
+    def __repr__(self):
+        return '<{} {} [{}]>'.format(
+            type(self).__name__, self._fpath, len(self._data)
+        )
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def load(self):
+        "Load the cache from disk, returns `True` if successful"
+        self._data = {}
+
+        if not os.path.isfile(self._fpath):
+            return False
+
+        # unpickling allocates a large number of small containers, which
+        # repeatedly triggers the cyclic garbage collector for no benefit
+        gc_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            with open(self._fpath, 'rb') as fp:
+                version, data = pickle.load(fp)
+        except Exception as e:
+            _logger.warning(
+                'Unable to load cache {}: {}'.format(self._fpath, e)
+            )
+            return False
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        if version != self._version:
+            _logger.debug('Discarding stale cache {}'.format(self._fpath))
+            return False
+
+        self._data = data
+        return True
+
+    def save(self):
+        """Write the cache to disk.
+
+        The file is written to a temporary path and then moved over the
+        old file, so that an interrupted write never corrupts the cache.
+        """
+        tmp_path = '{}.tmp'.format(self._fpath)
+
+        try:
+            os.makedirs(os.path.dirname(self._fpath), exist_ok=True)
+            with open(tmp_path, 'wb') as fp:
+                pickle.dump(
+                    (self._version, self._data), fp,
+                    protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp_path, self._fpath)
+        except Exception as e:
+            _logger.warning(
+                'Unable to save cache {}: {}'.format(self._fpath, e)
+            )
+
+    @property
+    def Path(self):
+        return self._fpath
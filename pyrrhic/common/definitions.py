@@ -13,11 +13,19 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
 import logging
 import os
+import time
 import xml.etree.ElementTree as ET
 
-from .helpers import PyrrhicJSONSerializable
+from concurrent.futures import ProcessPoolExecutor
+
+from . import _cache_dir
+from .cache import PersistentCache, file_stat, fingerprint
+from .helpers import PyrrhicJSONSerializable, PyrrhicMessage, PyrrhicWorker
+from .intervals import IntervalIndex
+from .romid import RomIdentifier
 from .structures import (
     Scaling, TableDef, LogParam, StdParam, ExtParam, SwitchParam, DTCParam
 )
@@ -38,15 +46,417 @@ class RRLoggerContainer(Container):
 
 _logger = logging.getLogger(__name__)
 
+# bump whenever the layout of the records below changes, so that any
+# stale on-disk cache is discarded
+_ecuflash_cache_version = 9
+
+def _parse_ecuflash_file(abspath):
+    """Parse an ECUFlash definition file into a compact record.
+
+    Returns a `dict` containing only plain Python objects, so that the
+    record is cheap to pickle when caching the repository. It contains:
+    - `xmlids`: `list` of the text of every `xmlid` element
+    - `romid`: `dict` of {`tag`: `text`} for the `romid` children
+    - `includes`: `list` of `str` of every `include` element
+    - `scalings`: `list` of scaling records (see `_scaling_record`)
+    - `tables`: `dict` of table records (see `_table_record`) keyed by
+        the table name
+
+    Only `xmlids` is populated for a malformed file (i.e. any file not
+    defining exactly one `xmlid`).
+    """
+    root = ET.parse(abspath)
+
+    record = {
+        'xmlids': [x.text for x in root.iter('xmlid')],
+        'romid': {},
+        'includes': [],
+        'scalings': [],
+        'tables': {},
+    }
+
+    if len(record['xmlids']) != 1:
+        return record
+
+    romid = root.find('romid')
+    if romid is not None:
+        record['romid'] = {x.tag: x.text for x in romid}
+
+    record['includes'] = [x.text for x in root.findall('include')]
+    record['scalings'] = [_scaling_record(x) for x in root.findall('scaling')]
+    record['tables'] = {
+        x.attrib['name']: _table_record(x) for x in root.findall('table')
+        if 'name' in x.attrib
+    }
+
+    return record
+
+# size of each read when parsing only the header of a definition file
+_header_chunk_size = 1024
+
+def _parse_ecuflash_header(abspath):
+    """Parse only the header of an ECUFlash definition file.
+
+    Returns a record in the same format as `_parse_ecuflash_file`, but
+    with `scalings` and `tables` set to `None`. The file is parsed
+    incrementally, and parsing stops at the first `<scaling>` or
+    `<table>` element, so the (much larger) body of the file is never
+    read into memory.
+
+    Any `<include>` following the start of the body is therefore missing
+    from `includes`. It is picked up once the body is loaded (see
+    `ECUFlashDef.load_body`).
+    """
+    record = {
+        'xmlids': [],
+        'romid': {},
+        'includes': [],
+        'scalings': None,
+        'tables': None,
+    }
+
+    # feed the parser small chunks, the header is typically only a few
+    # hundred bytes at the top of the file (`ET.iterparse` reads in much
+    # larger blocks, which defeats the purpose of stopping early)
+    parser = ET.XMLPullParser(events=('start', 'end'))
+
+    with open(abspath, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(_header_chunk_size), b''):
+            parser.feed(chunk)
+
+            for event, el in parser.read_events():
+
+                if event == 'start':
+                    if el.tag in ('scaling', 'table'):
+                        return record
+                    continue
+
+                if el.tag == 'xmlid':
+                    record['xmlids'].append(el.text)
+                elif el.tag == 'include':
+                    record['includes'].append(el.text)
+                elif el.tag == 'romid':
+                    record['romid'] = {x.tag: x.text for x in el}
+
+    return record
+
+def _scalings_from_records(scalings):
+    """Returns a `dict` of scaling records keyed by scaling name.
+
+    Duplicate and insufficiently defined scalings are skipped.
+
+    Arguments:
+    - `scalings`: `list` of scaling records (see `_scaling_record`)
+    """
+    out = {}
+    for scaling in scalings:
+        attrib, data = scaling
+        if {'name', 'storagetype'} <= attrib.keys():
+            name = attrib['name']
+            if name not in out:
+                out[name] = scaling
+            else:
+                _logger.warn(
+                    'Ignoring duplicate scaling {}'.format(name)
+                )
+        else:
+            _logger.warn(
+                'Ignoring insufficiently defined scaling  {}'.format(attrib)
+            )
+    return out
+
+def _scaling_record(scaling):
+    """Returns a `2-tuple` (`attrib`, `data`) for a `<scaling>` element.
+
+    `attrib` is a `dict` of the element's attributes, and `data` is a
+    `tuple` of (`name`, `value`) pairs for each child (bloblist) element
+    """
+    return (
+        dict(scaling.attrib),
+        tuple(
+            (x.attrib.get('name'), x.attrib.get('value')) for x in scaling
+        )
+    )
+
+def _table_record(table):
+    """Returns a `3-tuple` (`attrib`, `description`, `axes`) for a
+    `<table>` element.
+
+    `attrib` is a `dict` of the element's attributes, `description` is
+    the text of its `<description>` child (or `None`), and `axes` is a
+    `tuple` of (`attrib`, `values`) pairs for each child `<table>`,
+    where `values` is a `list` of the text of the axis' `<data>`
+    elements, or `None` if the axis element has no children.
+    """
+    desc = table.find('description')
+    axes = tuple(
+        (
+            dict(ax.attrib),
+            [x.text for x in ax.findall('data')] if len(ax) else None
+        )
+        for ax in table if ax.tag == 'table'
+    )
+    return (
+        dict(table.attrib),
+        desc.text if desc is not None else None,
+        axes
+    )
+
+# below this number of files, the cost of spinning up worker processes
+# outweighs any gain from parsing in parallel
+_parallel_parse_threshold = 32
+
+def _parse_ecuflash_files(paths, max_workers=None, header_only=False):
+    """Parse the given ECUFlash definition files, in parallel if possible.
+
+    Returns a `list` of records (see `_parse_ecuflash_file`) in the same
+    order as `paths`, regardless of the order in which the worker
+    processes finish, so that the result is deterministic.
+
+    Arguments:
+    - `paths`: `list` of absolute paths of the files to parse
+
+    Keywords [Default]:
+    - `max_workers` [`None`]: maximum number of worker processes, `None`
+        uses one per CPU. Files are parsed serially when this is `1` or
+        there are too few files to make a pool worthwhile.
+    - `header_only` [`False`]: only parse the header of each file (see
+        `_parse_ecuflash_header`)
+    """
+    parse = _parse_ecuflash_header if header_only else _parse_ecuflash_file
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(paths))
+
+    if max_workers > 1 and len(paths) >= _parallel_parse_threshold:
+        # hand each worker a handful of large batches to keep the
+        # overhead of pickling the records across processes down
+        chunksize = max(1, len(paths)//(4*max_workers))
+
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(parse, paths, chunksize=chunksize))
+        except (OSError, RuntimeError) as e:
+            _logger.warn(
+                'Unable to parse definitions in parallel ({}), '
+                'falling back to serial parsing'.format(e)
+            )
+
+    return [parse(x) for x in paths]
+
+# attributes of each RomRaider logger element needed to instantiate
+# the corresponding `Scaling`/`LogParam`, all others are discarded
+_rrlogger_param_attrs = (
+    'name', 'desc', 'target', 'ecubyteindex', 'ecubit'
+)
+_rrlogger_conversion_attrs = (
+    'units', 'expr', 'gauge_min', 'gauge_max', 'storagetype'
+)
+_rrlogger_switch_attrs = (
+    'name', 'desc', 'target', 'ecubyteindex', 'bit', 'byte'
+)
+_rrlogger_dtcode_attrs = (
+    'name', 'desc', 'bit', 'tmpaddr', 'memaddr'
+)
+
+# elements that can be discarded as soon as they have been parsed
+_rrlogger_cleared_tags = {
+    'parameter', 'ecuparam', 'switch', 'dtcode',
+    'parameters', 'ecuparams', 'switches', 'dtcodes', 'protocol',
+}
+
+def _rrlogger_record(el, attrs):
+    "Returns a `dict` of only the given attributes of an element"
+    return {k: el.attrib[k] for k in attrs if k in el.attrib}
+
+def _rrlogger_param_record(param):
+    """Returns a `dict` record for a `<parameter>` or `<ecuparam>`.
+
+    Contains the attributes in `_rrlogger_param_attrs`, along with:
+    - `tag`: `str` tag of the element
+    - `addresses`: `list` of `int` addresses of the `<address>` children
+    - `length`: `int` length of the first `<address>` child with a
+        `length` attribute, or `None`
+    """
+    record = _rrlogger_record(param, _rrlogger_param_attrs)
+    addrs = param.findall('address')
+    lengths = [x.attrib['length'] for x in addrs if 'length' in x.attrib]
+
+    record['tag'] = param.tag
+    record['addresses'] = [int(x.text, base=16) for x in addrs]
+    record['length'] = int(lengths[0]) if lengths else None
+
+    return record
+
+def _parse_rrlogger_file(filepath):
+    """Stream a RomRaider logger definition file into compact records.
+
+    The file is parsed incrementally, and each element is discarded as
+    soon as the needed attributes have been extracted, so the full tree
+    is never held in memory.
+
+    Returns a nested `dict` keyed by `LoggerProtocol` on the outer level,
+    and by ECU id (or `'Base'`) on the inner level. Each value is a
+    `dict` of `params`, `scalings`, `switches` and `dtcodes` records, as
+    expected by `RRLoggerDef`. The parameter and scaling records of an
+    `ecuparam` are shared between all of the ECUs that use it.
+    """
+    _defs = {}
+    protocol = None
+
+    for event, el in ET.iterparse(filepath, events=('start', 'end')):
+
+        if event == 'start':
+            if el.tag == 'protocol':
+                protocol = el.attrib.get('id', None)
+
+                if protocol not in [x.name for x in LoggerProtocol]:
+                    _logger.warn(
+                        'Skipping loading of unknown protocol {}'.format(
+                            protocol
+                        )
+                    )
+                    protocol = None
+                    continue
+
+                protocol = LoggerProtocol[protocol]
+
+                # initialize protocol container
+                if protocol not in _defs:
+                    _defs[protocol] = {}
+                    _defs[protocol]['Base'] = {
+                        'params': {},
+                        'scalings': {},
+                        'switches': {},
+                        'dtcodes': {},
+                    }
+            continue
+
+        tag = el.tag
+
+        # TODO: other protocols
+        if protocol == LoggerProtocol.SSM:
+            base = _defs[protocol]['Base']
+
+            # parameter and ecuparam elements
+            # TODO: calculated parameters (with `depends`) are skipped for now
+            if tag in ('parameter', 'ecuparam') and el.find('.//depends') is None:
+                ident = el.attrib['id']
+
+                # extract scalings
+                param_scalings = {}
+                for idx, conv in enumerate(el.iter('conversion')):
+                    name = (
+                        conv.attrib['units'] if 'units' in conv.attrib
+                        else 'Conv{}'.format(idx)
+                    )
+                    param_scalings['{}_{}'.format(ident, name)] = (
+                        _rrlogger_record(conv, _rrlogger_conversion_attrs)
+                    )
+
+                # store parameter information to base definition
+                param = _rrlogger_param_record(el)
+                base['params'][ident] = {
+                    'param': param,
+                    'scalings': param_scalings
+                }
+
+                # create definition key for each specific ECU. All ECU
+                # ids in the same `ecu` element share a single record
+                if tag == 'ecuparam':
+                    for ecu in el.iter('ecu'):
+                        ids = ecu.attrib['id'].upper().split(',')
+                        pinfo = {
+                            'param': param,
+                            'scalings': param_scalings,
+                            'addrs': [
+                                int(x.text, base=16)
+                                for x in ecu.findall('address')
+                            ],
+                        }
+
+                        for ecuid in ids:
+                            if ecuid not in _defs[protocol]:
+                                _defs[protocol][ecuid] = {}
+                                _defs[protocol][ecuid]['params'] = {}
+                                _defs[protocol][ecuid]['scalings'] = {}
+
+                            _defs[protocol][ecuid]['params'][ident] = pinfo
+
+                base['scalings'].update(param_scalings)
+
+            elif tag == 'switch':
+                base['switches'][el.attrib['id']] = _rrlogger_record(
+                    el, _rrlogger_switch_attrs
+                )
+
+            elif tag == 'dtcode':
+                base['dtcodes'][el.attrib['id']] = _rrlogger_record(
+                    el, _rrlogger_dtcode_attrs
+                )
+
+        if tag in _rrlogger_cleared_tags:
+            el.clear()
+
+        if tag == 'protocol':
+            protocol = None
+
+    return _defs
+
+def _scan_ecuflash_repository(directory):
+    """Returns a `dict` of {`abspath`: `file_stat(abspath)`} key-val pairs
+    for every definition file in the given directory tree, sorted by path.
+    """
+    stats = {}
+
+    for root, dirs, files in os.walk(directory):
+        for f in files:
+            if 'xml' not in os.path.splitext(f)[1]:
+                continue
+
+            abspath = os.path.join(root, f)
+
+            # file may be removed between walking and stat-ing
+            try:
+                stats[abspath] = file_stat(abspath)
+            except OSError:
+                continue
+
+    return {k: stats[k] for k in sorted(stats)}
+
 class DefinitionManager(object):
     """Overall container for definitions"""
 
-    def __init__(self, ecuflashRoot=None, rrlogger_path=None):
+    def __init__(self, ecuflashRoot=None, rrlogger_path=None, **kwargs):
+        """Initializer.
+
+        Keywords [Default]:
+        - `ecuflashRoot` [`None`]: top-level directory of the ECUFlash
+            definition repository to load
+        - `rrlogger_path` [`None`]: RomRaider logger definition file
+        - `cache_dir` [`~/.pyrrhic/cache`]: directory used to cache the
+            parsed ECUFlash repository, or `None` to disable caching
+        - `parse_workers` [`None`]: number of processes used to parse
+            ECUFlash definition files, `None` uses one per CPU
+        - `lazy` [`False`]: only load the `romid` and `include`s of each
+            ECUFlash definition up front. The scalings and tables of a
+            definition are loaded when it is first resolved.
+        """
         self._defs = DefinitionContainer(self, name='Definitions')
         self._ecuflash_defs = ECUFlashContainer(self, name='ECUFlash Definitions')
         self._ecuflash_editor_tree = ECUFlashSearchTree(self)
         self._ecuflash_logger_tree = ECUFlashSearchTree(self)
+        self._ecuflash_fingerprint = None
+        self._rom_identifier = None
         self._rrlogger_defs = RRLoggerContainer(self, name='RR Logger Definitions')
+        self._ecuflash_root = None
+        self._ecuflash_files = {}
+        self._rrlogger_path = None
+        self._rrlogger_stat = None
+        self._cache_dir = kwargs.pop('cache_dir', _cache_dir)
+        self._parse_workers = kwargs.pop('parse_workers', None)
+        self._lazy = kwargs.pop('lazy', False)
 
         if ecuflashRoot and os.path.isdir(ecuflashRoot):
             self.load_ecuflash_repository(ecuflashRoot)
@@ -54,7 +464,14 @@ class DefinitionManager(object):
         if rrlogger_path and os.path.isfile(rrlogger_path):
             self.load_rrlogger_file(rrlogger_path)
 
-        # initialize base logger definitions on initialization and
+        self._combine_definitions()
+
+    def _combine_definitions(self):
+        "Generate the combined editor/logger `Definitions`"
+
+        self._defs = DefinitionContainer(self, name='Definitions')
+
+        # initialize base logger definitions and
         # generate combined definition structure
         for protocol in self._rrlogger_defs:
             protocol_dict = self._rrlogger_defs[protocol]
@@ -90,65 +507,341 @@ class DefinitionManager(object):
                             ecuflash_def, rrlogger_def
                         )
 
+    def _ecuflash_cache(self, directory):
+        "Returns the `PersistentCache` for the given repository, or `None`"
+        if not self._cache_dir:
+            return None
+
+        key = hashlib.sha1(
+            os.path.abspath(directory).encode('utf-8')
+        ).hexdigest()[:16]
+        fpath = os.path.join(self._cache_dir, 'ecuflash_{}.pickle'.format(key))
+        return PersistentCache(fpath, version=_ecuflash_cache_version)
+
+    def _rom_cache(self, data):
+        "Returns the `PersistentCache` for the given ROM image, or `None`"
+        if not self._cache_dir or self._ecuflash_fingerprint is None:
+            return None
+
+        key = hashlib.sha1(data).hexdigest()
+        fpath = os.path.join(self._cache_dir, 'roms', '{}.pickle'.format(key))
+        return PersistentCache(fpath, version=_ecuflash_cache_version)
+
+    def _save_ecuflash_cache(self, directory, cache=None):
+        """Save the parsed records, definitions and search trees of the
+        loaded repository to its `PersistentCache`, if caching is enabled.
+        """
+        if cache is None:
+            cache = self._ecuflash_cache(directory)
+            if cache is None:
+                return
+
+        cache['fingerprint'] = self._ecuflash_fingerprint
+        cache['lazy'] = self._lazy
+        cache['files'] = self._ecuflash_files
+        cache['snapshot'] = (
+            self._ecuflash_defs,
+            self._ecuflash_editor_tree,
+            self._ecuflash_logger_tree,
+        )
+        cache.save()
+
     def load_ecuflash_repository(self, directory):
         """
         Load all ECUFlash definitions stored in the given directory tree.
 
+        Parsed definition files are cached to disk, keyed by each file's
+        path, modification time and size. If no file in the repository
+        has changed since the last load, the definitions and search
+        trees are loaded directly from the cache without parsing any
+        XML. Otherwise, only files that have changed are parsed.
+
         Arguments:
          - directory: absolute path to the top-level of the repository
         """
 
-        self._ecuflash_defs = {}
+        _logger.info('Loading ECUFlash repository located at {}'.format(directory))
 
-        _fpaths = {}
+        stats = _scan_ecuflash_repository(directory)
+        files = list(stats)
+        repo_fingerprint = fingerprint(stats)
+        self._ecuflash_root = directory
 
-        _logger.info('Loading ECUFlash repository located at {}'.format(directory))
+        cache = self._ecuflash_cache(directory)
+
+        # nothing changed, use the cached definitions and search trees
+        if (
+            cache is not None
+            and cache.get('fingerprint') == repo_fingerprint
+            and cache.get('lazy') == self._lazy
+            and 'snapshot' in cache
+        ):
+            defs, editor_tree, logger_tree = cache['snapshot']
+            self._ecuflash_defs = defs
+            self._ecuflash_editor_tree = editor_tree
+            self._ecuflash_logger_tree = logger_tree
+            self._ecuflash_files = cache['files']
+            self._ecuflash_fingerprint = repo_fingerprint
+
+            _logger.info(
+                'Loaded {} ECUFlash definitions from cache'.format(len(defs))
+            )
+            return
 
-        files = [
-            os.path.join(root, f) for root, dirs, files in os.walk(directory)
-            for f in files
-            if 'xml' in os.path.splitext(f)[1]
-        ]
+        cached_files = cache.get('files', {}) if cache is not None else {}
+        records = {}
+        to_parse = []
         for abspath in files:
+            entry = cached_files.get(abspath, None)
+
+            # header-only records are no use unless loading lazily
+            if (
+                entry is not None and entry[0] == stats[abspath]
+                and (self._lazy or entry[1]['tables'] is not None)
+            ):
+                records[abspath] = entry[1]
+            else:
+                records[abspath] = None
+                to_parse.append(abspath)
 
-            root = ET.parse(abspath)
-            xmlid_list = list(root.iter('xmlid'))
+        if to_parse:
+            start = time.perf_counter()
+            parsed = _parse_ecuflash_files(
+                to_parse, self._parse_workers, header_only=self._lazy
+            )
+            elapsed = time.perf_counter() - start
+
+            records.update(zip(to_parse, parsed))
 
-            _logger.debug(
-                'Loading definition from file {}'.format(
-                    abspath
+            _logger.info(
+                'Parsed {} definition files in {:.2f}s ({:.0f} files/s)'.format(
+                    len(to_parse), elapsed,
+                    len(to_parse)/elapsed if elapsed else float('inf')
                 )
             )
 
+        self._load_ecuflash_records(records)
+        self._ecuflash_files = {k: (stats[k], v) for k, v in records.items()}
+        self._ecuflash_fingerprint = repo_fingerprint
+
+        if cache is not None:
+            self._save_ecuflash_cache(directory, cache)
+
+        _logger.info(
+            'Loaded {} ECUFlash definitions'.format(
+                len(self._ecuflash_defs)
+            )
+        )
+
+    def refresh_ecuflash_repository(self, directory=None):
+        """Incrementally reload the ECUFlash repository.
+
+        Only files that have been added, removed or modified (according
+        to their modification time and size) since the repository was
+        loaded are parsed. Any definition defined in one of these files
+        is invalidated, along with every definition that includes it
+        (directly or through its parents). All other definitions are
+        kept as-is, including any dependencies they have resolved.
+
+        A full load is performed if the given directory is not the
+        currently loaded repository.
+
+        Returns a `set` of the `xmlid`s of all invalidated definitions.
+
+        Keywords [Default]:
+        - `directory` [`None`]: top-level of the repository, defaults to
+            the currently loaded repository
+        """
+        directory = directory or self._ecuflash_root
+
+        if directory is None:
+            return set()
+
+        if directory != self._ecuflash_root:
+            self.load_ecuflash_repository(directory)
+            return set(self._ecuflash_defs)
+
+        stats = _scan_ecuflash_repository(directory)
+        known = self._ecuflash_files
+
+        changed = [x for x in stats if x not in known or known[x][0] != stats[x]]
+        removed = [x for x in known if x not in stats]
+
+        if not (changed or removed):
+            return set()
+
+        parsed = dict(zip(
+            changed,
+            _parse_ecuflash_files(
+                changed, self._parse_workers, header_only=self._lazy
+            )
+        ))
+
+        # determine the definitions whose contents have changed
+        affected = set()
+        for abspath in removed:
+            affected.update(known[abspath][1]['xmlids'])
+
+        for abspath in changed:
+            old = known.get(abspath, None)
+
+            if old is not None:
+
+                # the file was only touched. Header-only records can't
+                # be compared, as the body may have changed
+                if not self._lazy and old[1] == parsed[abspath]:
+                    continue
+
+                affected.update(old[1]['xmlids'])
+
+            affected.update(parsed[abspath]['xmlids'])
+
+        files = {
+            x: (stats[x], parsed[x] if x in parsed else known[x][1])
+            for x in stats
+        }
+
+        # invalidate all descendants of the affected definitions. Loaded
+        # defs also know of any includes missed by a header-only parse
+        children = {}
+        for stat, record in files.values():
+            if len(record['xmlids']) == 1:
+                for par in record['includes']:
+                    children.setdefault(par, set()).add(record['xmlids'][0])
+
+        for xmlid, d in self._ecuflash_defs.items():
+            for par in d.Parents:
+                children.setdefault(par, set()).add(xmlid)
+
+        invalid = set()
+        unchecked = list(affected)
+        while unchecked:
+            xmlid = unchecked.pop()
+            if xmlid not in invalid:
+                invalid.add(xmlid)
+                unchecked.extend(children.get(xmlid, ()))
+
+        reuse = {
+            k: v for k, v in self._ecuflash_defs.items() if k not in invalid
+        }
+        self._load_ecuflash_records(
+            {k: v[1] for k, v in files.items()}, reuse=reuse
+        )
+        self._ecuflash_files = files
+        self._ecuflash_fingerprint = fingerprint(stats)
+
+        # reused definitions may have been resolved already, which is
+        # fine to snapshot (`identify_rom` caches resolved definitions
+        # too): they were resolved against the very files fingerprinted
+        # here, and anything depending on a changed file was invalidated
+        self._save_ecuflash_cache(directory)
+
+        _logger.info(
+            'Reloaded {} changed ECUFlash definition files, '
+            'invalidated {} definitions'.format(
+                len(changed) + len(removed), len(invalid)
+            )
+        )
+
+        return invalid
+
+    def refresh_rrlogger_file(self, filepath=None):
+        """Reload the RomRaider logger definition file if it has changed.
+
+        Returns `True` if the file was reloaded.
+
+        Keywords [Default]:
+        - `filepath` [`None`]: logger definition file, defaults to the
+            currently loaded file
+        """
+        filepath = filepath or self._rrlogger_path
+
+        if filepath is None or not os.path.isfile(filepath):
+            return False
+
+        if (
+            filepath == self._rrlogger_path
+            and file_stat(filepath) == self._rrlogger_stat
+        ):
+            return False
+
+        self.load_rrlogger_file(filepath)
+        return True
+
+    def refresh(self, ecuflashRoot=None, rrlogger_path=None):
+        """Incrementally reload any definitions that have changed.
+
+        See `refresh_ecuflash_repository` and `refresh_rrlogger_file`.
+        Returns `True` if any definitions were reloaded.
+
+        Keywords [Default]:
+        - `ecuflashRoot` [`None`]: top-level directory of the ECUFlash
+            definition repository, defaults to the loaded repository
+        - `rrlogger_path` [`None`]: RomRaider logger definition file,
+            defaults to the loaded file
+        """
+        invalid = self.refresh_ecuflash_repository(ecuflashRoot)
+        reloaded = self.refresh_rrlogger_file(rrlogger_path)
+
+        if invalid or reloaded:
+            self._combine_definitions()
+            return True
+
+        return False
+
+    def _load_ecuflash_records(self, records, reuse=None):
+        """Instantiate `ECUFlashDef`s and search trees from parsed records.
+
+        Arguments:
+        - `records`: `dict` of {`abspath`: `record`} key-val pairs, with
+            each record as returned by `_parse_ecuflash_file`
+
+        Keywords [Default]:
+        - `reuse` [`None`]: `dict` of already instantiated `ECUFlashDef`s
+            keyed by `xmlid`, used in place of instantiating a new def
+            from the same file
+        """
+
+        self._ecuflash_defs = {}
+        reuse = reuse or {}
+
+        _fpaths = {}
+
+        for abspath, record in records.items():
+
+            xmlid_list = record['xmlids']
+
             if len(xmlid_list) == 1:
-                xmlid = xmlid_list[0].text
+                xmlid = xmlid_list[0]
+
+                # unchanged definition, keep the existing instance
+                if (
+                    xmlid not in self._ecuflash_defs
+                    and xmlid in reuse
+                    and reuse[xmlid].Source == abspath
+                ):
+                    self._ecuflash_defs[xmlid] = reuse[xmlid]
+                    _fpaths[xmlid] = abspath
 
                 # new definition, instantiate container
-                if xmlid not in self._ecuflash_defs:
+                elif xmlid not in self._ecuflash_defs:
 
                     kw = {}
-                    kw['scalings'] = {}
-                    scalings = root.findall('scaling')
-                    for scaling in scalings:
-                        if {'name', 'storagetype'} <= scaling.attrib.keys():
-                            name = scaling.attrib['name']
-                            if name not in kw['scalings']:
-                                kw['scalings'][name] = scaling
-                            else:
-                                _logger.warn(
-                                    'Ignoring duplicate scaling {}'.format(name)
-                                )
-                        else:
-                            _logger.warn(
-                                'Ignoring insufficiently defined scaling  {}'.format(scaling)
-                            )
-
-                    kw['parents'] = {x.text: None for x in root.findall('include')}
-                    kw['tables'] = {
-                        x.attrib['name']: x for x in root.findall('table')
-                        if 'name' in x.attrib
-                    }
-                    kw.update({x.tag: x.text for x in root.find('romid')})
+                    kw['source'] = abspath
+                    kw['parents'] = {x: None for x in record['includes']}
+
+                    # header-only records leave the body to be loaded
+                    # when the definition is resolved
+                    if record['tables'] is not None:
+                        kw['scalings'] = _scalings_from_records(
+                            record['scalings']
+                        )
+                        kw['tables'] = dict(record['tables'])
+                    else:
+                        kw['scalings'] = None
+                        kw['tables'] = None
+
+                    kw.update(record['romid'])
 
                     self._ecuflash_defs[xmlid] = ECUFlashDef(xmlid, **kw)
                     _fpaths[xmlid] = abspath
@@ -222,114 +915,16 @@ class DefinitionManager(object):
         self._ecuflash_editor_tree = editor_tree
         self._ecuflash_logger_tree = logger_tree
 
-        _logger.info(
-            'Loaded {} ECUFlash definitions'.format(
-                len(self._ecuflash_defs)
-            )
-        )
-
     def load_rrlogger_file(self, filepath):
         self._rrlogger_defs = {}
+        self._rrlogger_path = filepath
+        self._rrlogger_stat = file_stat(filepath)
 
         _logger.info('Loading RomRaider Logger definition file {}'.format(
             filepath
         ))
 
-        root = ET.parse(filepath)
-        xml_protocols = [x for x in root.iter('protocol')]
-
-        _defs = {}
-
-        for xml_protocol in xml_protocols:
-            protocol = xml_protocol.attrib.get('id', None)
-
-            if protocol not in [x.name for x in LoggerProtocol]:
-                _logger.warn(
-                    'Skipping loading of unknown protocol {}'.format(protocol)
-                )
-                continue
-
-            protocol = LoggerProtocol[protocol]
-
-            # initialize protocol container
-            if protocol not in _defs:
-                _defs[protocol] = {}
-                _defs[protocol]['Base'] = {}
-
-            if protocol == LoggerProtocol.SSM:
-                xml_params = xml_protocol.iter('parameter')
-                xml_switches = xml_protocol.iter('switch')
-                xml_dtcodes = xml_protocol.iter('dtcode')
-                xml_ecuparams = xml_protocol.iter('ecuparam')
-
-                _scalings = {}
-
-                # parameter and ecuparam elements
-                _defs[protocol]['Base']['params'] = {}
-                _defs[protocol]['Base']['scalings'] = {}
-                for param in list(xml_params) + list(xml_ecuparams):
-
-                    # handle calculated parameters
-                    if list(param.iter('depends')):
-                        continue # TODO: skip these for now...
-
-                    ident = param.attrib['id']
-                    xml_conversions = param.iter('conversion')
-
-                    # extract scalings
-                    param_scalings = {}
-                    for idx, conv in enumerate(xml_conversions):
-                        name = (
-                            conv.attrib['units'] if 'units' in conv.attrib
-                            else 'Conv{}'.format(idx)
-                        )
-                        param_scalings['{}_{}'.format(ident, name)] = conv
-
-                    # store parameter information to base definition
-                    _defs[protocol]['Base']['params'][ident] = {
-                        'param': param,
-                        'scalings': param_scalings
-                    }
-
-                    # create definition key for each specific ECU
-                    if param.tag == 'ecuparam':
-                        xml_ecus = param.iter('ecu')
-                        for ecu in xml_ecus:
-                            ids = ecu.attrib['id'].upper().split(',')
-                            addrs = ecu.findall('address')
-
-                            for ecuid in ids:
-                                if ecuid not in _defs[protocol]:
-                                    _defs[protocol][ecuid] = {}
-                                    _defs[protocol][ecuid]['params'] = {}
-                                    _defs[protocol][ecuid]['scalings'] = {}
-
-                                _defs[protocol][ecuid]['params'][ident] = {
-                                    'param': param,
-                                    'scalings': param_scalings,
-                                    'addrs': addrs,
-                                }
-
-                    _defs[protocol]['Base']['scalings'].update(param_scalings)
-
-                    _scalings.update(param_scalings)
-
-                _defs[protocol]['Base']['switches'] = {
-                    param.attrib['id']: param for param in xml_switches
-                }
-
-                _defs[protocol]['Base']['dtcodes'] = {
-                    param.attrib['id']: param for param in xml_dtcodes
-                }
-
-            elif protocol == LoggerProtocol.OBD:
-                pass
-
-            elif protocol == LoggerProtocol.DS2:
-                pass
-
-            elif protocol == LoggerProtocol.NCS:
-                pass
+        _defs = _parse_rrlogger_file(filepath)
 
         # instantiate RRLoggerDef instances
         for pkey in _defs:
@@ -359,6 +954,46 @@ class DefinitionManager(object):
                 )
             )
 
+    def identify_rom(self, data):
+        """Identify a ROM image and resolve its ECUFlash definition.
+
+        Returns a `ROMDefinition` containing the resolved editor def, or
+        `None` if no definition matches the image. Results are cached to
+        disk, keyed by a hash of the image contents, so reopening the
+        same image skips both identification and resolution. Cached
+        results are discarded whenever the ECUFlash repository changes.
+
+        Arguments:
+        - `data`: bytes-like object containing the ROM image
+        """
+        cache = self._rom_cache(data)
+
+        if (
+            cache is not None
+            and cache.get('fingerprint') == self._ecuflash_fingerprint
+        ):
+            _logger.debug('Identified ROM {} from cache'.format(
+                cache['xmlid']
+            ))
+            return cache['definition']
+
+        xmlid = self.RomIdentifier.identify(data)
+
+        if xmlid is not None:
+            defn = self._ecuflash_defs[xmlid]
+            defn.resolve_dependencies(self._ecuflash_defs)
+            romdef = ROMDefinition(EditorDef=defn)
+        else:
+            romdef = None
+
+        if cache is not None:
+            cache['fingerprint'] = self._ecuflash_fingerprint
+            cache['xmlid'] = xmlid
+            cache['definition'] = romdef
+            cache.save()
+
+        return romdef
+
     @property
     def Definitions(self):
         """Combined editor/logger definitions.
@@ -403,6 +1038,32 @@ class DefinitionManager(object):
         """
         return self._ecuflash_logger_tree
 
+    @property
+    def RomIdentifier(self):
+        """`RomIdentifier` indexing the internal ids of all ECUFlash defs,
+        rebuilt whenever the editor search tree changes"""
+        if (
+            self._rom_identifier is None
+            or self._rom_identifier[0] is not self._ecuflash_editor_tree
+        ):
+            tree = self._ecuflash_editor_tree
+            xmlids = {id(v): k for k, v in self._ecuflash_defs.items()}
+            self._rom_identifier = (tree, RomIdentifier(
+                (addr, val, xmlids[id(d)])
+                for addr, len_tree in tree.items()
+                for vals in len_tree.values()
+                for val, d in vals.items()
+            ))
+
+        return self._rom_identifier[1]
+
+    @property
+    def ECUFlashFingerprint(self):
+        """`str` digest of the paths, modification times and sizes of
+        every file in the currently loaded ECUFlash repository, or
+        `None` if no repository is loaded"""
+        return self._ecuflash_fingerprint
+
     @property
     def RRLoggerDefs(self):
         "`dict` of {`identifier`: `<RRLoggerDef>`} key-val pairs"
@@ -412,6 +1073,59 @@ class DefinitionManager(object):
     def IsValid(self):
         return bool(self._ecuflash_defs)
 
+class DefinitionWatcher(PyrrhicWorker):
+    """Worker thread that polls the definition files for changes.
+
+    The ECUFlash repository and RomRaider logger definition file are
+    periodically scanned, and a `PyrrhicMessage('DefinitionsChanged')`
+    is put on the `OutQueue` whenever any file is added, removed or
+    modified. The watcher doesn't reload anything itself; the owning
+    thread should call `DefinitionManager.refresh` upon receiving the
+    message.
+    """
+
+    def __init__(self, ecuflashRoot=None, rrlogger_path=None, interval=2.0):
+        """Initializer.
+
+        Keywords [Default]:
+        - `ecuflashRoot` [`None`]: top-level directory of the ECUFlash
+            definition repository to watch
+        - `rrlogger_path` [`None`]: RomRaider logger definition file to watch
+        - `interval` [`2.0`]: polling interval, in seconds
+        """
+        super(DefinitionWatcher, self).__init__(daemon=True)
+        self._ecuflash_root = ecuflashRoot
+        self._rrlogger_path = rrlogger_path
+        self._interval = interval
+
+    def _fingerprint(self):
+        stats = {}
+
+        if self._ecuflash_root and os.path.isdir(self._ecuflash_root):
+            stats.update(_scan_ecuflash_repository(self._ecuflash_root))
+
+        if self._rrlogger_path and os.path.isfile(self._rrlogger_path):
+            stats[self._rrlogger_path] = file_stat(self._rrlogger_path)
+
+        return fingerprint(stats)
+
+    def run(self):
+        "Main polling loop"
+
+        last = self._fingerprint()
+
+        while not self._stoprequest.wait(self._interval):
+
+            try:
+                current = self._fingerprint()
+            except Exception as e:
+                self._out_q.put(PyrrhicMessage('Exception', e))
+                break
+
+            if current != last:
+                last = current
+                self._out_q.put(PyrrhicMessage('DefinitionsChanged'))
+
 class ECUFlashDef(object):
     "Encompasses all portions of an ECUFlash definition file."
 
@@ -442,11 +1156,17 @@ class ECUFlashDef(object):
 
         - scalings [`{}`] - `dict` of scaling definitions. The dict should
             be keyed by the name of the corresponding scaling, and the value
-            for each key is a `Scaling`.
+            for each key is a `Scaling`, or a scaling record (see
+            `_scaling_record`) to be resolved into a `Scaling`.
 
         - tables [`{}`] - `dict` of table definitions. Each element can
-            either be a `TableDef`, or a dictionary containing the necessary
-            elements to instantiate a `TableDef` during dependency resolution.
+            either be a `TableDef`, or a table record (see `_table_record`)
+            containing the necessary elements to instantiate a `TableDef`
+            during dependency resolution.
+
+        - source [`None`] - absolute path of the XML file this def was
+            loaded from. If `scalings` and `tables` are both `None`, they
+            are loaded from this file during dependency resolution.
         """
         self._identifier = identifier
 
@@ -454,12 +1174,14 @@ class ECUFlashDef(object):
         kwargs.pop('xmlid', None)
         kwargs.pop('include', None)
 
+        self._source = kwargs.pop('source', None)
         self._parents = kwargs.pop('parents', {})
         self._scalings = kwargs.pop('scalings',{})
         self._tables = kwargs.pop('tables', {})
 
         self._all_scalings = {}
         self._all_tables = {}
+        self._ancestors = None
 
         self._info = {
             'internalidaddress': None,
@@ -488,11 +1210,54 @@ class ECUFlashDef(object):
                     )
                 )
 
+        self._defined_tables = None
+        self._address_index = None
         self._initialized = False
 
     def __repr__(self):
         return '<ECUFlashDef {}>'.format(self._identifier)
 
+    def load_body(self):
+        """Load the scalings and tables of a lazily loaded def.
+
+        Parses the full definition file this def was loaded from. Does
+        nothing if the body of the def has already been loaded.
+        """
+        if self.IsLoaded:
+            return
+
+        if self._source is None:
+            raise ValueError(
+                'No source file to load definition {} from'.format(
+                    self._identifier
+                )
+            )
+
+        _logger.debug(
+            'Loading definition {} from file {}'.format(
+                self._identifier, self._source
+            )
+        )
+
+        record = _parse_ecuflash_file(self._source)
+
+        if record['xmlids'] != [self._identifier]:
+            raise ValueError(
+                'Definition file {} no longer defines {}'.format(
+                    self._source, self._identifier
+                )
+            )
+
+        self._scalings = _scalings_from_records(record['scalings'])
+        self._tables = dict(record['tables'])
+
+        # the header may have missed includes following the body
+        if list(self._parents) != record['includes']:
+            self._parents = {
+                x: self._parents.get(x, None) for x in record['includes']
+            }
+            self._ancestors = None
+
     def _determine_axis_info(self, ax):
         """
         Generate the necessary information to instantiate a 1D `TableDef`.
@@ -500,85 +1265,77 @@ class ECUFlashDef(object):
         Returns a 2-tuple (`name`, `kw`) containing the name and all
         necessary keyword arguments to a `TableDef` initializer call.
 
-        `ax` is the `Element` corresponding to the axis `<table>` tag
+        `ax` is the `(attrib, values)` record of the axis `<table>` tag
         """
-        name = ax.attrib.get('name', 'Axis')
+        attrib, values = ax
+        name = attrib.get('name', 'Axis')
         ax_kw = {
-            'Address': ax.attrib.get('address', None),
-            'Length': int(ax.attrib['elements']) if 'elements' in ax.attrib else None,
+            'Address': attrib.get('address', None),
+            'Length': int(attrib['elements']) if 'elements' in attrib else None,
         }
 
         # try to determine axis data type
-        if 'scaling' in ax.attrib:
-            ax_kw['Scaling'] = self._all_scalings[ax.attrib['scaling']]
-            xml_scaling = ax_kw['Scaling'].xml
+        if 'scaling' in attrib:
+            ax_kw['Scaling'] = self._all_scalings[attrib['scaling']]
             ax_kw['Datatype'] = _ecuflash_to_dtype_map[
-                xml_scaling.attrib['storagetype']
+                ax_kw['Scaling'].storagetype
             ]
 
         # axis has discrete data points
-        elif len(ax):
+        elif values is not None:
             ax_kw.update({
                 'Datatype': DataType.STATIC,
-                'Values': [x.text for x in ax.findall('data')],
-                'Length': len(ax.findall('data')),
+                'Values': values,
+                'Length': len(values),
             })
 
         return name, ax_kw
 
     def _scaling_from_xml(self, d):
         """
-        Instantiate a `Scaling` object from an `xml.etree.ElementTree.Element`
+        Instantiate a `Scaling` object from a scaling record
         """
+        attrib, data = d
 
         # capture all attributes
         props = {}
-        props.update(d.attrib)
-
-        # need XML Element to determine storage type during dependency resolution
-        props['xml'] = d
+        props.update(attrib)
 
         if 'units' not in props:
             props['units'] = ''
 
         # for bloblist, generate mappings for conversion expressions
-        if d.attrib['storagetype'] == 'bloblist':
+        if attrib['storagetype'] == 'bloblist':
             props['disp_expr'] = {
-                x.attrib['value'].upper(): x.attrib['name'] for x in d
+                value.upper(): name for name, value in data
             }
             props['raw_expr'] = {
-                x.attrib['name']: x.attrib['value'].upper() for x in d
+                name: value.upper() for name, value in data
             }
 
         # if for some reason the expressions haven't been determined,
         # default to expressions that return the raw value
         if 'disp_expr' not in props:
-            props['disp_expr'] = props['toexpr'] if 'toexpr' in props else 'x'
-            del props['toexpr']
+            props['disp_expr'] = props.pop('toexpr', 'x')
 
         if 'raw_expr' not in props and 'frexpr' in props:
-            props['raw_expr'] = props['frexpr'] if 'frexpr' in props else 'x'
-            del props['frexpr']
+            props['raw_expr'] = props.pop('frexpr')
 
         return Scaling(props.pop('name'), self, **props)
 
     def _table_from_xml(self, tab):
         """
-        Instantiate an appropriate `TableDef` from an `xml.etree.ElementTree.Element`
+        Instantiate an appropriate `TableDef` from a table record
         """
 
-        if not isinstance(tab, ET.Element):
-            raise ValueError('`tab` must be an `xml.etree.ElementTree.Element`')
+        if not isinstance(tab, tuple):
+            raise ValueError('`tab` must be a table record')
 
-        attrs = tab.attrib
+        attrs, desc, ax_info = tab
 
         name = attrs['name']
         axes = [] if attrs.get('type', None) in ['1D', '2D', '3D'] else None
 
-        # try to infer table type from number of table children if no
-        # table attribute is stored in the table tag
-        ax_info = list(filter(lambda x: x.tag == 'table', tab))
-
         # instantiate any axes for 2D/3D tables
         for ax in ax_info:
             if axes is None:
@@ -586,8 +1343,6 @@ class ECUFlashDef(object):
             ax_name, ax_kw = self._determine_axis_info(ax)
             axes.append(TableDef(ax_name, None, **ax_kw))
 
-        desc = tab.find('description')
-
         level = (
             UserLevel(int(attrs.get('level', None)))
             if 'level' in attrs else None
@@ -601,7 +1356,7 @@ class ECUFlashDef(object):
 
         scaling = self._all_scalings.get(scaling_name, None)
         dtype = (
-            _ecuflash_to_dtype_map[scaling.xml.attrib['storagetype']]
+            _ecuflash_to_dtype_map[scaling.storagetype]
             if scaling is not None else None
         )
 
@@ -611,7 +1366,7 @@ class ECUFlashDef(object):
         # bytes, and use first entry in scaling to determine number
         # of bytes
         if dtype == DataType.BLOB:
-            nbytes = len(scaling.xml.find('data').attrib['value'])/2
+            nbytes = len(next(iter(scaling.disp_expr)))/2
         else:
             nbytes = _dtype_size_map[dtype]*length if dtype and length else None
 
@@ -619,7 +1374,7 @@ class ECUFlashDef(object):
 
         kw = {
             'Category': attrs.get('category', None),
-            'Description': desc.text if desc else None,
+            'Description': desc,
             'Level': level,
             'Scaling': scaling,
             'Datatype': dtype,
@@ -650,6 +1405,44 @@ class ECUFlashDef(object):
         )
         return table
 
+    def _linearize(self, defs_dict):
+        """Returns a `list` of all ancestors of this def, nearest first.
+
+        The order is a depth-first search over the parents in reverse
+        `include` order, with each ancestor visited once, and it is the
+        order in which undefined table properties are searched for in
+        the ancestors. It is computed once and cached.
+
+        Every ancestor is resolved in the process.
+        """
+        if self._ancestors is not None:
+            return self._ancestors
+
+        checked = set()
+        ancestors = []
+        unchecked = list(self._parents.keys())
+
+        while unchecked:
+            xmlid = unchecked.pop()
+
+            if xmlid in checked:
+                continue
+
+            checked.add(xmlid)
+            current_def = defs_dict[xmlid]
+
+            # ensure current def has been fully resolved
+            current_def.resolve_dependencies(defs_dict)
+            ancestors.append(current_def)
+
+            # visit the parents of this def next. `unchecked` is used as
+            # a stack, so the parents are pushed in `include` order to be
+            # visited latest to earliest
+            unchecked.extend(current_def._parents.keys())
+
+        self._ancestors = ancestors
+        return ancestors
+
     def resolve_dependencies(self, defs_dict):
         """
         Resolve all portions of the definition into their proper encapsulations.
@@ -687,6 +1480,9 @@ class ECUFlashDef(object):
             'Resolving dependencies for definition {}'.format(self._identifier)
         )
 
+        # lazily loaded, load the remainder of the def from its file
+        self.load_body()
+
         # resolve parents
         for par in self._parents:
             if par not in defs_dict:
@@ -724,6 +1520,8 @@ class ECUFlashDef(object):
         table_names = list(filter(
             lambda x: not isinstance(self._tables[x], TableDef), self._tables
         ))
+        ancestors = self._linearize(defs_dict)
+
         for t in table_names:
             tab = self._tables[t]
             table = self._table_from_xml(tab)
@@ -731,27 +1529,9 @@ class ECUFlashDef(object):
             # if not table.IsFullyDefined and self._parents:
             if self._parents:
 
-                # use a DFS to resolve any undefined table parameters
-                # iterate over parents and their parents in reverse order
-                checked_defs = []
-                unchecked_defs = list(reversed(self._parents.keys()))
-
-                while unchecked_defs:
-
-                    xmlid = unchecked_defs.pop(0)
-                    checked_defs.append(xmlid)
-                    current_def = defs_dict[xmlid]
-
-                    # ensure current def has been fully resolved
-                    current_def.resolve_dependencies(defs_dict)
-
-                    # add any unchecked parents for this def to the front of
-                    # the unchecked list
-                    if current_def._parents:
-                        unchecked_defs = list(filter(
-                            lambda x: x not in checked_defs,
-                            list(reversed(current_def._parents.keys()))
-                        )) + unchecked_defs
+                # resolve any undefined table parameters from the nearest
+                # ancestor that defines them
+                for current_def in ancestors:
 
                     # update undefined table properties from this table
                     if t in current_def._tables:
@@ -851,6 +1631,49 @@ class ECUFlashDef(object):
     def AllTables(self):
         return self._all_tables
 
+    @property
+    def DefinedTables(self):
+        """`dict` of the fully defined tables in `AllTables`, determined
+        once the definition is resolved"""
+        if not self._initialized:
+            return {}
+
+        if self._defined_tables is None:
+            self._defined_tables = {
+                k: v for k, v in self._all_tables.items() if v.FullyDefined
+            }
+
+        return self._defined_tables
+
+    @property
+    def AddressIndex(self):
+        """`IntervalIndex` of the address range of every fully defined
+        table and axis, with their `TableDef` as values"""
+        if not self._initialized:
+            return IntervalIndex()
+
+        if self._address_index is None:
+            intervals = []
+            for tab in self.DefinedTables.values():
+                for t in [tab] + list(tab.Axes or []):
+                    if t.Address is None or t.Datatype == DataType.STATIC:
+                        continue
+                    intervals.append((t.Address, t.Address + t.NumBytes, t))
+
+            self._address_index = IntervalIndex(intervals)
+
+        return self._address_index
+
+    @property
+    def Source(self):
+        "`str` absolute path of the file this def was loaded from"
+        return self._source
+
+    @property
+    def IsLoaded(self):
+        "`False` if the scalings and tables of this def are yet to be loaded"
+        return self._tables is not None
+
 class RRLoggerDef(object):
     "Encompasses portions of a RomRaider Logger definition for a specific ECU"
 
@@ -908,19 +1731,19 @@ class RRLoggerDef(object):
 
     def _scaling_from_xml(self, name, conv):
         """
-        Instantiate a `Scaling` object from an `xml.etree.ElementTree.Element`
+        Instantiate a `Scaling` object from a conversion record
 
         Arguments:
         - `name`: `str` specifying the name for this scaling
-        - `conv`: `xml.etree.ElementTree.Element` of the `conversion`
-            tag to be used to instantiate the resulting `Scaling`
+        - `conv`: `dict` of the attributes of the `conversion` tag to be
+            used to instantiate the resulting `Scaling`
         """
         props = {}
-        props['xml'] = conv
-        props['units'] = conv.attrib.get('units', '')
-        props['disp_expr'] = conv.attrib.get('expr', 'x')
-        props['min'] = conv.attrib.get('gauge_min', None)
-        props['max'] = conv.attrib.get('gauge_max', None)
+        props['units'] = conv.get('units', '')
+        props['disp_expr'] = conv.get('expr', 'x')
+        props['min'] = conv.get('gauge_min', None)
+        props['max'] = conv.get('gauge_max', None)
+        props['storagetype'] = conv.get('storagetype', None)
 
         return Scaling(name, self, **props)
 
@@ -990,48 +1813,39 @@ class RRLoggerDef(object):
         )
         for pid in param_ids:
             pinfo = self._parameters[pid]
-            xml_param = pinfo['param']
-            xml_scalings = pinfo.get('scalings', {})
-            xml_addrs = pinfo.get('addrs', [])
+            param = pinfo['param']
+            param_scalings = pinfo.get('scalings', {})
+            param_addrs = pinfo.get('addrs', [])
             param_class = (
-                StdParam if xml_param.tag == 'parameter'
+                StdParam if param['tag'] == 'parameter'
                 else ExtParam
             )
 
             kw = {}
-            name = xml_param.attrib['name']
-            desc = xml_param.attrib['desc']
-            endpoint = LoggerEndpoint(int(xml_param.attrib['target']))
+            name = param['name']
+            desc = param['desc']
+            endpoint = LoggerEndpoint(int(param['target']))
 
             # determine addresses and byte/bit indices
             if param_class == StdParam:
-                kw['ECUByteIndex'] = int(xml_param.attrib.get('ecubyteindex'))
-                kw['ECUBit'] = int(xml_param.attrib.get('ecubit'))
-                kw['Addresses'] = [
-                    int(x.text, base=16) for x in xml_param.findall('address')
-                ]
+                kw['ECUByteIndex'] = int(param.get('ecubyteindex'))
+                kw['ECUBit'] = int(param.get('ecubit'))
+                kw['Addresses'] = list(param['addresses'])
 
             elif param_class == ExtParam and 'Base' not in self.Identifier:
-                kw['Addresses'] = [int(x.text, base=16) for x in xml_addrs]
+                kw['Addresses'] = list(param_addrs)
 
             # determine datatype from conversions with a `storagetype` specified
             convs = list(
-                filter(lambda x: 'storagetype' in x.attrib, xml_scalings.values())
+                filter(lambda x: 'storagetype' in x, param_scalings.values())
             )
             if convs:
                 conv = convs[0]
-                dtype = _rrlogger_to_dtype_map[conv.attrib['storagetype']]
+                dtype = _rrlogger_to_dtype_map[conv['storagetype']]
 
             # try and determine datatype from address if necessary
             else:
-                length_addrs = list(filter(
-                    lambda x: 'length' in x.attrib,
-                    xml_param.findall('address')
-                ))
-                if length_addrs:
-                    length = int(length_addrs[0].attrib['length'])
-                else:
-                    length = 1
+                length = param['length'] or 1
 
                 _length_to_dtype_map = {
                     1: DataType.UINT8,
@@ -1044,7 +1858,7 @@ class RRLoggerDef(object):
             # determine scalings and default scaling
             kw['Scalings'] = {
                 k: v for k, v in self._all_scalings.items()
-                if k in xml_scalings
+                if k in param_scalings
             }
             kw['Scaling'] = (
                 list(kw['Scalings'].values())[0] if kw['Scalings']
@@ -1072,18 +1886,18 @@ class RRLoggerDef(object):
             )
         )
         for pid in switch_ids:
-            xml_switch = self._switches[pid]
+            switch = self._switches[pid]
 
             kw = {}
-            name = xml_switch.attrib['name']
-            desc = xml_switch.attrib['desc']
-            endpoint = LoggerEndpoint(int(xml_switch.attrib['target']))
+            name = switch['name']
+            desc = switch['desc']
+            endpoint = LoggerEndpoint(int(switch['target']))
 
-            kw['ECUByteIndex'] = int(xml_switch.attrib.get('ecubyteindex'))
-            kw['ECUBit'] = int(xml_switch.attrib['bit'])
+            kw['ECUByteIndex'] = int(switch.get('ecubyteindex'))
+            kw['ECUBit'] = int(switch['bit'])
             dtype = DataType(kw['ECUBit'])
 
-            kw['Addresses'] = [int(xml_switch.attrib['byte'], base=16)]
+            kw['Addresses'] = [int(switch['byte'], base=16)]
 
             self._switches[pid] = SwitchParam(
                 self, pid, name, desc, dtype, endpoint, **kw
@@ -1106,15 +1920,15 @@ class RRLoggerDef(object):
             )
         )
         for pid in dtc_ids:
-            xml_dtcode = self._dtcodes[pid]
+            dtcode = self._dtcodes[pid]
 
             kw = {}
-            name = xml_dtcode.attrib['name']
-            desc = xml_dtcode.attrib['desc']
+            name = dtcode['name']
+            desc = dtcode['desc']
             endpoint = LoggerEndpoint.ECU
-            dtype = DataType(int(xml_dtcode.attrib['bit']))
-            tmpaddr = int(xml_dtcode.attrib['tmpaddr'], base=16)
-            memaddr = int(xml_dtcode.attrib['memaddr'], base=16)
+            dtype = DataType(int(dtcode['bit']))
+            tmpaddr = int(dtcode['tmpaddr'], base=16)
+            memaddr = int(dtcode['memaddr'], base=16)
 
             self._dtcodes[pid] = DTCParam(
                 self, pid, name, desc, dtype, endpoint, tmpaddr, memaddr
@@ -0,0 +1,571 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Compilation of ECUFlash/RomRaider scaling expressions.
+
+Expressions are compiled into plain Python functions of `x` that work
+on scalars as well as `numpy` arrays. The supported grammar covers
+everything used in practice by scaling definitions:
+- `int` and `float` literals, the variable `x` and the constants `pi`
+    and `E`
+- `+`, `-`, `*`, `/`, `%`, powers (`^` or `**`) and unary `+`/`-`
+- the functions in `_functions` (e.g. `exp`, `log`, `sqrt`), applied
+    to a single argument
+
+The expression is parsed with the Python parser, and rejected unless
+every node of the resulting tree is part of the above grammar, so the
+compiled function can never do anything other than evaluate arithmetic.
+Anything outside of the grammar falls back to `sympy`, which is only
+imported when it is actually needed.
+
+Scalings without an explicit inverse expression are inverted with
+`invert_expression` (closed form, then `sympy`, cached on disk), or
+numerically with `numeric_inverse` when no inverse expression exists.
+"""
+
+import ast
+import atexit
+import logging
+import os
+
+from functools import lru_cache
+
+import numpy as np
+
+from . import _cache_dir
+from .cache import PersistentCache
+
+_logger = logging.getLogger(__name__)
+
+# maximum number of compiled expressions kept in memory. Definitions
+# reuse a relatively small set of distinct expressions, so this is
+# enough to hold all of them for a typical repository
+_cache_size = 1024
+
+# functions available to expressions, keyed by name. Each one is named
+# the same as (or is an alias of) the equivalent `sympy` function
+_functions = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'ln': np.log,
+    'log10': np.log10,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+    'floor': np.floor,
+    'ceiling': np.ceil,
+}
+
+_constants = {
+    'pi': np.pi,
+    'E': np.e,
+}
+
+# numeric inverses sample the function at most at this many points, and
+# refine the result between samples with this many bisection steps
+_inverse_samples = 65536
+_bisection_steps = 32
+
+_binary_ops = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow)
+_unary_ops = (ast.UAdd, ast.USub)
+
+class ExpressionError(ValueError):
+    "Raised when an expression is outside the supported grammar"
+    pass
+
+def normalize(expr):
+    "Returns the normalized form of an expression `str`, used as a cache key"
+    return ''.join(expr.split())
+
+def _validate(node):
+    "Raise an `ExpressionError` if the tree contains unsupported nodes"
+
+    if isinstance(node, ast.Expression):
+        _validate(node.body)
+
+    elif isinstance(node, ast.BinOp):
+        if not isinstance(node.op, _binary_ops):
+            raise ExpressionError(
+                'Unsupported operator {}'.format(type(node.op).__name__)
+            )
+        _validate(node.left)
+        _validate(node.right)
+
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, _unary_ops):
+            raise ExpressionError(
+                'Unsupported operator {}'.format(type(node.op).__name__)
+            )
+        _validate(node.operand)
+
+    elif isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ExpressionError('Unsupported literal {!r}'.format(node.value))
+
+    elif isinstance(node, ast.Name):
+        if node.id != 'x' and node.id not in _constants:
+            raise ExpressionError('Unknown name {}'.format(node.id))
+
+    elif isinstance(node, ast.Call):
+        if (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in _functions
+            or len(node.args) != 1
+            or node.keywords
+        ):
+            raise ExpressionError('Unsupported function call')
+        _validate(node.args[0])
+
+    else:
+        raise ExpressionError(
+            'Unsupported expression element {}'.format(type(node).__name__)
+        )
+
+def compile_native(expr):
+    """Compile an expression into a function of `x` without `sympy`.
+
+    Raises an `ExpressionError` if the expression is outside of the
+    supported grammar (see module docstring).
+
+    Arguments:
+    - `expr`: `str` expression in terms of `x`
+    """
+    try:
+        tree = ast.parse(expr.replace('^', '**'), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError('Invalid expression {}: {}'.format(expr, e))
+
+    _validate(tree)
+
+    namespace = {'__builtins__': {}}
+    namespace.update(_functions)
+    namespace.update(_constants)
+
+    # compile the validated tree itself, wrapped in `lambda x: ...`
+    func = ast.Expression(ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg='x')], kwonlyargs=[],
+            kw_defaults=[], defaults=[]
+        ),
+        body=tree.body
+    ))
+    ast.fix_missing_locations(func)
+
+    code = compile(func, '<expression {}>'.format(expr), 'eval')
+    return eval(code, namespace)
+
+def compile_sympy(expr):
+    """Compile an expression into a function of `x` using `sympy`.
+
+    Arguments:
+    - `expr`: `str` expression in terms of `x`
+    """
+    from sympy import lambdify, sympify
+
+    # `sympify` treats `^` as a power, the same as the native compiler
+    return lambdify('x', sympify(expr), 'numpy')
+
+@lru_cache(maxsize=_cache_size)
+def _compile(expr):
+    try:
+        return compile_native(expr)
+    except ExpressionError as e:
+        _logger.debug(
+            'Compiling expression {} with sympy: {}'.format(expr, e)
+        )
+    except Exception as e:
+        # never let a failure of the native compiler break conversions
+        _logger.warning(
+            'Unable to compile expression {} natively, using sympy: '
+            '{}'.format(expr, e)
+        )
+    return compile_sympy(expr)
+
+def compile_expression(expr):
+    """Returns a function of `x` evaluating the given expression.
+
+    Compiled functions are cached process-wide, keyed by the normalized
+    expression, so scalings sharing an expression share one function.
+
+    Arguments:
+    - `expr`: `str` expression in terms of `x`
+    """
+    return _compile(normalize(expr))
+
+def cache_info():
+    "Returns the statistics of the compiled expression cache"
+    return _compile.cache_info()
+
+def clear_cache():
+    "Discard all compiled expressions"
+    _compile.cache_clear()
+
+def _poly_mul(p, q):
+    "Multiply two polynomials stored as `list`s of coefficients, lowest first"
+    out = [0.0]*(len(p) + len(q) - 1)
+    for i, a in enumerate(p):
+        for j, b in enumerate(q):
+            out[i + j] += a*b
+    return out
+
+def _poly_add(p, q):
+    "Add two polynomials stored as `list`s of coefficients, lowest first"
+    n = max(len(p), len(q))
+    p = p + [0.0]*(n - len(p))
+    q = q + [0.0]*(n - len(q))
+    return [a + b for a, b in zip(p, q)]
+
+def _poly_trim(p):
+    "Remove zero high-order coefficients, returns `None` if degree is > 1"
+    p = list(p)
+    while len(p) > 1 and p[-1] == 0:
+        p.pop()
+    return p if len(p) <= 2 else None
+
+def _rational(node):
+    """Returns the expression tree as a ratio of polynomials of degree <= 1.
+
+    Returns a `2-tuple` (`num`, `den`) of coefficient `list`s, or `None`
+    if the expression isn't of the form `(a*x + b)/(c*x + d)`.
+    """
+    if isinstance(node, ast.Expression):
+        return _rational(node.body)
+
+    if isinstance(node, ast.Constant):
+        return [float(node.value)], [1.0]
+
+    if isinstance(node, ast.Name):
+        if node.id == 'x':
+            return [0.0, 1.0], [1.0]
+        return [_constants[node.id]], [1.0]
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _rational(node.operand)
+        if operand is None:
+            return None
+        num, den = operand
+        if isinstance(node.op, ast.USub):
+            num = [-a for a in num]
+        return num, den
+
+    if isinstance(node, ast.Call):
+        arg = _rational(node.args[0])
+
+        # functions of a constant are constant, anything else isn't linear
+        if arg is None or len(arg[0]) > 1 or len(arg[1]) > 1:
+            return None
+
+        return [float(_functions[node.func.id](arg[0][0]/arg[1][0]))], [1.0]
+
+    if isinstance(node, ast.BinOp):
+        left = _rational(node.left)
+        right = _rational(node.right)
+
+        if left is None or right is None:
+            return None
+
+        (n1, d1), (n2, d2) = left, right
+        op = node.op
+
+        if isinstance(op, (ast.Add, ast.Sub)):
+            if isinstance(op, ast.Sub):
+                n2 = [-a for a in n2]
+            num = _poly_add(_poly_mul(n1, d2), _poly_mul(n2, d1))
+            den = _poly_mul(d1, d2)
+
+        elif isinstance(op, ast.Mult):
+            num, den = _poly_mul(n1, n2), _poly_mul(d1, d2)
+
+        elif isinstance(op, ast.Div):
+            num, den = _poly_mul(n1, d2), _poly_mul(d1, n2)
+
+        elif isinstance(op, ast.Pow):
+
+            # only constant exponents of -1, 0 or 1 keep the degree
+            if len(n2) > 1 or len(d2) > 1:
+                return None
+
+            exponent = n2[0]/d2[0]
+
+            if len(n1) == 1 and len(d1) == 1:
+                return [(n1[0]/d1[0])**exponent], [1.0]
+            elif exponent == 1:
+                num, den = n1, d1
+            elif exponent == -1:
+                num, den = d1, n1
+            elif exponent == 0:
+                num, den = [1.0], [1.0]
+            else:
+                return None
+
+        else:
+            if len(n1) == len(d1) == len(n2) == len(d2) == 1:
+                return [(n1[0]/d1[0]) % (n2[0]/d2[0])], [1.0]
+            return None
+
+        num, den = _poly_trim(num), _poly_trim(den)
+        if num is None or den is None:
+            return None
+
+        return num, den
+
+    return None
+
+def _invert_closed_form(expr):
+    """Returns the inverse of an affine or linear rational expression.
+
+    Handles any expression of the form `(a*x + b)/(c*x + d)`, which
+    covers nearly all scalings in practice. Returns `None` for anything
+    else, or if the expression isn't invertible.
+    """
+    try:
+        tree = ast.parse(expr.replace('^', '**'), mode='eval')
+        _validate(tree)
+    except ExpressionError:
+        return None
+
+    try:
+        ratio = _rational(tree)
+    except (ArithmeticError, ValueError):
+        return None
+
+    if ratio is None:
+        return None
+
+    num, den = ratio
+    b, a = (num + [0.0])[:2]
+    d, c = (den + [0.0])[:2]
+
+    if a*d - b*c == 0:
+        return None
+
+    # y = (a*x + b)/(c*x + d)  =>  x = (d*y - b)/(a - c*y)
+    if c == 0:
+        k1, k0 = d/a, -b/a
+        if k0 == 0:
+            return 'x*{!r}'.format(k1)
+        return 'x*{!r}{}{!r}'.format(k1, '-' if k0 < 0 else '+', abs(k0))
+
+    return '({!r}*x-{!r})/({!r}-{!r}*x)'.format(d, b, a, c)
+
+def _invert_sympy(expr):
+    """Returns the inverse of an expression solved with `sympy`.
+
+    Returns `None` if `sympy` doesn't find exactly one solution.
+    """
+    from sympy import Symbol, solve, sympify
+
+    x = Symbol('x')
+    y = Symbol('y')
+
+    try:
+        solutions = solve(sympify(expr) - y, x)
+    except Exception as e:
+        _logger.debug('Unable to solve {}: {}'.format(expr, e))
+        return None
+
+    if len(solutions) != 1:
+        return None
+
+    return str(solutions[0].xreplace({y: x}))
+
+_inverse_cache = None
+
+# number of newly derived inverses after which the cache is saved. Any
+# remaining ones are saved at exit
+_inverse_save_batch = 32
+_unsaved_inverses = 0
+
+def _inverses():
+    "Returns the persistent cache of derived inverse expressions"
+    global _inverse_cache
+
+    if _inverse_cache is None:
+        _inverse_cache = PersistentCache(
+            os.path.join(_cache_dir, 'inverses.pickle')
+        )
+        atexit.register(save_inverses)
+
+    return _inverse_cache
+
+def save_inverses():
+    "Save any derived inverses that haven't been saved to disk yet"
+    global _unsaved_inverses
+
+    if _unsaved_inverses and _inverse_cache is not None:
+        _inverse_cache.save()
+    _unsaved_inverses = 0
+
+def invert_expression(expr):
+    """Returns the inverse of an expression, or `None` if none was found.
+
+    Affine and linear rational expressions are inverted directly, and
+    anything else is solved with `sympy`. Results (including failures)
+    are cached on disk, keyed by the normalized expression, so each
+    inverse only ever needs to be derived once. The cache is written in
+    batches of `_inverse_save_batch` new inverses, and at exit (see
+    `save_inverses`).
+
+    Arguments:
+    - `expr`: `str` expression in terms of `x`
+    """
+    global _unsaved_inverses
+
+    key = normalize(expr)
+    cache = _inverses()
+
+    if key in cache:
+        return cache[key]
+
+    inverse = _invert_closed_form(key)
+
+    if inverse is None:
+        inverse = _invert_sympy(key)
+
+    _logger.debug('Derived inverse of {}: {}'.format(key, inverse))
+
+    cache[key] = inverse
+    _unsaved_inverses += 1
+    if _unsaved_inverses >= _inverse_save_batch:
+        save_inverses()
+
+    return inverse
+
+def _sort_samples(grid, vals):
+    """Returns samples of a function sorted by output value.
+
+    Returns a `4-tuple` (`grid`, `vals`, `increasing`, `monotonic`) of
+    the finite samples, with `vals` sorted in ascending order.
+    """
+    finite = np.isfinite(vals)
+    grid, vals = grid[finite], vals[finite]
+
+    # functions that saturate (e.g. underflow to 0) are still monotonic
+    diffs = np.diff(vals)
+    increasing = bool(np.all(diffs >= 0))
+    decreasing = bool(np.all(diffs <= 0))
+    monotonic = increasing != decreasing
+
+    if monotonic:
+        if decreasing:
+            grid, vals = grid[::-1], vals[::-1]
+    else:
+        order = np.argsort(vals, kind='stable')
+        grid, vals = grid[order], vals[order]
+
+    return grid, vals, increasing, monotonic
+
+def _nearest(sgrid, svals, y):
+    """Returns the samples in `sgrid` whose output is nearest to `y`.
+
+    Ties are broken like `np.rint`, towards the even sample, or the lower
+    one if neither or both of them are even.
+    """
+    idx = np.clip(np.searchsorted(svals, y), 1, len(svals) - 1)
+    below, above = sgrid[idx - 1], sgrid[idx]
+    d_below = np.abs(y - svals[idx - 1])
+    d_above = np.abs(svals[idx] - y)
+
+    low, high = np.minimum(below, above), np.maximum(below, above)
+    tie = np.where((high % 2 == 0) & (low % 2 != 0), high, low)
+
+    return np.where(
+        d_below < d_above, below, np.where(d_above < d_below, above, tie)
+    )
+
+def lookup_inverse(grid, vals):
+    """Returns a vectorized inverse of a monotonic lookup table.
+
+    The inverse returns the entry of `grid` whose value is nearest, found
+    with a binary search. Returns `None` if the table isn't monotonic.
+
+    Arguments:
+    - `grid`: `numpy.ndarray` of inputs of the lookup table
+    - `vals`: `numpy.ndarray` of the corresponding outputs
+    """
+    sgrid, svals, _, monotonic = _sort_samples(grid, vals)
+
+    if not monotonic or len(svals) < 2:
+        return None
+
+    def inverse(y):
+        x = _nearest(sgrid, svals, np.asarray(y, dtype=float))
+        return x.item() if x.ndim == 0 else x
+
+    return inverse
+
+def numeric_inverse(func, lo, hi, integer=True):
+    """Returns a vectorized numeric inverse of `func` over [`lo`, `hi`].
+
+    The function is sampled over its domain. If the domain is small
+    enough to sample every integer in it, the inverse returns the raw
+    value whose output is nearest. Otherwise, for a monotonic function,
+    the result is interpolated between samples and refined by bisection,
+    and for any other function the nearest sample is used.
+
+    Arguments:
+    - `func`: vectorized function of `x` to invert
+    - `lo`, `hi`: bounds of the domain of `func`
+
+    Keywords [Default]:
+    - `integer` [`True`]: whether the domain only contains integers
+    """
+    exhaustive = integer and (hi - lo + 1) <= _inverse_samples
+
+    if exhaustive:
+        grid = np.arange(lo, hi + 1, dtype=float)
+    else:
+        grid = np.linspace(lo, hi, _inverse_samples)
+
+    with np.errstate(all='ignore'):
+        vals = np.broadcast_to(
+            np.asarray(func(grid), dtype=float), grid.shape
+        )
+
+    sgrid, svals, increasing, monotonic = _sort_samples(grid, vals)
+
+    def bisect(y):
+        # bracket the result between neighbouring samples
+        idx = np.clip(np.searchsorted(svals, y), 1, len(svals) - 1)
+        a, b = sgrid[idx - 1], sgrid[idx]
+        low, high = np.minimum(a, b), np.maximum(a, b)
+
+        with np.errstate(all='ignore'):
+            for _ in range(_bisection_steps):
+                mid = (low + high)/2
+                above = func(mid) > y
+                if increasing:
+                    high = np.where(above, mid, high)
+                    low = np.where(above, low, mid)
+                else:
+                    low = np.where(above, mid, low)
+                    high = np.where(above, high, mid)
+
+        return (low + high)/2
+
+    def inverse(y):
+        y = np.asarray(y, dtype=float)
+        if exhaustive or not monotonic:
+            x = _nearest(sgrid, svals, y)
+        else:
+            x = bisect(y)
+        return x.item() if x.ndim == 0 else x
+
+    return inverse
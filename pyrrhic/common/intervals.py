@@ -0,0 +1,186 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Sets of integer intervals, e.g. byte ranges of a ROM image."""
+
+from bisect import bisect_left, bisect_right
+
+class IntervalSet(object):
+    """Set of disjoint, half-open integer intervals `[start, end)`.
+
+    Intervals are stored as two sorted `list`s of starts and ends, with
+    overlapping and adjacent intervals merged when added, so membership
+    and overlap checks are a single binary search.
+    """
+
+    def __init__(self, intervals=()):
+        """Initializer.
+
+        Keywords [Default]:
+        - `intervals` [`()`]: iterable of (`start`, `end`) intervals to
+            add to the set
+        """
+        self._starts = []
+        self._ends = []
+
+        for start, end in intervals:
+            self.add(start, end)
+
+    def __repr__(self):
+        return '<IntervalSet {}>'.format(
+            ', '.join('[{}, {})'.format(*x) for x in self)
+        )
+
+    def __iter__(self):
+        return zip(self._starts, self._ends)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __contains__(self, x):
+        return self.overlaps(x, x + 1)
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def add(self, start, end):
+        "Add the interval `[start, end)` to the set"
+        if start >= end:
+            return
+
+        # every interval touching or overlapping the new one is merged
+        i = bisect_left(self._ends, start)
+        j = bisect_right(self._starts, end)
+
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def remove(self, start, end):
+        "Remove the interval `[start, end)` from the set"
+        if start >= end:
+            return
+
+        i = bisect_right(self._ends, start)
+        j = bisect_left(self._starts, end)
+
+        if i >= j:
+            return
+
+        # keep the parts of the outermost intervals outside of the range
+        starts, ends = [], []
+        if self._starts[i] < start:
+            starts.append(self._starts[i])
+            ends.append(start)
+        if self._ends[j - 1] > end:
+            starts.append(end)
+            ends.append(self._ends[j - 1])
+
+        self._starts[i:j] = starts
+        self._ends[i:j] = ends
+
+    def overlaps(self, start, end):
+        "Returns `True` if any interval in the set overlaps `[start, end)`"
+        if start >= end:
+            return False
+
+        i = bisect_right(self._ends, start)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def clear(self):
+        "Remove all intervals from the set"
+        self._starts = []
+        self._ends = []
+
+    @property
+    def Size(self):
+        "`int` total length of all intervals in the set"
+        return sum(self._ends) - sum(self._starts)
+
+class IntervalIndex(object):
+    """Static index of half-open integer intervals `[start, end)`, each
+    associated with a value.
+
+    Unlike `IntervalSet`, intervals may overlap, and are kept as given.
+    Intervals are sorted by start, alongside a running maximum of their
+    ends, so a query is a binary search followed by a backwards scan
+    that stops as soon as no earlier interval can reach the query.
+    """
+
+    def __init__(self, intervals=()):
+        """Initializer.
+
+        Keywords [Default]:
+        - `intervals` [`()`]: iterable of (`start`, `end`, `value`)
+        """
+        intervals = sorted(
+            (x for x in intervals if x[0] < x[1]), key=lambda x: x[:2]
+        )
+
+        self._starts = [x[0] for x in intervals]
+        self._ends = [x[1] for x in intervals]
+        self._values = [x[2] for x in intervals]
+
+        self._max_ends = []
+        max_end = None
+        for end in self._ends:
+            max_end = end if max_end is None else max(max_end, end)
+            self._max_ends.append(max_end)
+
+    def __repr__(self):
+        return '<IntervalIndex [{}]>'.format(len(self))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return zip(self._starts, self._ends, self._values)
+
+    def _scan(self, i, start):
+        "Returns indices below `i` of intervals ending after `start`"
+        found = []
+        while i > 0 and self._max_ends[i - 1] > start:
+            i -= 1
+            if self._ends[i] > start:
+                found.append(i)
+        found.reverse()
+        return found
+
+    def at(self, x):
+        """Returns a `list` of the values of all intervals containing `x`,
+        in order of their start"""
+        return [
+            self._values[i]
+            for i in self._scan(bisect_right(self._starts, x), x)
+        ]
+
+    def overlapping(self, start, end):
+        """Returns a `list` of the values of all intervals overlapping
+        `[start, end)`, in order of their start"""
+        if start >= end:
+            return []
+
+        return [
+            self._values[i]
+            for i in self._scan(bisect_left(self._starts, end), start)
+        ]
@@ -231,6 +231,15 @@ _default_prefs = [
         values=[x.value for x in UserLevel],
         value=1
     ),
+    BoolPreference(
+        'WatchDefinitions',
+        label='Reload Definitions On Change',
+        help=(
+            'Periodically check the definition files for changes, and ' +
+            'reload any definitions that have changed'
+        ),
+        value=False
+    ),
 
     CategoryPreference('Logger'),
     FilePreference(
@@ -14,10 +14,15 @@
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import mmap
+import os
+
+import numpy as np
 
 from ..common.definitions import ROMDefinition
 from ..common.helpers import Container
-from .structures import RomTable, RamTable
+from ..common.intervals import IntervalSet
+from .structures import TableDef, RomTable, RamTable
 
 _logger = logging.getLogger(__name__)
 
@@ -27,17 +32,210 @@ class InfoContainer(Container):
 class TableCategoryContainer(Container):
     pass
 class TableContainer(Container):
-    pass
+    """Container of editor tables, instantiated on first access.
+
+    Only the `TableDef` of each table is stored up front. The editor
+    table (and its byte views) is created by `factory` the first time it
+    is looked up, so opening a ROM doesn't pay for tables that are never
+    viewed.
+    """
+
+    def __init__(self, parent, name='', factory=None):
+        """Initializer.
+
+        Arguments:
+        - `parent`: containing object
+
+        Keywords [Default]:
+        - `name` [`''`]: `str` name of this container
+        - `factory` [`None`]: callable returning the editor table for a
+            `TableDef`
+        """
+        super(TableContainer, self).__init__(parent, {}, name=name)
+        self._factory = factory
+        self._definitions = {}
+
+    def __repr__(self):
+        return '<{}: "{}" [{}]>'.format(
+            type(self).__name__, self._name, len(self._definitions)
+        )
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def __iter__(self):
+        return iter(self._definitions)
+
+    def __contains__(self, key):
+        return key in self._definitions
+
+    def __getitem__(self, key):
+        table = self.data.get(key, None)
+
+        if table is None:
+            table = self._factory(self._definitions[key])
+            self.data[key] = table
+
+        return table
+
+    def __setitem__(self, key, table):
+        self._definitions[key] = table.Definition
+        self.data[key] = table
+
+    def __delitem__(self, key):
+        del self._definitions[key]
+        self.data.pop(key, None)
+
+    def add_definition(self, name, tabledef):
+        "Add a table to be instantiated from `tabledef` on first access"
+        self._definitions[name] = tabledef
+        self.data.pop(name, None)
+
+    @property
+    def Definitions(self):
+        "`dict` of the `TableDef` of every table, keyed by name"
+        return self._definitions
+
+    @property
+    def Loaded(self):
+        "`dict` of the tables that have been instantiated, keyed by name"
+        return self.data
 class LogParamContainer(Container):
     pass
 
+class RomImage(object):
+    """Backing store of the raw bytes of a ROM image.
+
+    The image file is memory-mapped twice: a read-only mapping for the
+    original data, and a copy-on-write mapping (`mmap.ACCESS_COPY`) for
+    the current data. Both are exposed as zero-copy `memoryview`s, and
+    only the pages that are modified are ever copied into private memory
+    by the OS, so opening even a large image is nearly instant.
+
+    Images that can't be mapped (e.g. empty files) are held in memory.
+    """
+
+    def __init__(self, fpath, raw_data=None):
+        """Initializer.
+
+        Arguments:
+        - `fpath`: `str` path to the ROM image file
+
+        Keywords [Default]:
+        - `raw_data` [`None`]: bytes-like object containing the image,
+            held in memory instead of mapping `fpath`
+        """
+        self._filepath = fpath
+        self._mapped = False
+
+        if raw_data is None:
+            with open(fpath, 'rb') as fp:
+                if os.fstat(fp.fileno()).st_size:
+                    orig = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                    current = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_COPY)
+                    self._mapped = True
+                else:
+                    raw_data = b''
+
+        if not self._mapped:
+            orig = bytes(raw_data)
+            current = bytearray(raw_data)
+
+        self._orig_bytes = memoryview(orig).toreadonly()
+        self._bytes = memoryview(current)
+
+    def __len__(self):
+        return len(self._bytes)
+
+    def _modified_pages(self):
+        "Yields (`start`, `end`) byte ranges of modified pages"
+        size = len(self._bytes)
+        start = None
+
+        for offs in range(0, size, mmap.PAGESIZE):
+            end = min(offs + mmap.PAGESIZE, size)
+            modified = self._bytes[offs:end] != self._orig_bytes[offs:end]
+
+            if modified and start is None:
+                start = offs
+            elif not modified and start is not None:
+                yield start, offs
+                start = None
+
+        if start is not None:
+            yield start, size
+
+    def write_back(self, ranges=None):
+        """Write modified data back to the image file in place.
+
+        Only valid for mapped images. The original data is mapped from
+        the file, so it reflects the written data afterwards.
+
+        Keywords [Default]:
+        - `ranges` [`None`]: iterable of (`start`, `end`) byte ranges to
+            write, `None` writes every modified page
+        """
+        if not self._mapped:
+            raise ValueError('ROM image {} is not mapped'.format(
+                self._filepath
+            ))
+
+        if ranges is None:
+            ranges = self._modified_pages()
+
+        with open(self._filepath, 'r+b') as fp:
+            for start, end in ranges:
+                fp.seek(start)
+                fp.write(self._bytes[start:end])
+
+    @property
+    def IsMapped(self):
+        "`bool` indicating whether the image is memory-mapped"
+        return self._mapped
+
+    @property
+    def IsModified(self):
+        return self._orig_bytes != self._bytes
+
+    @property
+    def OriginalBytes(self):
+        "Read-only `memoryview` of the original image"
+        return self._orig_bytes
+
+    @property
+    def Bytes(self):
+        "Writable `memoryview` of the current image"
+        return self._bytes
+
+    @property
+    def Path(self):
+        return self._filepath
+
 class Rom(object):
     def __init__(self, fpath, raw_data, definition):
+        """Initializer.
+
+        Arguments:
+        - `fpath`: `str` path to the ROM image file
+        - `raw_data`: `RomImage` of the file, or bytes-like object
+            containing the image
+        - `definition`: `ROMDefinition` of the image
+        """
         self._filepath = fpath
-        self._orig_bytes = raw_data
-        self._bytes = bytearray(raw_data)
+        if isinstance(raw_data, RomImage):
+            self._image = raw_data
+        else:
+            self._image = RomImage(fpath, raw_data)
         self._definition = definition
 
+        # byte ranges that differ from the original image, updated by
+        # every table write
+        self._modified = IntervalSet()
+
+        # incremented on every write, tables sharing bytes (e.g. axes
+        # defined by several tables) key their cached values on it
+        self._write_version = 0
+
         # dict containing top-level information of the ROM
         self._info = InfoContainer(self)
 
@@ -46,7 +244,8 @@ class Rom(object):
         self._tables = TableCategoryContainer(self)
         self._ram_tables = TableCategoryContainer(self)
 
-        # all live-tunable tables keyed by ROM address
+        # (category, name) of all live-tunable tables keyed by ROM
+        # address, so tables can be looked up without instantiating them
         self._ram_tables_addr = {}
 
         # nested `dict` keyed as follows:
@@ -78,49 +277,47 @@ class Rom(object):
 
     def _initialize_tables(self):
         tables = TableCategoryContainer(self)
-        for tab in self._definition.EditorDef.AllTables.values():
+        ram_tables = TableCategoryContainer(self)
 
-            # only consider tables that are fully defined
-            if not tab.FullyDefined:
-                continue
+        ram_tables_addr = {}
 
+        for name, tab in self._definition.EditorDef.DefinedTables.items():
             cat = tab.Category
+
             if cat not in tables:
-                tables[cat] = TableContainer(tables, name=cat)
+                tables[cat] = TableContainer(
+                    tables, name=cat, factory=self._create_rom_table
+                )
+                ram_tables[cat] = TableContainer(
+                    ram_tables, name=cat, factory=self._create_ram_table
+                )
 
-            name = tab.Name
-            if name in tables:
+            if name in tables[cat]:
                 _logger.warn(
                     ('Duplicate table definition {}:{}. '
                     + 'Ignoring duplicate definition').format(cat, name)
                 )
                 continue
 
-            tables[cat][name] = RomTable(self, tab)
-
-        self._tables = tables
-
-        # TODO: initialize RAM tables only if compatible... add some
-        # smarts or a definition that explicity marks tables that are
-        # RAM-tunable
-        # for now only initialize 2D and 3D tables as RAM tables
-        ram_tables = TableCategoryContainer(self)
-        for cat in self._tables:
-
-            if cat not in ram_tables:
-                ram_tables[cat] = TableContainer(ram_tables, name=cat)
+            tables[cat].add_definition(name, tab)
 
-            for tab in self._tables[cat].values():
-                if tab.Axes:
-                    ram_tables[cat][tab.Definition.Name] = RamTable(tab)
+            # TODO: initialize RAM tables only if compatible... add some
+            # smarts or a definition that explicity marks tables that are
+            # RAM-tunable
+            # for now only initialize 2D and 3D tables as RAM tables
+            if tab.Axes:
+                ram_tables[cat].add_definition(name, tab)
+                ram_tables_addr[tab.Address] = (cat, name)
 
+        self._tables = tables
         self._ram_tables = ram_tables
+        self._ram_tables_addr = ram_tables_addr
+
+    def _create_rom_table(self, tabledef):
+        return RomTable(self, tabledef)
 
-        # initialize dict of RAM tables keyed by their ROM address
-        for cat in self._ram_tables:
-            for tab in self._ram_tables[cat].values():
-                addr = tab.RomAddress
-                self._ram_tables_addr[addr] = tab
+    def _create_ram_table(self, tabledef):
+        return RamTable(self._tables[tabledef.Category][tabledef.Name])
 
     def get_ram_table_by_address(self, rom_addr):
         """Return `RAMTable` corresponding to the given ROM address."""
@@ -129,7 +326,58 @@ class Rom(object):
                 'Unable to locate definition of table with ROM address '
                 '0x{:x}'.format(rom_addr)
             )
-        return self._ram_tables_addr[rom_addr]
+        cat, name = self._ram_tables_addr[rom_addr]
+        return self._ram_tables[cat][name]
+
+    def _editor_table(self, tabledef):
+        "Returns the `RomTable` of a table or axis definition"
+        parent = tabledef.Parent
+
+        if isinstance(parent, TableDef):
+            table = self._editor_table(parent)
+            return table.Axes[parent.Axes.index(tabledef)]
+
+        return self._tables[tabledef.Category][tabledef.Name]
+
+    def tables_at(self, addr):
+        """Returns a `list` of the `RomTable`s (tables or axes) whose data
+        contains the given ROM address"""
+        return [
+            self._editor_table(x)
+            for x in self._definition.EditorDef.AddressIndex.at(addr)
+        ]
+
+    def tables_overlapping(self, start, end):
+        """Returns a `list` of the `RomTable`s (tables or axes) whose data
+        overlaps the ROM address range `[start, end)`"""
+        return [
+            self._editor_table(x)
+            for x in self._definition.EditorDef.AddressIndex.overlapping(
+                start, end
+            )
+        ]
+
+    def update_modified(self, start, end):
+        """Update the modified byte ranges after a write to `[start, end)`
+
+        Only the bytes in the given range that actually differ from the
+        original image are marked as modified, so writing back the
+        original value clears the modification.
+        """
+        self._write_version += 1
+
+        orig = np.frombuffer(self.OriginalBytes[start:end], dtype=np.uint8)
+        current = np.frombuffer(self.Bytes[start:end], dtype=np.uint8)
+        diff = orig != current
+
+        self._modified.remove(start, end)
+
+        if diff.any():
+            edges = np.flatnonzero(np.diff(
+                np.concatenate(([False], diff, [False]))
+            ))
+            for s, e in zip(edges[::2], edges[1::2]):
+                self._modified.add(start + int(s), start + int(e))
 
     def save(self, fpath=None):
         """Save the ROM image.
@@ -144,22 +392,35 @@ class Rom(object):
 
         out_path = fpath if fpath is not None else self._filepath
 
-        with open(out_path, 'wb') as fp:
-            fp.write(self._bytes)
+        # tables that were never instantiated can't have been modified
+        mod_tables = [
+            x for cat in self._tables.values() for x in cat.Loaded.values()
+            if x.IsModified
+        ]
 
-        # update static bytes
-        self._orig_bytes = bytes(self._bytes)
+        if out_path == self._filepath and self._image.IsMapped:
+            # original bytes are mapped from the file, and pick up the
+            # written pages without touching the tables
+            self._image.write_back(self._modified)
 
-        # propagate updated bytes to any modified tables and update
-        # any associated panels
-        for category in self._tables:
-            mod_tables = filter(
-                lambda x: x.IsModified, self._tables[category].values()
-            )
-            for table in mod_tables:
-                table.initialize_bytes()
-                if table.Panel:
-                    table.Panel.populate()
+        else:
+            with open(out_path, 'wb') as fp:
+                fp.write(self._image.Bytes)
+
+            # map the new file, and point every table at it
+            self._image = RomImage(out_path)
+            for cat in self._tables.values():
+                for table in cat.Loaded.values():
+                    table.initialize_bytes()
+                    for ax in table.Axes:
+                        ax.initialize_bytes()
+
+        self._modified.clear()
+
+        # update any panels associated with modified tables
+        for table in mod_tables:
+            if table.Panel:
+                table.Panel.populate()
 
         self._filepath = out_path
 
@@ -174,15 +435,20 @@ class Rom(object):
             if self._definition.EditorID == d.EditorID:
                 self._definition = d
 
+    @property
+    def Image(self):
+        '`RomImage` backing this ROM'
+        return self._image
+
     @property
     def OriginalBytes(self):
-        '`bytes` object containing the original raw ROM binary'
-        return self._orig_bytes
+        'Read-only `memoryview` of the original raw ROM binary'
+        return self._image.OriginalBytes
 
     @property
     def Bytes(self):
-        'Mutable `bytearray` object containing the current raw ROM binary'
-        return self._bytes
+        'Writable `memoryview` of the current raw ROM binary'
+        return self._image.Bytes
 
     @property
     def Info(self):
@@ -200,6 +466,16 @@ class Rom(object):
     def RAMTables(self):
         return self._ram_tables
 
+    @property
+    def ModifiedRanges(self):
+        "`IntervalSet` of the byte ranges that differ from the original"
+        return self._modified
+
     @property
     def IsModified(self):
-        return self._orig_bytes != self._bytes
+        return bool(self._modified)
+
+    @property
+    def WriteVersion(self):
+        "`int` incremented on every write to the bytes of the ROM"
+        return self._write_version
@@ -0,0 +1,175 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Identification of ROM images against the loaded ECUFlash definitions.
+
+Every definition with an `internalidaddress` contributes an (`address`,
+`length`, `id bytes`) triple. `RomIdentifier` compiles these into an
+index sorted by address, with one entry per address holding the ids of
+each length at that address, so that identifying a ROM is a single
+ordered pass that reads one window of the image per address.
+"""
+
+import logging
+import mmap
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+# minimum number of ROM images before a process pool is worth using
+_parallel_identify_threshold = 16
+
+# identifier used by each worker process of `RomIdentifier.identify_many`
+_worker_identifier = None
+
+def _init_worker(identifier):
+    global _worker_identifier
+    _worker_identifier = identifier
+
+def _identify_worker(fpath):
+    return _worker_identifier.identify_file(fpath)
+
+class RomIdentifier(object):
+    """Identifies ROM images by their internal id.
+
+    Only the `xmlid` of each definition is stored, so that instances are
+    cheap to send to worker processes.
+    """
+
+    def __init__(self, ids):
+        """Initializer.
+
+        Arguments:
+        - `ids`: iterable of (`address`, `id bytes`, `xmlid`) triples
+        """
+        by_addr = {}
+        for addr, val, xmlid in ids:
+            by_addr.setdefault(addr, {}).setdefault(len(val), {})[val] = xmlid
+
+        index = []
+        for addr in sorted(by_addr):
+            lengths = tuple(sorted(by_addr[addr].items()))
+            index.append((addr, lengths[-1][0], lengths))
+
+        self._index = tuple(index)
+
+    def __len__(self):
+        return sum(len(v) for x in self._index for _, v in x[2])
+
+    def identify(self, data):
+        """Returns the `xmlid` of the definition matching a ROM image.
+
+        Returns `None` if no definition matches.
+
+        Arguments:
+        - `data`: bytes-like object containing the ROM image
+        """
+        size = len(data)
+
+        for addr, window_len, lengths in self._index:
+            if addr >= size:
+                break
+
+            window = bytes(data[addr:addr + window_len])
+
+            for nbytes, vals in lengths:
+                xmlid = vals.get(window[:nbytes], None)
+                if xmlid is not None:
+                    return xmlid
+
+        return None
+
+    def identify_file(self, fpath):
+        """Returns the `xmlid` of the definition matching a ROM image file.
+
+        The file is memory-mapped, so only the pages containing internal
+        ids are ever read. Returns `None` if no definition matches, or
+        if the file can't be read.
+
+        Arguments:
+        - `fpath`: `str` path to the ROM image
+        """
+        try:
+            with open(fpath, 'rb') as fp:
+                if not os.fstat(fp.fileno()).st_size:
+                    return None
+
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self.identify(mm)
+
+        except (OSError, ValueError) as e:
+            _logger.warn('Unable to read ROM image {}: {}'.format(fpath, e))
+            return None
+
+    def identify_many(self, paths, max_workers=None):
+        """Identify a batch of ROM image files, in parallel if possible.
+
+        Returns a `dict` of {`path`: `xmlid` or `None`}, in the same
+        order as `paths`.
+
+        Arguments:
+        - `paths`: iterable of `str` paths to ROM images
+
+        Keywords [Default]:
+        - `max_workers` [`None`]: maximum number of worker processes,
+            `None` uses one per CPU. Images are identified serially when
+            this is `1` or there are too few to make a pool worthwhile.
+        """
+        paths = list(paths)
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(paths))
+
+        if max_workers > 1 and len(paths) >= _parallel_identify_threshold:
+            chunksize = max(1, len(paths)//(4*max_workers))
+
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    initializer=_init_worker,
+                    initargs=(self,)
+                ) as executor:
+                    return dict(zip(paths, executor.map(
+                        _identify_worker, paths, chunksize=chunksize
+                    )))
+            except (OSError, RuntimeError) as e:
+                _logger.warn(
+                    'Unable to identify ROMs in parallel ({}), '
+                    'falling back to serial identification'.format(e)
+                )
+
+        return {x: self.identify_file(x) for x in paths}
+
+    def identify_directory(self, directory, max_workers=None):
+        """Identify every file in a directory tree of ROM images.
+
+        Returns a `dict` of {`path`: `xmlid` or `None`}, see
+        `identify_many`.
+
+        Arguments:
+        - `directory`: `str` path to the top-level directory
+
+        Keywords [Default]:
+        - `max_workers` [`None`]: see `identify_many`
+        """
+        paths = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            paths.extend(os.path.join(root, f) for f in sorted(files))
+
+        return self.identify_many(paths, max_workers)
@@ -17,40 +17,108 @@ import logging
 import numpy as np
 import struct
 
-from sympy import sympify, lambdify, solve
 from math import prod
 from xml.etree.ElementTree import Element
 
+from .expressions import (
+    compile_expression, invert_expression, lookup_inverse, numeric_inverse
+)
 from .enums import (
     ByteOrder, DataType, UserLevel, ByteOrder,
-    _byte_order_struct_map, _dtype_struct_map, _dtype_size_map
+    _byte_order_struct_map, _dtype_struct_map, _dtype_size_map,
+    _ecuflash_to_dtype_map, _rrlogger_to_dtype_map
 )
-from .utils import bound_int
 
 _logger = logging.getLogger()
 
+# raw value ranges of the integer storage types, used to invert scalings
+# that have no closed form inverse
+_dtype_range_map = {
+    DataType.UINT8: (0, 255),
+    DataType.UINT16: (0, 65535),
+    DataType.UINT32: (0, 4294967295),
+    DataType.INT8: (-128, 127),
+    DataType.INT16: (-32768, 32767),
+    DataType.INT32: (-2147483648, 2147483647),
+}
+
+# storage types small enough to convert through a lookup table covering
+# every raw value
+_lookup_dtypes = (DataType.UINT8, DataType.INT8, DataType.UINT16, DataType.INT16)
+
+# numpy dtype and `struct.Struct` of each storage type, keyed by
+# (`DataType`, `ByteOrder`) so that they're never re-formatted
+_numpy_dtype_map = {
+    (dtype, order): np.dtype(border + fmt)
+    for dtype, fmt in _dtype_struct_map.items() if fmt is not None
+    for order, border in _byte_order_struct_map.items()
+}
+
+_struct_map = {
+    (dtype, order): struct.Struct(border + fmt)
+    for dtype, fmt in _dtype_struct_map.items() if fmt is not None
+    for order, border in _byte_order_struct_map.items()
+}
+
+def _bloblist_lookup(mapping):
+    """Returns a vectorized conversion function for a bloblist `dict`.
+
+    The returned function takes a single key or a `numpy` array of keys,
+    and raises `KeyError` for keys that aren't in `mapping`.
+    """
+    if not mapping:
+        return mapping.__getitem__
+
+    keys = np.array(sorted(mapping))
+    vals = np.empty(len(keys), dtype=object)
+    vals[:] = [mapping[k] for k in keys]
+
+    def convert(value):
+        value = np.asarray(value)
+        idx = np.clip(np.searchsorted(keys, value), 0, len(keys) - 1)
+
+        if not np.all(keys[idx] == value):
+            raise KeyError(value.tolist())
+
+        return vals[idx]
+
+    return convert
+
 class Scaling(object):
     def __init__(self, name, parent, **kwargs):
         self.name = name
         self.parent = parent
         self.disp_expr = kwargs.pop('disp_expr', 'x')
-        self.raw_expr = kwargs.pop('raw_expr', 'x')
+
+        # without an explicit inverse, one is derived on first use
+        self.raw_expr = kwargs.pop('raw_expr', None)
         self.units = kwargs.pop('units', None)
         self.min = kwargs.pop('min', None)
         self.max = kwargs.pop('max', None)
+        self.storagetype = kwargs.pop('storagetype', None)
         self.xml = kwargs.pop('xml', None)
 
-        self._to_disp = (
-            lambdify('x', self.disp_expr, 'numpy')
-            if isinstance(self.disp_expr, str) else
-            lambda x: self.disp_expr[x]
-        )
-
-        self._to_raw = (
-            lambdify('x', self.raw_expr, 'numpy')
-            if isinstance(self.raw_expr, str) else
-            lambda x: self.raw_expr[x]
-        )
+        # convert 8/16-bit raw values through lookup tables
+        self.lookup = kwargs.pop('lookup', True)
+
+        # conversions are compiled on first use, most scalings in a
+        # repository are never used. `_to_raw` is `False` when there is
+        # no inverse expression
+        self._to_disp = None
+        self._to_raw = None
+        self._numeric_inverse = None
+        self._luts = {}
+        self._inverse_luts = {}
+
+    def __getstate__(self):
+        # compiled conversions can't be pickled, and are cheap to rebuild
+        state = self.__dict__.copy()
+        state['_to_disp'] = None
+        state['_to_raw'] = None
+        state['_numeric_inverse'] = None
+        state['_luts'] = {}
+        state['_inverse_luts'] = {}
+        return state
 
     def __repr__(self):
         return '<Scaling {}:{}>'.format(
@@ -58,11 +126,219 @@ class Scaling(object):
             self.name
         )
 
-    def to_disp(self, value):
+    @staticmethod
+    def _compile(expr):
+        "Returns a conversion function for an expression or bloblist `dict`"
+        if isinstance(expr, str):
+            return compile_expression(expr)
+        else:
+            return _bloblist_lookup(expr)
+
+    def _compile_inverse(self):
+        """Returns a conversion function of the inverse expression, or
+        `None` if there is none.
+
+        The inverse expression is `raw_expr` if defined, otherwise the
+        closed form (or `sympy`) inverse of the display expression.
+        """
+        if self.raw_expr is not None:
+            return self._compile(self.raw_expr)
+
+        inverse = invert_expression(self.disp_expr)
+
+        if inverse is not None:
+            return compile_expression(inverse)
+
+        return None
+
+    def _derive_inverse(self):
+        """Returns a conversion function inverting the display expression
+        numerically, over the range of raw values of the storage type.
+        """
+        _logger.debug('Inverting scaling {} numerically'.format(self.name))
+
+        dtype = (
+            _ecuflash_to_dtype_map.get(self.storagetype)
+            or _rrlogger_to_dtype_map.get(self.storagetype)
+        )
+
+        if dtype in _dtype_range_map:
+            lo, hi = _dtype_range_map[dtype]
+            integer = True
+        else:
+            lo, hi = _dtype_range_map[DataType.INT32]
+            integer = False
+
+        return numeric_inverse(
+            compile_expression(self.disp_expr), lo, hi, integer=integer
+        )
+
+    def lookup_table(self, dtype):
+        """Returns a lookup table of display values for a raw data type.
+
+        The table is a `numpy` array holding the display value of every
+        raw value of `dtype`, offset by the minimum raw value. Returns
+        `None` if lookup tables are disabled, or aren't supported for
+        `dtype` or this scaling.
+
+        Arguments:
+        - `dtype`: `DataType` of the raw values
+        """
+        if (
+            not self.lookup
+            or dtype not in _lookup_dtypes
+            or not isinstance(self.disp_expr, str)
+        ):
+            return None
+
+        lut = self._luts.get(dtype, None)
+
+        if lut is None:
+            lo, hi = _dtype_range_map[dtype]
+            raw = np.arange(lo, hi + 1, dtype=float)
+
+            with np.errstate(all='ignore'):
+                lut = np.array(np.broadcast_to(
+                    np.asarray(self.to_disp(raw), dtype=float), raw.shape
+                ))
+
+            self._luts[dtype] = lut
+
+        return lut
+
+    def _lookup_inverse(self, dtype):
+        "Returns an inverse of the lookup table for `dtype`, or `None`"
+        if dtype in self._inverse_luts:
+            return self._inverse_luts[dtype]
+
+        lut = self.lookup_table(dtype)
+        inverse = None
+
+        if lut is not None:
+            lo, hi = _dtype_range_map[dtype]
+            inverse = lookup_inverse(np.arange(lo, hi + 1, dtype=float), lut)
+
+        self._inverse_luts[dtype] = inverse
+        return inverse
+
+    def to_disp(self, value, dtype=None):
+        """Convert raw value(s) to display value(s).
+
+        Arguments:
+        - `value`: raw value, or `numpy` array of raw values
+
+        Keywords [Default]:
+        - `dtype` [`None`]: `DataType` of the raw values, integer raw
+            values of an 8/16-bit type are converted with a lookup table
+        """
+        if dtype is not None:
+            lut = self.lookup_table(dtype)
+
+            if lut is not None:
+                lo = _dtype_range_map[dtype][0]
+
+                if type(value) is int:
+                    return lut[value - lo]
+
+                value = np.asarray(value)
+                if value.dtype.kind in 'iu':
+                    return lut[value.astype(np.intp) - lo if lo else value]
+
+        if self._to_disp is None:
+            self._to_disp = self._compile(self.disp_expr)
         return self._to_disp(value)
 
-    def to_raw(self, value):
-        return self._to_raw(value)
+    def to_raw(self, value, dtype=None):
+        """Convert display value(s) to raw value(s).
+
+        The inverse expression is used if there is one (see
+        `_compile_inverse`). Otherwise, monotonic scalings of an 8/16-bit
+        `dtype` are inverted by searching their lookup table for the
+        nearest display value, and any other scaling numerically.
+
+        Arguments:
+        - `value`: display value, or `numpy` array of display values
+
+        Keywords [Default]:
+        - `dtype` [`None`]: `DataType` of the raw values. Raw values of
+            an integer type are rounded with `np.rint`, i.e. halves are
+            rounded to even.
+        """
+        if self._to_raw is None:
+            self._to_raw = self._compile_inverse() or False
+
+        if self._to_raw:
+            raw = self._to_raw(value)
+        else:
+            inverse = None if dtype is None else self._lookup_inverse(dtype)
+
+            if inverse is None:
+                if self._numeric_inverse is None:
+                    self._numeric_inverse = self._derive_inverse()
+                inverse = self._numeric_inverse
+
+            raw = inverse(value)
+
+        if dtype in _dtype_range_map:
+            raw = np.rint(raw)
+        return raw
+
+def _fractions(pos, lo, hi):
+    """Returns the positions `pos[lo:hi + 1]` normalized to [0, 1].
+
+    Positions are evenly spaced if the end positions are equal.
+    """
+    span = pos[hi] - pos[lo]
+    if hi == lo:
+        return np.zeros(1)
+    elif span == 0:
+        return np.linspace(0, 1, hi - lo + 1)
+    return (pos[lo:hi + 1] - pos[lo])/span
+
+def _interpolate_rows(values, selected, breakpoints=None):
+    """Linearly interpolate each row of `values` between the first and
+    last selected cells of the row.
+
+    Rows whose selected cells aren't contiguous are left unchanged.
+    Returns a `2-tuple` (`values`, `target`) of the interpolated values
+    and a boolean mask of the cells that were interpolated.
+
+    Arguments:
+    - `values`: 2D numpy array of values
+    - `selected`: boolean mask of the selected cells of `values`
+
+    Keywords [Default]:
+    - `breakpoints` [`None`]: numpy array of the position of each
+        column, columns are evenly spaced if `None`
+    """
+    rows, cols = values.shape
+    r = np.arange(rows)
+    idx = np.arange(cols, dtype=float)
+
+    count = selected.sum(axis=1)
+    first = np.argmax(selected, axis=1)
+    last = cols - 1 - np.argmax(selected[:, ::-1], axis=1)
+    valid = (count > 2) & (count == last - first + 1)
+
+    pos = idx if breakpoints is None else breakpoints
+    span = pos[last] - pos[first]
+
+    # rows with equal breakpoints at their ends are evenly spaced
+    even = span == 0
+    t = np.where(
+        even[:, None],
+        (idx - first[:, None])/np.maximum(last - first, 1)[:, None],
+        (pos - pos[first][:, None])/np.where(even, 1, span)[:, None]
+    )
+
+    v0 = values[r, first]
+    v1 = values[r, last]
+
+    target = selected & valid[:, None]
+    target[r, first] = False
+    target[r, last] = False
+
+    return np.where(target, v0[:, None] + t*(v1 - v0)[:, None], values), target
 
 class TableDef(object):
     """
@@ -122,47 +398,53 @@ class TableDef(object):
         Update undefined parameters from the passed in `Table` instance
         """
 
-        _logger.debug('Updating table {}:{} from parent {}'.format(
-            self.Parent.Identifier, self._name, table.Parent.Identifier
-        ))
+        # this is called for every table against every ancestor when
+        # resolving definitions, so avoid formatting unused log messages
+        debug = _logger.isEnabledFor(logging.DEBUG)
 
-        # all non-axis properties in this instance
-        props = [p for p in vars(self).keys() if 'axes' not in p]
-
-        # all defined properties in passed-in instance
-        new_props = set([p for p in props if table.__getattribute__(p) is not None])
+        if debug:
+            _logger.debug('Updating table {}:{} from parent {}'.format(
+                self.Parent.Identifier, self._name, table.Parent.Identifier
+            ))
 
-        # all undefined properties in self
-        undef_props = set([k for k in props if self.__getattribute__(k) is None])
+        # all non-axis properties undefined in this instance and defined
+        # in the passed-in instance
+        new_vals = vars(table)
+        update_props = [
+            p for p, value in vars(self).items()
+            if value is None and 'axes' not in p
+            and new_vals.get(p, None) is not None
+        ]
 
-        # intersect both sets, update this instance's properties
-        update_props = new_props.intersection(undef_props)
+        # update this instance's properties
         for p in update_props:
-            _logger.debug(
-                'Updating table -- {}:{}.{} -> {}:{}'.format(
-                    table.Parent.Identifier,
-                    table.Name,
-                    p,
-                    self._parent,
-                    self._name
+            if debug:
+                _logger.debug(
+                    'Updating table -- {}:{}.{} -> {}:{}'.format(
+                        table.Parent.Identifier,
+                        table.Name,
+                        p,
+                        self._parent,
+                        self._name
+                    )
                 )
-            )
-            self.__setattr__(p, table.__getattribute__(p))
+            setattr(self, p, new_vals[p])
 
         # for matching table type based on axes, update each axis
         if self._axes and table._axes and len(self._axes) == len(table._axes):
             for ax, newax in zip(self._axes, table._axes):
                 if not ax.FullyDefined:
-                    _logger.debug(
-                        'Updating axis -- {}:{}[{}] -> {}:{}[{}]'.format(
-                            table.Parent.Identifier,
-                            table.Name,
-                            newax.Name,
-                            self._parent,
-                            self._name,
-                            ax.Name,
+                    if debug:
+                        _logger.debug(
+                            'Updating axis -- {}:{}[{}] -> {}:{}[{}]'.format(
+                                table.Parent.Identifier,
+                                table.Name,
+                                newax.Name,
+                                self._parent,
+                                self._name,
+                                ax.Name,
+                            )
                         )
-                    )
                     ax.update(newax)
 
         # for tables whose axes are inherited
@@ -300,6 +582,13 @@ class EditorTable(object):
         self._panel = None
         self._axes = []
 
+        # incremented on every change to the bytes of this table, the
+        # decoded and display values are cached against it
+        self._version = 0
+        self._view = None
+        self._values_cache = None
+        self._display_cache = None
+
     def check_val_modified(self, idx1, idx2=0):
         """Returns a boolean indicating whether the value at the given
         row/column has been modified."""
@@ -341,142 +630,363 @@ class EditorTable(object):
             else:
                 return True
 
-    def _cell_info(self, idx1, idx2):
-        """Returns a `4-tuple` of info for the given indices.
-
-        Returned tuple is (idx, bidx, elem_size, unpack_str) where
-        - `idx` is the `int` or `2-tuple` used to retrieve the cell
-            value from the numpy array returned by the `Values` property
-        - `bidx` is the starting index of the cell value in the raw
-            byte array containing this table's data
-        - `elem_size` is the size of this a cell's data, in bytes
-        - `unpack_str` is a `struct`-style format `str` used to
-            pack/unpack the numeric value into a raw bytes
+    def _shape(self):
+        "Returns the shape of the numpy array returned by `Values`"
+
+        # 3D table
+        if self._axes is not None and len(self._axes) == 2:
+            cols = self._axes[0].Definition.Length
+            rows = self._axes[1].Definition.Length
+
+        # 1D/2D table
+        else:
+            cols = self._definition.Length
+            rows = 1
+
+        if rows == 1 and cols == 1:
+            return (1,)
+        elif rows == 1:
+            return (cols,)
+        elif cols == 1:
+            return (rows,)
+        else:
+            return (rows, cols)
+
+    def _cell_indices(self, cells):
+        """Returns a numpy array of the flat indices of the given cells
+        in the raw values of this table.
+
+        Arguments:
+        - `cells`: boolean mask with the shape of `Values`, `tuple` of
+            index arrays (as returned by `numpy.nonzero`), or sequence of
+            (`idx1`, `idx2`) indices as taken by `set_cell`
         """
-        order = self._definition.ByteOrder
-        dtype = self._definition.Datatype
+        size = int(np.prod(self._shape()))
 
-        border_str = _byte_order_struct_map[order]
-        dtype_str = _dtype_struct_map[dtype]
-        unpack_str = border_str + dtype_str
-        elem_size = _dtype_size_map[dtype]
+        if isinstance(cells, np.ndarray) and cells.dtype == bool:
+            if cells.size != size:
+                raise ValueError(
+                    'Mask of size {} does not match table of size {}'.format(
+                        cells.size, size
+                    )
+                )
+            return np.flatnonzero(cells)
+
+        if isinstance(cells, tuple):
+            idx = [np.asarray(x, dtype=np.intp).ravel() for x in cells]
+        else:
+            pairs = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+            idx = [pairs[:, 0], pairs[:, 1]]
+
+        if len(idx) == 1:
+            idx.append(np.zeros_like(idx[0]))
+        idx1, idx2 = idx
 
         # 3D table
         if self._axes is not None and len(self._axes) == 2:
             cols = self._axes[0].Definition.Length
-            idx = (idx1, idx2)
-            bidx = (idx1*cols + idx2)*elem_size
+            flat = idx1*cols + idx2
 
         # 1D/2D table
         else:
-            idx = max(idx1, idx2)
-            bidx = idx*elem_size
+            flat = np.maximum(idx1, idx2)
 
-        return idx, bidx, elem_size, unpack_str
+        if flat.size and (flat.min() < 0 or flat.max() >= size):
+            raise IndexError('Cell index out of range for table {}'.format(
+                self._definition.Name
+            ))
 
-    def step(self, idx1, idx2=0, decrement=False):
-        "Increase/decrease the value at the supplied index by one step size"
+        return flat
 
+    def _raw_view(self):
+        """Returns a writable numpy view of the raw values of this table,
+        with the shape of `Values`.
+
+        The view is backed by the table bytes, so writes to it go straight
+        into the ROM (or RAM) image. Callers must report the written byte
+        range with `_written`.
+        """
+        if self._view is None:
+            dtype = _numpy_dtype_map[
+                (self._definition.Datatype, self._definition.ByteOrder)
+            ]
+            self._view = np.frombuffer(self._bytes, dtype).reshape(
+                self._shape()
+            )
+        return self._view
+
+    def _edit_cells(self, cells, func, scaled=True):
+        """Apply `func` to the values of the given cells.
+
+        The selected values are decoded once, passed to `func` as a numpy
+        array, and the result is converted back to raw values, rounded
+        and bounded to the range of the table's data type, and written
+        back in one pass. Cells whose result has no raw value (`NaN`)
+        are left unchanged.
+
+        Arguments:
+        - `cells`: cells to edit, refer to `_cell_indices`
+        - `func`: callable taking and returning an array of values, or
+            returning a scalar to assign to all cells
+
+        Keywords [Default]:
+        - `scaled` [`True`]: if `True`, `func` operates on display
+            values, otherwise on raw values
+        """
         dtype = self._definition.Datatype
 
         if dtype in [DataType.BLOB, DataType.STATIC]:
             return
 
+        idx = self._cell_indices(cells)
+        if not idx.size:
+            return
+
+        view = self._raw_view().reshape(-1)
+        raw = view[idx]
+        scaling = self._definition.Scaling if scaled else None
+
+        if scaling:
+            new = scaling.to_raw(func(scaling.to_disp(raw, dtype)), dtype)
+        else:
+            new = func(raw.astype(float))
+
+        new = np.broadcast_to(np.asarray(new, dtype=float), idx.shape)
+
+        if dtype in _dtype_range_map:
+            lo, hi = _dtype_range_map[dtype]
+            with np.errstate(invalid='ignore'):
+                new = np.where(np.isnan(new), raw, np.clip(np.rint(new), lo, hi))
+
+        view[idx] = new
+
+        elem_size = view.itemsize
+        self._written(int(idx.min())*elem_size, (int(idx.max()) + 1)*elem_size)
+
+    def step_cells(self, cells, decrement=False):
+        """Increase/decrease the values of the given cells by one step size
+
+        Arguments:
+        - `cells`: cells to edit, refer to `_cell_indices`
+
+        Keywords [Default]:
+        - `decrement` [`False`]: decrease the values instead
+        """
+
         # TODO: make step size dynamic and pull from definition
-        if dtype == DataType.FLOAT:
+        if self._definition.Datatype == DataType.FLOAT:
             step = 1e-3
         else:
             step = 1
 
-        idx, bidx, elem_size, unpack_str = self._cell_info(idx1, idx2)
+        if decrement:
+            step = -step
 
-        val = struct.unpack_from(unpack_str, self._bytes, bidx)[0]
-        flip = -1 if decrement else 1
-        new_val = val + step*flip
+        self._edit_cells(cells, lambda x: x + step, scaled=False)
 
-        if dtype != DataType.FLOAT:
-            new_val = bound_int(dtype, new_val)
+    def add_raw_cells(self, offs, cells):
+        "Add `offs` to the raw values of the given cells"
 
-        self._bytes[bidx:bidx + elem_size] = struct.pack(unpack_str, new_val)
+        if self._definition.Datatype == DataType.FLOAT:
+            return
 
-    def add_raw(self, offs, idx1, idx2=0):
-        "Add `offs` to the value stored at the supplied index"
+        self._edit_cells(cells, lambda x: x + offs, scaled=False)
 
-        dtype = self._definition.Datatype
+    def set_cells(self, val, cells):
+        """Set the values of the given cells.
 
-        if dtype in [DataType.FLOAT, DataType.STATIC]:
-            return
+        `val` is a single value, or an array with one value per cell, in
+        the order the cells are given (row-major order for masks).
+        """
+        val = np.asarray(val, dtype=float)
+        self._edit_cells(cells, lambda x: val)
 
-        idx, bidx, elem_size, unpack_str = self._cell_info(idx1, idx2)
+    def add_cells(self, val, cells):
+        "Add the given value(s) to the values of the given cells"
+        self._edit_cells(cells, lambda x: x + val)
 
-        val = struct.unpack_from(unpack_str, self.Bytes, bidx)[0]
-        new_val = bound_int(dtype, val + offs)
-        self._bytes[bidx:bidx + elem_size] = struct.pack(unpack_str, new_val)
+    def mult_cells(self, val, cells):
+        "Multiply the values of the given cells by the given value(s)"
+        self._edit_cells(cells, lambda x: x*val)
+
+    def step(self, idx1, idx2=0, decrement=False):
+        "Increase/decrease the value at the supplied index by one step size"
+        self.step_cells([(idx1, idx2)], decrement=decrement)
+
+    def add_raw(self, offs, idx1, idx2=0):
+        "Add `offs` to the value stored at the supplied index"
+        self.add_raw_cells(offs, [(idx1, idx2)])
 
     def set_cell(self, val, idx1, idx2=0):
         "Set the value of the cell at the supplied index"
+        self.set_cells(val, [(idx1, idx2)])
 
-        dtype = self._definition.Datatype
+    def add_cell(self, val, idx1, idx2=0):
+        "Add the given value to the cell at the supplied index"
+        self.add_cells(val, [(idx1, idx2)])
 
-        if dtype == DataType.STATIC:
-            return
+    def mult_cell(self, val, idx1, idx2=0):
+        "Multiply the cell at the supplied index by the given value"
+        self.mult_cells(val, [(idx1, idx2)])
 
-        idx, bidx, elem_size, unpack_str = self._cell_info(idx1, idx2)
+    def _interpolation_grid(self, cells):
+        """Returns a `2-tuple` (`values`, `selected`) of 2D arrays of the
+        display values of this table and a mask of the given cells.
 
-        new_val = (
-            self._definition.Scaling.to_raw(val)
-            if self._definition.Scaling
-            else val
-        )
+        Tables of one dimension are laid out as a single row.
+        """
+        shape = self.Values.shape
+        grid = shape if len(shape) == 2 else (1, -1)
 
-        if dtype != DataType.FLOAT:
-            new_val = bound_int(dtype, int(new_val))
+        selected = np.zeros(int(np.prod(shape)), dtype=bool)
+        selected[self._cell_indices(cells)] = True
 
-        self._bytes[bidx:bidx + elem_size] = struct.pack(unpack_str, new_val)
+        values = np.array(self.DisplayValues, dtype=float).reshape(grid)
+        return values, selected.reshape(values.shape)
 
-    def add_cell(self, val, idx1, idx2=0):
-        "Add the given value to the cell at the supplied index"
+    def _breakpoints(self, vertical=False):
+        """Returns a float numpy array of the display values of the axis
+        along rows (or columns if `vertical`), or `None` if there's no
+        such numeric axis."""
+        shape = self.Values.shape
 
-        dtype = self._definition.Datatype
+        if len(shape) == 2:
+            axis = self._axes[1 if vertical else 0]
+        elif self._axes and len(self._axes) == 1:
+            axis = self._axes[0]
+        else:
+            return None
 
-        if dtype == DataType.STATIC:
+        try:
+            pos = np.array(axis.DisplayValues, dtype=float).ravel()
+        except (TypeError, ValueError):
+            return None
+
+        length = shape[0 if vertical else -1] if len(shape) == 2 else shape[0]
+        return pos if len(pos) == length else None
+
+    def _write_interpolated(self, values, target):
+        "Write the `target` cells of the 2D `values` in one batched write"
+        if target.any():
+            self.set_cells(values[target], target.reshape(self.Values.shape))
+
+    def interpolate_h(self, cells, weighted=False):
+        """Linearly interpolate the selected cells of each row, between
+        the first and last selected cell of the row.
+
+        Rows whose selected cells aren't contiguous are left unchanged.
+        Tables of one dimension are interpolated along their length.
+
+        Arguments:
+        - `cells`: cells to interpolate, refer to `_cell_indices`
+
+        Keywords [Default]:
+        - `weighted` [`False`]: if `True`, weight cells by the values of
+            the X axis breakpoints instead of spacing them evenly
+        """
+        if self._definition.Datatype in [DataType.BLOB, DataType.STATIC]:
             return
 
-        idx, bidx, elem_size, unpack_str = self._cell_info(idx1, idx2)
+        values, selected = self._interpolation_grid(cells)
+        breakpoints = self._breakpoints() if weighted else None
 
-        disp_val = self.DisplayValues[idx] + val
-        new_val = (
-            self._definition.Scaling.to_raw(disp_val)
-            if self._definition.Scaling
-            else disp_val
+        self._write_interpolated(
+            *_interpolate_rows(values, selected, breakpoints)
         )
 
-        if dtype != DataType.FLOAT:
-            new_val = bound_int(dtype, int(new_val))
+    def interpolate_v(self, cells, weighted=False):
+        """Linearly interpolate the selected cells of each column, between
+        the first and last selected cell of the column.
 
-        self._bytes[bidx:bidx + elem_size] = struct.pack(unpack_str, new_val)
+        Refer to `interpolate_h`, `weighted` uses the Y axis breakpoints.
+        """
+        if self._definition.Datatype in [DataType.BLOB, DataType.STATIC]:
+            return
 
-    def mult_cell(self, val, idx1, idx2=0):
-        "Multiply the cell at the supplied index by the given value"
+        values, selected = self._interpolation_grid(cells)
+        breakpoints = self._breakpoints(vertical=True) if weighted else None
 
-        dtype = self._definition.Datatype
+        if len(self.Values.shape) == 2:
+            values, target = _interpolate_rows(
+                values.T, selected.T, breakpoints
+            )
+            self._write_interpolated(values.T, target.T)
+        else:
+            self._write_interpolated(
+                *_interpolate_rows(values, selected, breakpoints)
+            )
 
-        if dtype == DataType.STATIC:
+    def interpolate_2d(self, cells, weighted=False):
+        """Bilinearly interpolate a rectangular selection of cells from
+        the values of its corners.
+
+        Selections that aren't rectangular are left unchanged. Tables of
+        one dimension are interpolated linearly along their length.
+
+        Arguments:
+        - `cells`: cells to interpolate, refer to `_cell_indices`
+
+        Keywords [Default]:
+        - `weighted` [`False`]: if `True`, weight cells by the values of
+            the axis breakpoints instead of spacing them evenly
+        """
+        if self._definition.Datatype in [DataType.BLOB, DataType.STATIC]:
+            return
+
+        values, selected = self._interpolation_grid(cells)
+
+        rows = np.flatnonzero(selected.any(axis=1))
+        cols = np.flatnonzero(selected.any(axis=0))
+
+        if not rows.size:
             return
 
-        idx, bidx, elem_size, unpack_str = self._cell_info(idx1, idx2)
+        r0, r1 = rows[0], rows[-1]
+        c0, c1 = cols[0], cols[-1]
 
-        disp_val = val*self.DisplayValues[idx]
-        new_val = (
-            self._definition.Scaling.to_raw(disp_val)
-            if self._definition.Scaling
-            else disp_val
+        if not selected[r0:r1 + 1, c0:c1 + 1].all():
+            return
+
+        x = self._breakpoints() if weighted else None
+        y = self._breakpoints(vertical=True) if weighted else None
+        x = np.arange(values.shape[1], dtype=float) if x is None else x
+        y = np.arange(values.shape[0], dtype=float) if y is None else y
+
+        tx = _fractions(x, c0, c1)
+        ty = _fractions(y, r0, r1)[:, None]
+
+        v00, v01 = values[r0, c0], values[r0, c1]
+        v10, v11 = values[r1, c0], values[r1, c1]
+
+        target = np.zeros(values.shape, dtype=bool)
+        target[r0:r1 + 1, c0:c1 + 1] = True
+        target[[r0, r0, r1, r1], [c0, c1, c0, c1]] = False
+
+        values[r0:r1 + 1, c0:c1 + 1] = (
+            (1 - ty)*((1 - tx)*v00 + tx*v01) + ty*((1 - tx)*v10 + tx*v11)
         )
 
-        if dtype != DataType.FLOAT:
-            new_val = bound_int(dtype, int(new_val))
+        self._write_interpolated(values, target)
+
+    def _write(self, offs, data):
+        "Write `data` to the raw bytes of this table, starting at `offs`"
+        self._bytes[offs:offs + len(data)] = data
+        self._written(offs, offs + len(data))
 
-        self._bytes[bidx:bidx + elem_size] = struct.pack(unpack_str, new_val)
+    def _written(self, start, end):
+        "Called after the bytes `[start, end)` of this table are written"
+        self._version += 1
+
+    def _reset_cache(self):
+        "Drop cached values, called when the bytes of this table are replaced"
+        self._version += 1
+        self._view = None
+        self._values_cache = None
+        self._display_cache = None
+
+    def _cache_key(self):
+        "Returns a key that changes whenever the bytes of this table change"
+        return self._version
 
     def revert(self):
         raise NotImplementedError
@@ -528,39 +1038,31 @@ class EditorTable(object):
     def NumBytes(self):
         return self._definition.NumBytes
 
+    @property
+    def Version(self):
+        "`int` incremented on every change to the bytes of this table"
+        return self._version
+
     @property
     def Values(self):
-        "Returns a numpy array of the raw values of this table"
+        """Returns a read-only numpy array of the raw values of this table
+
+        The array is a view of the table bytes, cached until the bytes of
+        the table change.
+        """
         border = self._definition.ByteOrder
         dtype = self._definition.Datatype
 
         if dtype not in [DataType.BLOB, DataType.STATIC]:
+            key = self._cache_key()
 
-            # 3D table
-            if self._axes is not None and len(self._axes) == 2:
-                cols = self._axes[0].Definition.Length
-                rows = self._axes[1].Definition.Length
+            if self._values_cache is None or self._values_cache[0] != key:
+                buf = np.frombuffer(self.Bytes, _numpy_dtype_map[(dtype, border)])
+                values = buf.reshape(self._shape())
+                values.flags.writeable = False
+                self._values_cache = (key, values)
 
-            # 1D/2D table
-            else:
-                cols = self._definition.Length
-                rows = 1
-
-            if rows == 1 and cols == 1:
-                shape = (1,)
-            elif rows == 1:
-                shape = (cols,)
-            elif cols == 1:
-                shape = (rows,)
-            else:
-                shape = (rows, cols)
-
-            border_str = _byte_order_struct_map[border]
-            dtype_str = _dtype_struct_map[dtype]
-            unpack_str = border_str + dtype_str
-
-            buf = np.frombuffer(self.Bytes, unpack_str)
-            return np.reshape(buf, shape)
+            return self._values_cache[1]
 
         elif dtype == DataType.BLOB:
             return self.Bytes.hex().upper()
@@ -570,12 +1072,27 @@ class EditorTable(object):
 
     @property
     def DisplayValues(self):
-        "Returns a numpy array of the display-converted values of this table"
-        if self._definition.Scaling:
-            return self._definition.Scaling.to_disp(self.Values)
-        else:
+        """Returns a read-only numpy array of the display-converted values
+        of this table, cached until the bytes of the table change"""
+        scaling = self._definition.Scaling
+
+        if not scaling:
             return self.Values
 
+        dtype = self._definition.Datatype
+
+        if dtype in [DataType.BLOB, DataType.STATIC]:
+            return scaling.to_disp(self.Values, dtype)
+
+        key = (self._cache_key(), scaling)
+
+        if self._display_cache is None or self._display_cache[0] != key:
+            values = np.array(scaling.to_disp(self.Values, dtype))
+            values.flags.writeable = False
+            self._display_cache = (key, values)
+
+        return self._display_cache[1]
+
 class RomTable(EditorTable):
     def __init__(self, parent, tabledef):
         super(RomTable, self).__init__(parent, tabledef)
@@ -603,9 +1120,22 @@ class RomTable(EditorTable):
             self._orig_bytes = None
             self._bytes = None
 
+        self._reset_cache()
+
+    def _written(self, start, end):
+        super(RomTable, self)._written(start, end)
+        addr = self._definition.Address
+        self._parent.update_modified(addr + start, addr + end)
+
+    def _cache_key(self):
+        # other tables may be defined over the same bytes, so any write to
+        # the ROM invalidates the cached values
+        return (self._version, self._parent.WriteVersion)
+
     def revert(self):
         if self.IsModified:
-            self._bytes[0:] = self._orig_bytes
+            if self._bytes is not None:
+                self._write(0, self._orig_bytes)
 
             if self._axes:
                 for ax in self._axes:
@@ -620,7 +1150,13 @@ class RomTable(EditorTable):
 
     @property
     def IsModified(self):
-        modified = self._orig_bytes != self._bytes
+        # modified bytes are tracked by the ROM as they're written
+        modified = False
+        if self._bytes is not None:
+            addr = self._definition.Address
+            modified = self._parent.ModifiedRanges.overlaps(
+                addr, addr + len(self._bytes)
+            )
         if self._axes:
             for ax in self._axes:
                 modified = modified or ax.IsModified
@@ -710,12 +1246,20 @@ class RamTable(EditorTable):
             self._orig_bytes = None
             self._bytes = None
 
+        self._reset_cache()
+
+    def _cache_key(self):
+        # unallocated tables show the bytes of the ROM table
+        if self._bytes is None:
+            return (self._version, self._rom_table._cache_key())
+        return self._version
+
     def activate(self, activate=True):
         self._active = activate
 
     def revert(self):
         if self.IsModified:
-            self._bytes[0:] = self._orig_bytes
+            self._write(0, self._orig_bytes)
 
     @property
     def Bytes(self):
@@ -766,6 +1310,10 @@ class LogParam(object):
         self._supported = False
         self._value = None
 
+        # display value of `_value`, converted on first access unless it
+        # was converted in a batch with other parameters
+        self._disp = None
+
     def __repr__(self):
         return '<{} {}: {}>'.format(
             type(self).__name__, self._identifier, self._name
@@ -777,6 +1325,21 @@ class LogParam(object):
     def disable(self):
         self._enabled = False
         self._value = None
+        self._disp = None
+
+    def set_value(self, raw, disp=None):
+        """Set the raw value of this parameter, along with its display
+        value if it has already been converted.
+
+        Arguments:
+        - `raw`: `bytes` raw value, or `None`
+
+        Keywords [Default]:
+        - `disp` [`None`]: display value of `raw` under the current
+            scaling, or `None` to convert it on first access
+        """
+        self._value = raw
+        self._disp = disp
 
     def set_supported(self):
         self._supported = True
@@ -825,16 +1388,22 @@ class LogParam(object):
     @RawValue.setter
     def RawValue(self, val):
         self._value = val
+        self._disp = None
 
     @property
     def Value(self):
         if isinstance(self, (StdParam, ExtParam)):
             if self._value is not None:
-                if self._scaling is not None:
-                    key = _dtype_struct_map[self._datatype]
-                    order = '>' # TODO: implement byte order
-                    val = struct.unpack('{}{}'.format(order, key), self._value)[0]
-                    return self._scaling.to_disp(val)
+                if self._disp is not None:
+                    return self._disp
+                elif self._scaling is not None:
+                    # TODO: implement byte order
+                    unpacker = _struct_map[
+                        (self._datatype, ByteOrder.BIG_ENDIAN)
+                    ]
+                    val = unpacker.unpack(self._value)[0]
+                    self._disp = self._scaling.to_disp(val, self._datatype)
+                    return self._disp
                 else:
                     return int.from_bytes(self._value, 'big')
             else:
@@ -913,6 +1482,7 @@ class StdParam(LogParam):
             if scale_name in self._scalings
             else None
         )
+        self._disp = None
 
 class ExtParam(LogParam):
     "Extended (endpoint-specific) Parameter"
@@ -953,6 +1523,7 @@ class ExtParam(LogParam):
             if scale_name in self._scalings
             else None
         )
+        self._disp = None
 
 class SwitchParam(StdParam):
     "Switch Parameter"
@@ -0,0 +1,419 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Capture of raw log query responses, decoded after the fact.
+
+Capture files follow an 8 byte magic number with one segment per log
+query. Each segment starts with an `ADDR` block (refer to
+`pyrrhic.comms.logfile`) holding a JSON `dict` with the queried
+`addresses`, the `params` and `switches` identifiers of the query, and a
+reference `time_ns`/`perf_ns` pair. It is followed by fixed-size records
+of a little-endian `int64` `time.perf_counter_ns` timestamp and the raw
+response bytes. A segment is ended by an `int64` of -1 where the next
+record would start, if another segment follows.
+
+Fixed-size records let the file be memory-mapped and decoded in bulk,
+and a file cut short by a crash only loses its last partial record.
+"""
+
+import json
+import logging
+import os
+import time
+import zlib
+
+from queue import Empty, Queue
+
+import numpy as np
+
+from ..common.helpers import PyrrhicMessage
+from .logfile import LogWriter, _block_header, _write_block
+from .protocol.base import DecodePlan
+
+_logger = logging.getLogger(__name__)
+
+_magic = b'PYRRRAW1'
+_addr_tag = b'ADDR'
+_segment_end = np.int64(-1).astype('<i8').tobytes()
+
+# number of spare chunks preallocated for each segment
+_pool_size = 4
+
+def _record_dtype(num_bytes):
+    "Returns the `numpy.dtype` of records of responses of `num_bytes` bytes"
+    return np.dtype([('t', '<i8'), ('data', np.uint8, (num_bytes, ))])
+
+class CaptureWriter(LogWriter):
+    """Worker thread that writes chunks of raw responses to a capture file.
+
+    Messages sent to `InQueue`:
+    - `Segment`: `dict` header of the following records
+    - `Records`: `3-tuple` (`chunk`, `count`, `pool`), where the first
+        `count` records of the structured array `chunk` are written,
+        before `chunk` is put back in the `Queue` `pool` for reuse
+
+    Refer to `LogWriter` for everything else.
+    """
+
+    _file_magic = _magic
+
+    def __init__(self, fpath, **kwargs):
+        super(CaptureWriter, self).__init__(fpath, **kwargs)
+        self._in_segment = False
+
+    def _handle(self, m):
+        if m.Message == 'Segment':
+            if self._in_segment:
+                self._bytes += self._fp.write(_segment_end)
+
+            self._bytes += _write_block(
+                self._fp, _addr_tag, json.dumps(m.Data).encode()
+            )
+            self._in_segment = True
+
+        elif m.Message == 'Records':
+            chunk, count, pool = m.Data
+
+            if count:
+                if not self._in_segment:
+                    raise ValueError('Records written before a segment header')
+
+                records = chunk[:count]
+                self._bytes += self._fp.write(records.view(np.uint8))
+                self._samples += count
+
+            pool.put(chunk)
+
+    def _write_footer(self, closed):
+        "Capture files have no footer, only full records are ever read"
+
+class RawCapture(object):
+    """Acquisition-side buffer of raw responses.
+
+    Responses are copied into preallocated chunks of fixed-size records,
+    and full chunks are handed to a `CaptureWriter` thread. Chunks are
+    recycled once written; should the writer fall behind, a new chunk is
+    allocated instead of waiting on the disk.
+    """
+
+    def __init__(self, fpath, chunk_size=4096, **kwargs):
+        """Initializer. The file is created (or truncated) immediately,
+        so an invalid path raises an `OSError` here.
+
+        Arguments:
+        - `fpath`: path of the capture file
+
+        Keywords [Default]:
+        - `chunk_size` [`4096`]: number of records per chunk
+        - remaining keywords are passed to `CaptureWriter`
+        """
+        self._chunk_size = chunk_size
+        self._writer = CaptureWriter(fpath, **kwargs)
+        self._writer.start()
+
+        self._num_bytes = None
+        self._pool = None
+        self._chunk = None
+        self._count = 0
+        self._records = 0
+        self._dropped = 0
+
+    def _next_chunk(self):
+        try:
+            chunk = self._pool.get_nowait()
+        except Empty:
+            chunk = np.zeros(self._chunk_size, dtype=self._dtype)
+
+        self._chunk = chunk
+        self._times = chunk['t']
+        self._data = chunk['data']
+        self._count = 0
+
+    def start_segment(self, addresses, params=(), switches=(), **info):
+        """Start a segment of responses to a new log query.
+
+        Arguments:
+        - `addresses`: `list` of `int` addresses of the query, in the
+            order of the response bytes
+
+        Keywords [Default]:
+        - `params` [`()`]: identifiers of the parameters of the query, in
+            order (refer to `DecodePlan`)
+        - `switches` [`()`]: identifiers of the switches of the query
+        - remaining keywords are stored in the segment header, and must
+            be serializable to JSON
+        """
+        self.flush()
+
+        header = dict(info)
+        header.update({
+            'addresses': list(addresses),
+            'params': list(params),
+            'switches': list(switches),
+            'time_ns': time.time_ns(),
+            'perf_ns': time.perf_counter_ns(),
+        })
+        self._writer.InQueue.put(PyrrhicMessage('Segment', header))
+
+        self._num_bytes = len(header['addresses'])
+        self._dtype = _record_dtype(self._num_bytes)
+        self._pool = Queue()
+        for _ in range(_pool_size):
+            self._pool.put(np.zeros(self._chunk_size, dtype=self._dtype))
+        self._next_chunk()
+
+    def append(self, resp):
+        """Store a raw response, timestamped now. Responses that don't match
+        the size of the current segment are dropped.
+
+        Arguments:
+        - `resp`: `bytes` of the response
+        """
+        t = time.perf_counter_ns()
+
+        if self._chunk is None or len(resp) != self._num_bytes:
+            self._dropped += 1
+            return
+
+        i = self._count
+        self._times[i] = t
+        self._data[i] = np.frombuffer(resp, dtype=np.uint8)
+        self._count = i + 1
+        self._records += 1
+
+        if self._count == self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        "Hand the records of the current chunk to the writer"
+        if self._chunk is not None and self._count:
+            self._writer.InQueue.put(PyrrhicMessage(
+                'Records', (self._chunk, self._count, self._pool)
+            ))
+            self._next_chunk()
+
+    def close(self, wait=True):
+        """Write all records and close the file.
+
+        Keywords [Default]:
+        - `wait` [`True`]: wait for the writer to close the file
+        """
+        self.flush()
+        self._chunk = None
+        self._writer.join(None if wait else 0)
+
+    @property
+    def Writer(self):
+        "`CaptureWriter` of the capture file"
+        return self._writer
+
+    @property
+    def Records(self):
+        "Number of responses stored"
+        return self._records
+
+    @property
+    def Dropped(self):
+        "Number of responses dropped for not matching the query size"
+        return self._dropped
+
+class CaptureSegment(object):
+    "Records of a single log query in a capture file"
+
+    def __init__(self, header, records):
+        self._header = header
+        self._records = records
+
+    def __len__(self):
+        return len(self._records)
+
+    def times(self, start=0, stop=None):
+        """Returns a float `numpy` array of the epoch timestamps of the
+        records in [`start`, `stop`)"""
+        t = np.asarray(self._records['t'][start:stop])
+        return (
+            self._header['time_ns']
+            + (t - self._header['perf_ns'])
+        )/1e9
+
+    def data(self, start=0, stop=None):
+        """Returns a 2D `numpy.uint8` array of the responses of the records
+        in [`start`, `stop`), one per row"""
+        return np.ascontiguousarray(self._records['data'][start:stop])
+
+    def plan(self, logger_def):
+        """Returns the `DecodePlan` of the segment, rebuilt from the params
+        and switches of the logger definition.
+
+        Raises a `ValueError` if the plan doesn't reproduce the captured
+        addresses (e.g. the definition has changed since).
+
+        Arguments:
+        - `logger_def`: `LoggerDef` the file was captured with
+        """
+        plan = DecodePlan(
+            [logger_def.AllParameters[x] for x in self.Params],
+            [logger_def.AllSwitches[x] for x in self.Switches]
+        )
+        if list(plan.Addresses) != self.Addresses:
+            raise ValueError(
+                'Captured addresses do not match the logger definition'
+            )
+        return plan
+
+    @property
+    def Header(self):
+        return self._header
+
+    @property
+    def Addresses(self):
+        return self._header['addresses']
+
+    @property
+    def Params(self):
+        "`list` of param identifiers of the query"
+        return self._header['params']
+
+    @property
+    def Switches(self):
+        "`list` of switch identifiers of the query"
+        return self._header['switches']
+
+class CaptureReader(object):
+    """Reader of capture files written by `RawCapture`.
+
+    Records are memory-mapped, and only read from disk when accessed.
+    """
+
+    def __init__(self, fpath, scan_chunk=1 << 20):
+        """Initializer.
+
+        Arguments:
+        - `fpath`: path of the capture file
+
+        Keywords [Default]:
+        - `scan_chunk` [`1048576`]: number of records checked at a time
+            for the end of a segment
+        """
+        self._fpath = fpath
+        self._segments = []
+
+        size = os.path.getsize(fpath)
+        with open(fpath, 'rb') as fp:
+            if fp.read(len(_magic)) != _magic:
+                raise ValueError('{} is not a capture file'.format(fpath))
+
+            # memory-map the file, unless there are no records at all
+            mm = None
+            if size > len(_magic) + _block_header.size:
+                mm = np.memmap(fp, dtype=np.uint8, mode='r')
+
+            pos = len(_magic)
+            while True:
+                fp.seek(pos)
+                header = fp.read(_block_header.size)
+                if len(header) < _block_header.size:
+                    break
+
+                tag, hsize, crc = _block_header.unpack(header)
+                payload = fp.read(hsize)
+                if (
+                    tag != _addr_tag or len(payload) != hsize
+                    or zlib.crc32(payload) != crc
+                ):
+                    _logger.warning('{} is truncated at offset {}'.format(
+                        fpath, pos
+                    ))
+                    break
+
+                header = json.loads(payload.decode())
+                dtype = _record_dtype(len(header['addresses']))
+                start = pos + _block_header.size + hsize
+                count = (size - start)//dtype.itemsize
+
+                records = np.ndarray(
+                    (count, ), dtype=dtype, buffer=mm, offset=start
+                ) if count else np.zeros(0, dtype=dtype)
+
+                # look for the end of the segment
+                end = None
+                for i in range(0, count, scan_chunk):
+                    found = np.flatnonzero(records['t'][i:i + scan_chunk] == -1)
+                    if found.size:
+                        end = i + int(found[0])
+                        break
+
+                if end is None:
+                    self._segments.append(CaptureSegment(header, records))
+                    break
+
+                self._segments.append(CaptureSegment(header, records[:end]))
+                pos = start + end*dtype.itemsize + len(_segment_end)
+
+    def columns(self, logger_def):
+        """Returns a `list` of (`identifier`, `name`, `units`) of all
+        params and switches of the file, in order of appearance.
+
+        Arguments:
+        - `logger_def`: `LoggerDef` the file was captured with
+        """
+        columns = {}
+        for seg in self._segments:
+            for identifier in seg.Params:
+                p = logger_def.AllParameters[identifier]
+                columns.setdefault(identifier, _column(p))
+            for identifier in seg.Switches:
+                p = logger_def.AllSwitches[identifier]
+                columns.setdefault(identifier, _column(p))
+        return list(columns.values())
+
+    def decode(self, logger_def, chunk_size=1 << 16):
+        """Generator of `3-tuple`s (`columns`, `times`, `values`), one per
+        chunk of records, laid out as `LogReader.batches`.
+
+        Each segment is decoded through a `DecodePlan` of its params and
+        switches, with their current scalings, in vectorized chunks.
+
+        Arguments:
+        - `logger_def`: `LoggerDef` the file was captured with
+
+        Keywords [Default]:
+        - `chunk_size` [`65536`]: number of records decoded at a time
+        """
+        for seg in self._segments:
+            plan = seg.plan(logger_def)
+            columns = [_column(x) for x in plan.Params + plan.Switches]
+            nparams = len(plan.Params)
+
+            for start in range(0, len(seg), chunk_size):
+                stop = start + chunk_size
+                data = seg.data(start, stop)
+
+                values = np.empty((len(columns), len(data)))
+                values[:nparams] = plan.scale(data).T
+                values[nparams:] = plan.decode_switches(data).T
+
+                yield columns, seg.times(start, stop), values
+
+    @property
+    def Segments(self):
+        "`list` of `CaptureSegment`s of the file"
+        return self._segments
+
+def _column(p):
+    "Returns the (`identifier`, `name`, `units`) column of a param or switch"
+    scaling = getattr(p, 'Scaling', None)
+    units = scaling.units if scaling is not None else None
+    return (p.Identifier, p.Name, units or '')
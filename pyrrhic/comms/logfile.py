@@ -0,0 +1,386 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Streaming of logged samples to disk.
+
+Log files are append-only sequences of blocks, following an 8 byte
+magic number. Each block has a 12 byte header (`tag`, payload length,
+CRC32 of the payload), followed by its payload:
+- `COLS`: JSON `list` of [`identifier`, `name`, `units`] columns, which
+    apply to all following `DATA` blocks
+- `DATA`: little-endian `uint32` sample count `n`, followed by `n`
+    `float64` timestamps (epoch seconds) and `n` `float64` values of each
+    column in turn
+- `FOOT`: checkpoint with the total sample count, first and last
+    timestamps, and whether the file was closed cleanly
+
+A footer is written (and the file synced to disk) periodically, so a
+file cut short by a crash is read up to its last intact block.
+"""
+
+import io
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+
+from queue import Empty
+
+import numpy as np
+
+from ..common.helpers import PyrrhicMessage, PyrrhicWorker
+
+_logger = logging.getLogger(__name__)
+
+_magic = b'PYRRLOG1'
+_block_header = struct.Struct('<4sII')
+_data_header = struct.Struct('<I')
+_footer = struct.Struct('<Qdd?')
+
+_cols_tag = b'COLS'
+_data_tag = b'DATA'
+_foot_tag = b'FOOT'
+
+def _write_block(fp, tag, payload):
+    "Writes a block to `fp` and returns the number of bytes written"
+    fp.write(_block_header.pack(tag, len(payload), zlib.crc32(payload)))
+    fp.write(payload)
+    return _block_header.size + len(payload)
+
+class LogWriter(PyrrhicWorker):
+    """Worker thread that streams batches of logged samples to a file.
+
+    Messages sent to `InQueue`:
+    - `Columns`: `list` of (`identifier`, `name`, `units`) columns of
+        the following samples
+    - `Samples`: `2-tuple` (`times`, `values`) of a batch of samples,
+        where `values` is a 2D array with one row per column. The arrays
+        are owned by the writer once sent.
+
+    Queued batches are written as they arrive; the file is only synced to
+    disk every `fsync_interval` seconds, along with a footer, and a
+    `LogWriterStats` message with the current `Stats` is sent to
+    `OutQueue`. Errors are sent to `OutQueue` as an `Exception` message,
+    and stop the writer.
+    """
+
+    # magic number at the start of the file
+    _file_magic = _magic
+
+    def __init__(self, fpath, fsync_interval=1.0, buffer_size=1 << 20):
+        """Initializer. The file is created (or truncated) immediately,
+        so an invalid path raises an `OSError` here.
+
+        Arguments:
+        - `fpath`: path of the log file
+
+        Keywords [Default]:
+        - `fsync_interval` [`1.0`]: seconds between syncs to disk
+        - `buffer_size` [`1 MiB`]: size of the write buffer, in bytes
+        """
+        super(LogWriter, self).__init__(daemon=True)
+        self._fpath = fpath
+        self._fsync_interval = fsync_interval
+        self._fp = open(fpath, 'wb', buffering=buffer_size)
+        self._ncols = None
+
+        self._samples = 0
+        self._bytes = 0
+        self._busy = 0.0
+        self._start = None
+        self._end = None
+        self._opened = time.perf_counter()
+
+        self._bytes += self._fp.write(self._file_magic)
+
+    def run(self):
+        last_sync = time.perf_counter()
+        dirty = False
+
+        try:
+            while True:
+                stopping = self._stoprequest.is_set()
+
+                # wait briefly for a message, then handle all queued
+                try:
+                    msgs = [self._in_q.get(timeout=0.1)]
+                except Empty:
+                    msgs = []
+                while True:
+                    try:
+                        msgs.append(self._in_q.get_nowait())
+                    except Empty:
+                        break
+
+                start = time.perf_counter()
+                for m in msgs:
+                    self._handle(m)
+                    dirty = True
+
+                if dirty and (
+                    stopping or start - last_sync >= self._fsync_interval
+                ):
+                    self._sync()
+                    last_sync = time.perf_counter()
+                    dirty = False
+                    self._out_q.put(PyrrhicMessage('LogWriterStats', self.Stats))
+
+                self._busy += time.perf_counter() - start
+
+                # only exit once everything queued before the stop request
+                # has been written
+                if stopping and not msgs:
+                    break
+
+        except Exception as e:
+            self._out_q.put(PyrrhicMessage('Exception', data=e))
+
+        finally:
+            self._close()
+
+    def _handle(self, m):
+        if m.Message == 'Columns':
+            columns = [list(x) for x in m.Data]
+            self._ncols = len(columns)
+            self._bytes += _write_block(
+                self._fp, _cols_tag, json.dumps(columns).encode()
+            )
+
+        elif m.Message == 'Samples':
+            times, values = m.Data
+            times = np.ascontiguousarray(times, dtype='<f8')
+            values = np.ascontiguousarray(values, dtype='<f8')
+
+            if self._ncols is None or values.shape != (self._ncols, len(times)):
+                raise ValueError(
+                    'Samples of shape {} do not match the {} log columns'.format(
+                        values.shape, self._ncols
+                    )
+                )
+
+            if not len(times):
+                return
+
+            payload = b''.join((
+                _data_header.pack(len(times)), times.tobytes(), values.tobytes()
+            ))
+            self._bytes += _write_block(self._fp, _data_tag, payload)
+
+            self._samples += len(times)
+            if self._start is None:
+                self._start = float(times[0])
+            self._end = float(times[-1])
+
+    def _write_footer(self, closed):
+        self._bytes += _write_block(self._fp, _foot_tag, _footer.pack(
+            self._samples,
+            np.nan if self._start is None else self._start,
+            np.nan if self._end is None else self._end,
+            closed
+        ))
+
+    def _sync(self, closed=False):
+        self._write_footer(closed)
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def _close(self):
+        if self._fp.closed:
+            return
+
+        try:
+            start = time.perf_counter()
+            self._sync(closed=True)
+            self._busy += time.perf_counter() - start
+        finally:
+            self._fp.close()
+            _logger.info('Closed log file {} ({} samples)'.format(
+                self._fpath, self._samples
+            ))
+
+    @property
+    def FilePath(self):
+        return self._fpath
+
+    @property
+    def Stats(self):
+        """`dict` of write statistics:
+        - `samples`: number of samples written
+        - `bytes`: number of bytes written
+        - `busy`: seconds spent writing and syncing
+        - `throughput`: bytes written per second spent writing
+        - `rate`: samples written per second since the file was opened
+        """
+        elapsed = time.perf_counter() - self._opened
+        return {
+            'samples': self._samples,
+            'bytes': self._bytes,
+            'busy': self._busy,
+            'throughput': self._bytes/self._busy if self._busy else 0.0,
+            'rate': self._samples/elapsed if elapsed else 0.0,
+        }
+
+class LogReader(object):
+    """Reader of log files written by `LogWriter`.
+
+    Blocks are read sequentially and stop at the first truncated or
+    corrupt block, so files cut short by a crash can still be read.
+    """
+
+    def __init__(self, fpath):
+        """Initializer.
+
+        Arguments:
+        - `fpath`: path of the log file
+        """
+        self._fpath = fpath
+        self._footer = None
+        self._intact = True
+
+        with open(fpath, 'rb') as fp:
+            if fp.read(len(_magic)) != _magic:
+                raise ValueError('{} is not a log file'.format(fpath))
+
+    def blocks(self):
+        "Generator of (`tag`, `payload`) of the intact blocks of the file"
+        with open(self._fpath, 'rb') as fp:
+            fp.seek(len(_magic))
+
+            while True:
+                header = fp.read(_block_header.size)
+                if not header:
+                    break
+
+                if len(header) == _block_header.size:
+                    tag, size, crc = _block_header.unpack(header)
+                    payload = fp.read(size)
+                    if len(payload) == size and zlib.crc32(payload) == crc:
+                        yield tag, payload
+                        continue
+
+                _logger.warning('{} is truncated at offset {}'.format(
+                    self._fpath, fp.tell()
+                ))
+                self._intact = False
+                break
+
+    def batches(self):
+        """Generator of `3-tuple`s (`columns`, `times`, `values`), one per
+        block of samples, where `columns` is a `list` of (`identifier`,
+        `name`, `units`) and `values` has one row per column.
+        """
+        columns = []
+
+        for tag, payload in self.blocks():
+            if tag == _cols_tag:
+                columns = [tuple(x) for x in json.loads(payload.decode())]
+
+            elif tag == _data_tag:
+                n, = _data_header.unpack_from(payload)
+                data = np.frombuffer(
+                    payload, dtype='<f8', offset=_data_header.size
+                )
+                yield (
+                    columns, data[:n],
+                    data[n:].reshape(len(columns), n)
+                )
+
+            elif tag == _foot_tag:
+                samples, start, end, closed = _footer.unpack(payload)
+                self._footer = {
+                    'samples': samples, 'start': start, 'end': end,
+                    'closed': closed
+                }
+
+    def columns(self):
+        "Returns a `list` of all columns of the file, in order of appearance"
+        columns = {}
+        for tag, payload in self.blocks():
+            if tag == _cols_tag:
+                for x in json.loads(payload.decode()):
+                    columns.setdefault(x[0], tuple(x))
+        return list(columns.values())
+
+    @property
+    def Footer(self):
+        """`dict` of the last footer read by `batches`, with the keys
+        `samples`, `start`, `end` and `closed`, or `None`
+        """
+        return self._footer
+
+    @property
+    def Intact(self):
+        "Whether the blocks read so far were all intact"
+        return self._intact
+
+def export_csv(log_path, csv_path):
+    """Stream a log file to a RomRaider-style CSV file.
+
+    The first column is the time in milliseconds since the first sample,
+    followed by one column per logged parameter or switch, with headers of
+    the form `name (units)`. Columns that aren't logged for a sample are
+    left blank. Returns the number of rows written.
+
+    Arguments:
+    - `log_path`: path of the log file written by `LogWriter`
+    - `csv_path`: path of the CSV file to write
+    """
+    reader = LogReader(log_path)
+    return write_csv(csv_path, reader.columns(), reader.batches())
+
+def write_csv(csv_path, columns, batches):
+    """Stream batches of samples to a RomRaider-style CSV file. Refer to
+    `export_csv`. Returns the number of rows written.
+
+    Arguments:
+    - `csv_path`: path of the CSV file to write
+    - `columns`: `list` of (`identifier`, `name`, `units`) of all columns
+        of the file
+    - `batches`: iterable of (`columns`, `times`, `values`), refer to
+        `LogReader.batches`
+    """
+    index = {x[0]: i for i, x in enumerate(columns)}
+
+    header = ['Time'] + [
+        '{} ({})'.format(name, units) if units else name
+        for _, name, units in columns
+    ]
+    fmt = ','.join(['%d'] + ['%.6g']*len(columns))
+
+    rows = 0
+    t0 = None
+
+    with open(csv_path, 'w', newline='') as fp:
+        fp.write(','.join(header) + '\r\n')
+
+        for cols, times, values in batches:
+            if not len(times):
+                continue
+            if t0 is None:
+                t0 = times[0]
+
+            table = np.full((len(times), len(columns) + 1), np.nan)
+            table[:, 0] = np.rint((times - t0)*1000)
+            rows_idx = [index[x[0]] + 1 for x in cols]
+            table[:, rows_idx] = values.T
+
+            out = io.StringIO()
+            np.savetxt(out, table, fmt=fmt, delimiter=',', newline='\r\n')
+            fp.write(out.getvalue().replace('nan', ''))
+            rows += len(times)
+
+    return rows
@@ -13,14 +13,587 @@
 #   You should have received a copy of the GNU Affero General Public License
 #   along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import time
+
 from collections import deque
 from datetime import datetime
+from operator import attrgetter
+
+import numpy as np
 
 from ...common.definitions import ROMDefinition
+from ...common.enums import ByteOrder, _dtype_size_map
+from ...common.structures import _dtype_range_map, _numpy_dtype_map
+
+_get_scaling = attrgetter('Scaling')
+
+_default_buffer_capacity = 1 << 14
 
 class TranslatorParseError(Exception):
     pass
 
+class LogFrame(object):
+    """Display values of every logged parameter and switch for a single
+    response, as published by the translator to all consumers"""
+
+    def __init__(self, plan, values, states, timestamp=None):
+        """Initializer.
+
+        Arguments:
+        - `plan`: `DecodePlan` the response was decoded with
+        - `values`: float `numpy` array of display values, one per param
+            of the plan (`NaN` for parameters without a scaling)
+        - `states`: boolean `numpy` array, one per switch of the plan
+
+        Keywords [Default]:
+        - `timestamp` [`None`]: `datetime` the response was received
+        """
+        self._plan = plan
+        self._values = values
+        self._states = states
+        self._timestamp = timestamp
+
+    def __getitem__(self, identifier):
+        "Returns the display value of a param, or state of a switch"
+        kind, idx = self._plan.Columns[identifier]
+        if kind == 'param':
+            return self._values[idx]
+        return self._states[idx]
+
+    @property
+    def Params(self):
+        "`list` of parameters, in `Values` order"
+        return self._plan.Params
+
+    @property
+    def Values(self):
+        "float `numpy` array of the display value of each parameter"
+        return self._values
+
+    @property
+    def Switches(self):
+        "`list` of switches, in `States` order"
+        return self._plan.Switches
+
+    @property
+    def States(self):
+        "boolean `numpy` array of the state of each switch"
+        return self._states
+
+    @property
+    def Timestamp(self):
+        "`datetime` the response was received, or `None`"
+        return self._timestamp
+
+class DecodePlan(object):
+    """Precompiled layout of the response to a logger query.
+
+    Built once per query from the enabled parameters and switches, and
+    used to decode every response in one vectorized pass: the bytes of
+    all parameters are gathered with a single index array and viewed
+    through a structured dtype, and switches are extracted with bit
+    masks. Display values are converted in one call per group of
+    parameters sharing a scaling expression and data type.
+
+    Responses contain one byte per address of the query, in the order
+    of `Addresses`.
+    """
+
+    def __init__(self, params, switches):
+        """Initializer.
+
+        Parameters whose addresses don't cover their data type are left
+        out of the plan, and their raw value is cleared on every update.
+
+        Arguments:
+        - `params`: `list` of enabled `StdParam`/`ExtParam`s
+        - `switches`: `list` of enabled `SwitchParam`s
+        """
+        addr_map = {}
+
+        # switch addresses first, then parameter addresses
+        for sw in switches:
+            for a in sw.Addresses:
+                addr_map.setdefault(a, len(addr_map))
+
+        self._params = []
+        self._missing = []
+        param_addrs = []
+        offsets = []
+
+        for p in params:
+            psize = _dtype_size_map[p.Datatype]
+            addrs = []
+            if len(p.Addresses) == psize:
+                addrs = p.Addresses
+            elif len(p.Addresses) == 1:
+                base_addr = p.Addresses[0]
+                addrs = range(base_addr, base_addr + psize)
+
+            if not addrs:
+                self._missing.append(p)
+                continue
+
+            for a in addrs:
+                addr_map.setdefault(a, len(addr_map))
+
+            self._params.append(p)
+            param_addrs.extend(addrs)
+            offsets.append([addr_map[a] for a in addrs])
+
+        self._addresses = list(addr_map)
+
+        # gathering the parameter bytes lays them out back to back, in
+        # the layout of the structured dtype
+        self._gather = np.array(
+            [addr_map[a] for a in param_addrs], dtype=np.intp
+        )
+        # TODO: implement byte order
+        self._dtype = np.dtype([
+            (p.Identifier, _numpy_dtype_map[(p.Datatype, ByteOrder.BIG_ENDIAN)])
+            for p in self._params
+        ])
+        self._slices = []
+        offs = 0
+        for p in self._params:
+            size = _dtype_size_map[p.Datatype]
+            self._slices.append((p, offs, offs + size))
+            offs += size
+
+        self._switches = list(switches)
+        self._switch_idx = np.array(
+            [addr_map[x.Addresses[0]] for x in self._switches], dtype=np.intp
+        )
+        self._switch_masks = np.array(
+            [1 << int(x.Datatype) for x in self._switches], dtype=np.uint8
+        )
+
+        self._offsets = offsets
+        self._groups = None
+        self._group_scalings = None
+        self._scaled = None
+
+        self._columns = {
+            p.Identifier: ('param', i) for i, p in enumerate(self._params)
+        }
+        self._columns.update(
+            {x.Identifier: ('switch', i) for i, x in enumerate(self._switches)}
+        )
+
+    def _as_array(self, resp):
+        "Returns `resp` as a `numpy.uint8` array, checking its size"
+        if isinstance(resp, np.ndarray):
+            data = resp
+        else:
+            data = np.frombuffer(resp, dtype=np.uint8)
+
+        if data.shape[-1] != len(self._addresses):
+            raise TranslatorParseError(
+                'Invalid response size. Received {}, expected {}'.format(
+                    data.shape[-1], len(self._addresses)
+                )
+            )
+        return data
+
+    def gather(self, resp):
+        """Returns a `numpy.uint8` array of the raw parameter bytes of the
+        given response(s), back to back in the layout of `Dtype`.
+
+        Arguments:
+        - `resp`: `bytes` of a single response, or 2D `numpy.uint8`
+            array with one response per row
+        """
+        return self._as_array(resp).take(self._gather, axis=-1)
+
+    def decode(self, resp):
+        """Returns the raw parameter values of the given response(s), as
+        a `numpy` array of `Dtype` (with one record per response).
+
+        Arguments:
+        - `resp`: refer to `gather`
+        """
+        raw = self.gather(resp)
+
+        if not self._dtype.itemsize:
+            return np.zeros(raw.shape[:-1], dtype=self._dtype)
+
+        return raw.view(self._dtype)[..., 0]
+
+    def decode_switches(self, resp):
+        """Returns a boolean `numpy` array of the switch states of the
+        given response(s), with one column per switch.
+
+        Arguments:
+        - `resp`: refer to `gather`
+        """
+        data = self._as_array(resp)
+        return (data.take(self._switch_idx, axis=-1) & self._switch_masks) != 0
+
+    def _scaling_groups(self):
+        """Returns a `list` of `4-tuple`s (`columns`, `offsets`, `dtype`,
+        `convert`), one per group of parameters sharing a scaling
+        expression and data type, where
+        - `columns` are the columns of the group's params
+        - `offsets` are the response offsets of the bytes of its params
+        - `dtype` is the `numpy.dtype` of their raw values
+        - `convert` converts an array of raw values to display values
+
+        Rebuilt whenever the scaling of a parameter changes.
+        """
+        scalings = list(map(_get_scaling, self._params))
+
+        if self._groups is None or scalings != self._group_scalings:
+            groups = {}
+
+            for i, (p, scaling) in enumerate(zip(self._params, scalings)):
+                if scaling is None:
+                    continue
+
+                expr = scaling.disp_expr
+                key = (
+                    expr if isinstance(expr, str) else id(scaling),
+                    scaling.lookup, p.Datatype
+                )
+                groups.setdefault(key, (scaling, p.Datatype, []))[2].append(i)
+
+            self._groups = []
+            for scaling, dtype, cols in groups.values():
+                lut = scaling.lookup_table(dtype)
+
+                if lut is not None:
+                    lo = _dtype_range_map[dtype][0]
+                    convert = (
+                        lambda x, lut=lut, lo=lo: lut[x.astype(np.intp) - lo]
+                    )
+                else:
+                    convert = (
+                        lambda x, scaling=scaling, dtype=dtype:
+                            scaling.to_disp(x, dtype)
+                    )
+
+                self._groups.append((
+                    np.array(cols, dtype=np.intp),
+                    np.array(
+                        [x for i in cols for x in self._offsets[i]],
+                        dtype=np.intp
+                    ),
+                    # TODO: implement byte order
+                    _numpy_dtype_map[(dtype, ByteOrder.BIG_ENDIAN)],
+                    convert
+                ))
+
+            self._group_scalings = scalings
+            self._scaled = [x is not None for x in scalings]
+
+        return self._groups
+
+    def _scale(self, data):
+        "Returns the display values of the response(s) in array `data`"
+        out = np.full(data.shape[:-1] + (len(self._params),), np.nan)
+
+        for cols, offsets, dtype, convert in self._scaling_groups():
+            raw = data.take(offsets, axis=-1).view(dtype)
+            out[..., cols] = convert(raw)
+
+        return out
+
+    def scale(self, resp):
+        """Returns a float `numpy` array of the display values of the
+        parameters in the given response(s), with one column per param.
+        Parameters without a scaling are `NaN`.
+
+        Arguments:
+        - `resp`: refer to `gather`
+        """
+        return self._scale(self._as_array(resp))
+
+    def update(self, resp, timestamp=None):
+        """Update the planned parameters and switches from a single
+        response, and return its `LogFrame`.
+
+        Each param is given its raw value along with its display value,
+        so that consumers reading `Value` don't convert it again.
+
+        Arguments:
+        - `resp`: `bytes` containing the raw response
+
+        Keywords [Default]:
+        - `timestamp` [`None`]: `datetime` the response was received
+        """
+        data = self._as_array(resp)
+        packed = data.take(self._gather).tobytes()
+        values = self._scale(data)
+        states = (data.take(self._switch_idx) & self._switch_masks) != 0
+
+        for (p, start, end), disp, scaled in zip(
+            self._slices, values.tolist(), self._scaled
+        ):
+            p.set_value(packed[start:end], disp if scaled else None)
+
+        for p in self._missing:
+            p.RawValue = None
+
+        for sw, val in zip(self._switches, states.tolist()):
+            sw.RawValue = val
+
+        return LogFrame(self, values, states, timestamp)
+
+    @property
+    def Addresses(self):
+        "`list` of `int` addresses to query, in response order"
+        return self._addresses
+
+    @property
+    def Columns(self):
+        """`dict` mapping each param/switch identifier to a `2-tuple`
+        (`'param'` or `'switch'`, column index)"""
+        return self._columns
+
+    @property
+    def Dtype(self):
+        """Structured `numpy.dtype` of the decoded parameters, with one
+        field per parameter named by its identifier"""
+        return self._dtype
+
+    @property
+    def Params(self):
+        "`list` of parameters decoded by this plan, in `Dtype` field order"
+        return self._params
+
+    @property
+    def Switches(self):
+        "`list` of switches decoded by this plan, in column order"
+        return self._switches
+
+class SampleBuffer(object):
+    """Fixed-capacity columnar ring buffer of logged samples.
+
+    Holds the most recent `Capacity` samples, with one column per
+    logged parameter or switch (switch states are stored as 0/1), plus
+    a column of timestamps in seconds since the epoch. Timestamps are
+    clamped to never decrease, so windows can be located by time with
+    a binary search.
+
+    All storage is allocated up front and appending doesn't allocate.
+    Every sample is written twice, `Capacity` slots apart, so that any
+    window of recent samples is contiguous and is returned as a
+    read-only view instead of a copy. Views share memory with the
+    buffer, so copy them if they need to outlive `Capacity` appends.
+    """
+
+    def __init__(self, columns=(), capacity=_default_buffer_capacity):
+        """Initializer.
+
+        Keywords [Default]:
+        - `columns` [`()`]: iterable of column identifiers
+        - `capacity` [`16384`]: max number of samples held
+        """
+        if capacity < 1:
+            raise ValueError('Buffer capacity must be at least 1')
+
+        self._capacity = int(capacity)
+        self._set_columns(columns)
+        self._times = np.zeros(2*self._capacity)
+        self._values = np.full((len(self._columns), 2*self._capacity), np.nan)
+        self.clear()
+
+    def _set_columns(self, columns):
+        self._columns = list(columns)
+        self._index = {x: i for i, x in enumerate(self._columns)}
+
+    def _span(self, n):
+        "Returns the (`start`, `end`) slots of the `n` latest samples"
+        end = self._next + self._capacity
+        return end - n, end
+
+    @staticmethod
+    def _view(arr):
+        arr.flags.writeable = False
+        return arr
+
+    def clear(self):
+        "Discard all samples, keeping the columns and capacity"
+        self._next = 0
+        self._len = 0
+        self._last = -np.inf
+
+    def resize(self, columns, capacity=None):
+        """Change the columns (and optionally the capacity) of the buffer.
+
+        The latest samples of columns that are kept are carried over,
+        new columns are `NaN` for those samples. Does nothing if neither
+        the columns nor the capacity change.
+
+        Arguments:
+        - `columns`: iterable of column identifiers
+
+        Keywords [Default]:
+        - `capacity` [`None`]: max number of samples held, or `None` to
+            keep the current capacity
+        """
+        columns = list(columns)
+        capacity = self._capacity if capacity is None else int(capacity)
+
+        if columns == self._columns and capacity == self._capacity:
+            return
+        if capacity < 1:
+            raise ValueError('Buffer capacity must be at least 1')
+
+        n = min(self._len, capacity)
+        start, end = self._span(n)
+        times = self._times[start:end]
+        old_values = self._values
+        old_index = self._index
+
+        self._capacity = capacity
+        self._set_columns(columns)
+        self._times = np.zeros(2*capacity)
+        self._values = np.full((len(columns), 2*capacity), np.nan)
+
+        # keep the held samples at the start of both halves
+        for offset in (0, capacity):
+            self._times[offset:offset + n] = times
+
+            for i, col in enumerate(columns):
+                if col in old_index:
+                    self._values[i, offset:offset + n] = (
+                        old_values[old_index[col], start:end]
+                    )
+
+        self._next = n % capacity
+        self._len = n
+
+    def append(self, values, timestamp=None):
+        """Append a sample.
+
+        Arguments:
+        - `values`: sequence of values, one per column
+
+        Keywords [Default]:
+        - `timestamp` [`None`]: `datetime` or epoch seconds of the
+            sample, or `None` for the current time
+        """
+        self._write(timestamp, values)
+
+    def record(self, frame):
+        """Append the values and switch states of a `LogFrame`, whose
+        params and switches match the columns of the buffer, in order.
+
+        Arguments:
+        - `frame`: `LogFrame` to append
+        """
+        self._write(frame.Timestamp, frame.Values, frame.States)
+
+    def _write(self, timestamp, values, states=None):
+        if timestamp is None:
+            t = time.time()
+        elif isinstance(timestamp, datetime):
+            t = timestamp.timestamp()
+        else:
+            t = float(timestamp)
+        t = max(t, self._last)
+
+        i = self._next
+        j = i + self._capacity
+        cols = self._values
+
+        if states is None:
+            cols[:, i] = values
+            cols[:, j] = values
+        else:
+            k = len(values)
+            cols[:k, i] = values
+            cols[:k, j] = values
+            cols[k:, i] = states
+            cols[k:, j] = states
+
+        self._times[i] = self._times[j] = t
+        self._last = t
+        self._next = (i + 1) % self._capacity
+        if self._len < self._capacity:
+            self._len += 1
+
+    def last(self, n=None):
+        """Returns a `2-tuple` (`times`, `values`) of read-only views of
+        the latest `n` samples, oldest first, where `values` has one row
+        per column.
+
+        Keywords [Default]:
+        - `n` [`None`]: number of samples, or `None` for all of them
+        """
+        n = self._len if n is None else max(0, min(int(n), self._len))
+        start, end = self._span(n)
+        return (
+            self._view(self._times[start:end]),
+            self._view(self._values[:, start:end])
+        )
+
+    def between(self, start, end=None):
+        """Returns a `2-tuple` (`times`, `values`) of read-only views of
+        the held samples timestamped within [`start`, `end`].
+
+        Arguments:
+        - `start`: `datetime` or epoch seconds of the first sample
+
+        Keywords [Default]:
+        - `end` [`None`]: `datetime` or epoch seconds of the last sample,
+            or `None` for the latest one
+        """
+        times, values = self.last()
+
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        lo = np.searchsorted(times, start, side='left')
+
+        if end is None:
+            hi = len(times)
+        else:
+            if isinstance(end, datetime):
+                end = end.timestamp()
+            hi = np.searchsorted(times, end, side='right')
+
+        return times[lo:hi], values[:, lo:hi]
+
+    def since(self, seconds):
+        """Returns the samples of the last `seconds` seconds, relative to
+        the latest sample. Refer to `between`.
+
+        Arguments:
+        - `seconds`: length of the window in seconds
+        """
+        if not self._len:
+            return self.last()
+        return self.between(self._last - seconds)
+
+    def column(self, identifier, n=None):
+        """Returns a read-only view of the latest `n` values of a column.
+
+        Arguments:
+        - `identifier`: column identifier
+
+        Keywords [Default]:
+        - `n` [`None`]: refer to `last`
+        """
+        return self.last(n)[1][self._index[identifier]]
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def Capacity(self):
+        "Max number of samples held"
+        return self._capacity
+
+    @property
+    def Columns(self):
+        "`list` of column identifiers, in row order of the values"
+        return self._columns
+
+    @property
+    def Latest(self):
+        "Timestamp of the latest sample in epoch seconds, or `None`"
+        return self._last if self._len else None
+
 class EndpointProtocol(object):
 
     # tuple of phy classes supported by this protocol
@@ -91,6 +664,8 @@ class EndpointTranslator(object):
 
     def __init__(self):
         self._def = None
+        self._frame = None
+        self._buffer = SampleBuffer()
         self._reset_freq_avg()
 
     def _check_def(self):
@@ -135,11 +710,15 @@ class EndpointTranslator(object):
         """
         raise NotImplementedError
 
-    def extract_parameters(self, resp):
-        """Update the current param values from the given byte string.
+    def extract_values(self, resp, timestamp=None):
+        """Update the current param values from the given byte string,
+        and publish them as the current `Frame`.
 
         Arguments:
         - `resp`: `bytes` containing the raw data from the endpoint
+
+        Keywords [Default]:
+        - `timestamp` [`None`]: `datetime` the data was received
         """
         raise NotImplementedError
 
@@ -176,6 +755,16 @@ class EndpointTranslator(object):
     def Definition(self):
         return self._def
 
+    @property
+    def Frame(self):
+        "`LogFrame` of the most recent response, or `None`"
+        return self._frame
+
+    @property
+    def Buffer(self):
+        "`SampleBuffer` of the recent responses to the log query"
+        return self._buffer
+
     @Definition.setter
     def Definition(self, d):
         if isinstance(d, ROMDefinition):
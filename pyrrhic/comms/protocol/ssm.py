@@ -21,11 +21,11 @@ from PyJ2534 import IoctlParameter, ProtocolFlags
 from time import sleep
 
 from ... import _debug
-from ...common.enums import LoggerEndpoint, LoggerProtocol, _dtype_size_map
+from ...common.enums import LoggerEndpoint, LoggerProtocol
 from ...livetune import LiveTuneState, MerpModLiveTune
 from ..phy.j2534 import J2534PassThru_ISO9141
 from .base import (
-    EndpointProtocol, EndpointTranslator, TranslatorParseError
+    DecodePlan, EndpointProtocol, EndpointTranslator, TranslatorParseError
 )
 
 _logger = logging.getLogger(__name__)
@@ -247,7 +247,7 @@ class SSMTranslator(EndpointTranslator):
 
     def __init__(self):
         super(SSMTranslator, self).__init__()
-        self._addr_map = {}
+        self._plan = None
         self._livetune = None
 
         self._livetune_query = None
@@ -259,77 +259,25 @@ class SSMTranslator(EndpointTranslator):
     def generate_log_request(self):
         self._check_def()
 
-        self._addr_map = {}
-
-        # add switch addresses
-        for s in self.EnabledSwitches:
-            for a in s.Addresses:
-                if a not in self._addr_map:
-                    self._addr_map[a] = None
-
-        # add parameter addresses
-        for p in self.EnabledParams:
-            psize = _dtype_size_map[p.Datatype]
-            addrs = []
-            if len(p.Addresses) == psize:
-                addrs = p.Addresses
-            elif len(p.Addresses) == 1:
-                base_addr = p.Addresses[0]
-                addrs = range(base_addr, base_addr + psize)
-
-            for a in addrs:
-                if a not in self._addr_map:
-                    self._addr_map[a] = None
+        self._plan = DecodePlan(self.EnabledParams, self.EnabledSwitches)
+        self._frame = None
+        self._buffer.resize(self._plan.Columns)
 
         func = 'read_addresses'
-        args = (list(self._addr_map.keys()), )
+        args = (list(self._plan.Addresses), )
         kwargs = {'continuous': True}
         return (func, args, kwargs, True)
 
-    def extract_values(self, resp):
+    def extract_values(self, resp, timestamp=None):
         self._check_def()
 
-        if not len(resp) == len(self._addr_map):
-            raise TranslatorParseError(
-                'Invalid response size. Received {}, expected {}'.format(
-                    len(resp), len(self._addr_map)
-                )
-            )
+        if self._plan is None:
+            raise TranslatorParseError('No current log query to parse')
 
+        self._frame = self._plan.update(resp, timestamp=timestamp)
+        self._buffer.record(self._frame)
         self._update_freq_avg()
 
-        # map response string bytes into address map
-        for a in self._addr_map:
-            self._addr_map[a] = resp[0:1]
-            resp = resp[1:]
-
-        # populate switch values
-        for s in self.EnabledSwitches:
-            addr = s.Addresses[0]
-            raw_byte = self._addr_map[addr]
-            bit = s.Datatype
-
-            # TODO: implement byteorder
-            s.RawValue = (
-                True if (int.from_bytes(raw_byte, 'big') >> bit) & 0x01
-                else False
-            )
-
-        # populate param values
-        for p in self.EnabledParams:
-            psize = _dtype_size_map[p.Datatype]
-            addrs = []
-            if len(p.Addresses) == psize:
-                addrs = p.Addresses
-            elif len(p.Addresses) == 1:
-                base_addr = p.Addresses[0]
-                addrs = range(base_addr, base_addr + psize)
-
-            if addrs:
-                p.RawValue = b''.join([self._addr_map[a] for a in addrs])
-            else:
-                p.RawValue = None
-
     def generate_livetune_query(self):
         if not self._livetune:
             return
@@ -514,6 +462,11 @@ class SSMTranslator(EndpointTranslator):
         else:
             self._livetune = None
 
+    @property
+    def DecodePlan(self):
+        "`DecodePlan` of the current log query, or `None`"
+        return self._plan
+
     @property
     def SupportsLiveTune(self):
         return self._livetune is not None
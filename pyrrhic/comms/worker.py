@@ -16,10 +16,20 @@
 from datetime import datetime, timedelta
 from enum import IntFlag, auto
 from queue import Empty
-from time import sleep
+from time import perf_counter, sleep
 
 from ..common.enums import LoggerEndpoint
 from ..common.helpers import PyrrhicMessage, PyrrhicWorker
+from .capture import RawCapture
+from .logfile import LogWriter
+
+# while capturing raw responses, only pass one on for display this often
+_capture_preview_interval = 0.1
+
+# seconds to sleep between loop iterations. While capturing, the loop
+# only sleeps (briefly) when no response was handled
+_loop_interval = 0.01
+_capture_idle_interval = 0.001
 
 class CommsState(IntFlag):
     UNDEFINED       = 0      # state unknown/uninitialized
@@ -37,6 +47,8 @@ class CommsState(IntFlag):
     HAS_OUT_FILE    = auto() # valid output file specified
     WRITING_TO_FILE = auto() # writing data to output file
 
+    RAW_CAPTURE     = auto() # storing raw responses for deferred decoding
+
 class CommsWorker(PyrrhicWorker):
     def __init__(self, interface_name, phy, protocol, **kwargs):
         super(CommsWorker, self).__init__()
@@ -49,6 +61,10 @@ class CommsWorker(PyrrhicWorker):
         self._current_livetune_query = None
         self._current_livetune_write = None
         self._current_filepath = None
+        self._log_writer = None
+        self._capture = None
+        self._capture_info = None
+        self._capture_preview_time = perf_counter()
 
     def run(self):
         "Main communication working loop"
@@ -62,6 +78,8 @@ class CommsWorker(PyrrhicWorker):
             except Empty:
                 m = None
 
+            handled = False
+
             try:
                 # handle messages from UI
                 if m:
@@ -80,6 +98,22 @@ class CommsWorker(PyrrhicWorker):
                     elif msg == 'LiveTuneWrite':
                         self._set_live_tune_write(data)
 
+                    elif msg == 'SetOutputFile':
+                        self._set_output_file(data)
+
+                    elif msg == 'SetCaptureFile':
+                        self._set_capture_file(data)
+
+                    elif msg == 'CaptureInfo':
+                        self._capture_info = data
+
+                # log writer stopped on its own (e.g. disk error)
+                if (
+                    self._state & CommsState.WRITING_TO_FILE
+                    and not self._log_writer.is_alive()
+                ):
+                    self._state &= ~CommsState.WRITING_TO_FILE
+
                 # try initializing if necessary and retry time has lapsed
                 if not (self._state & CommsState.INITIALIZED):
                     if (_cur_time - self._last_init_time) > timedelta(seconds=5):
@@ -103,21 +137,31 @@ class CommsWorker(PyrrhicWorker):
                     if not self._state & CommsState.WAIT_FOR_RESP:
                         self._initiate_query()
                     else:
-                        self._check_query_response()
+                        handled = self._check_query_response()
 
             except Exception as e:
                 self._out_q.put(PyrrhicMessage('Exception', data=e))
                 continue
 
             finally:
-                # sleep worker thread to avoid excessive CPU usage
-                sleep(0.01)
+                # sleep worker thread to avoid excessive CPU usage. While
+                # capturing, responses are read back to back as long as
+                # there are any
+                capturing = CommsState.RAW_CAPTURE | CommsState.LOG_QUERY
+                if (self._state & capturing) != capturing:
+                    sleep(_loop_interval)
+                elif not handled:
+                    sleep(_capture_idle_interval)
 
         # clean-up upon worker thread exit
         if self._state & (CommsState.CONT_LOG_QUERY | CommsState.WAIT_FOR_RESP):
             # interrupt continuous query
             self._protocol.interrupt_endpoint(self._current_endpoint)
 
+        # write out all queued samples and close the output files
+        self._close_output_file()
+        self._close_capture_file()
+
         # call the destructor for the protocol, to ensure the physical
         # device layer is released
         del self._protocol
@@ -159,6 +203,9 @@ class CommsWorker(PyrrhicWorker):
                 self._current_log_query = request
                 self._state |= CommsState.LOG_QUERY
 
+                if self._state & CommsState.RAW_CAPTURE:
+                    self._start_capture_segment()
+
                 flags = CommsState.CONT_LOG_QUERY
                 if cont:
                     self._state |= flags
@@ -283,6 +330,7 @@ class CommsWorker(PyrrhicWorker):
             self._state |= CommsState.LIVETUNE_VERIFY | CommsState.WAIT_FOR_RESP
 
     def _check_query_response(self):
+        "Handle any pending query response, returns `True` if there was one"
 
         if self._state & CommsState.LIVETUNE_VERIFY:
             msg = 'LiveTuneVerify'
@@ -291,7 +339,7 @@ class CommsWorker(PyrrhicWorker):
         elif self._state & CommsState.LOG_QUERY:
             msg = 'LogQueryResponse'
         else:
-            return
+            return False
 
         resp = self._protocol.check_receive_buffer()
 
@@ -313,7 +361,7 @@ class CommsWorker(PyrrhicWorker):
                     self._state &= ~(
                         CommsState.LIVETUNE_VERIFY | CommsState.WAIT_FOR_RESP
                     )
-                    return
+                    return True
 
             elif msg == 'LiveTuneResponse':
                 self._current_livetune_query = None
@@ -327,7 +375,22 @@ class CommsWorker(PyrrhicWorker):
                     self._current_log_query = None
                     self._state &= ~CommsState.LOG_QUERY
 
+                if self._state & CommsState.RAW_CAPTURE:
+                    self._capture.append(resp)
+
+                    # only pass a preview of the responses on for display
+                    cur_time = perf_counter()
+                    if (
+                        cur_time - self._capture_preview_time
+                        < _capture_preview_interval
+                    ):
+                        return True
+                    self._capture_preview_time = cur_time
+
             self._out_q.put(PyrrhicMessage(msg, data=resp))
+            return True
+
+        return False
 
     def _pause_logging(self):
         # interrupt and clear waiting flags
@@ -338,11 +401,96 @@ class CommsWorker(PyrrhicWorker):
     def _set_output_file(self, file_path):
         """Set the current output file to stream logging data to
 
+        Spawns a `LogWriter` thread for the file, and sends it back in an
+        `OutputFile` message, so that batches of samples can be queued
+        to it directly, without going through this thread. Disk writes
+        never block the communication loop.
+
         Arguments:
-        - `file_path`: `str` containing absolute filepath to write to
+        - `file_path`: `str` containing absolute filepath to write to, or
+            `None` to close the current output file
         """
+        self._close_output_file(wait=False)
+
+        if file_path:
+
+            # check if filepath is valid and writable
+            try:
+                self._log_writer = LogWriter(file_path)
+            except OSError as e:
+                self._out_q.put(PyrrhicMessage('OutputFileError', data=e))
+                return
+
+            # update state to indicate valid output file
+            self._current_filepath = file_path
+            self._state |= CommsState.HAS_OUT_FILE | CommsState.WRITING_TO_FILE
+            self._log_writer.start()
+
+        self._out_q.put(PyrrhicMessage('OutputFile', data=self._log_writer))
 
-        # check if filepath is valid and writable
+    def _close_output_file(self, wait=True):
+        """Stop the current `LogWriter`, after it writes all queued samples
+
+        Keywords [Default]:
+        - `wait` [`True`]: wait for the writer to close the file
+        """
+        if self._log_writer is not None:
+            self._log_writer.join(None if wait else 0)
+            self._log_writer = None
+            self._current_filepath = None
+
+        self._state &= ~(CommsState.HAS_OUT_FILE | CommsState.WRITING_TO_FILE)
+
+    def _set_capture_file(self, data):
+        """Set the current file to capture raw log query responses to
+
+        While capturing, responses are stored undecoded with a timestamp,
+        and only a preview (one response every `_capture_preview_interval`
+        seconds) is sent on for display. An active output file (refer to
+        `_set_output_file`) is fed from the decoded responses, so it only
+        receives the preview samples too; the full rate data is in the
+        capture file. Sends the capture's `CaptureWriter` back in a
+        `CaptureFile` message.
+
+        Arguments:
+        - `data`: `2-tuple` (`file_path`, `info`), where `info` is a `dict`
+            stored in the header of the current query (refer to
+            `RawCapture.start_segment`), or `None` to stop capturing
+        """
+        self._close_capture_file(wait=False)
+
+        if data:
+            file_path, self._capture_info = data
+
+            try:
+                self._capture = RawCapture(file_path)
+            except OSError as e:
+                self._out_q.put(PyrrhicMessage('CaptureFileError', data=e))
+                return
+
+            self._state |= CommsState.RAW_CAPTURE
+            self._start_capture_segment()
+
+        writer = self._capture.Writer if self._capture else None
+        self._out_q.put(PyrrhicMessage('CaptureFile', data=writer))
+
+    def _start_capture_segment(self):
+        "Start a capture segment for the current log query"
+        if self._current_log_query:
+            func, args, kwargs, cont = self._current_log_query
+            if func == 'read_addresses':
+                self._capture.start_segment(
+                    args[0], **(self._capture_info or {})
+                )
+
+    def _close_capture_file(self, wait=True):
+        """Stop capturing raw responses, after all of them are written
+
+        Keywords [Default]:
+        - `wait` [`True`]: wait for the writer to close the file
+        """
+        if self._capture is not None:
+            self._capture.close(wait=wait)
+            self._capture = None
 
-        # update state to indicate valid output file
-        pass
+        self._state &= ~CommsState.RAW_CAPTURE
@@ -20,12 +20,13 @@ import os
 from pubsub import pub
 
 from queue import Empty
+from time import perf_counter
 
 from .common import _prefs_file
-from .common.definitions import DefinitionManager, ROMDefinition
+from .common.definitions import DefinitionManager, DefinitionWatcher
 from .common.helpers import PyrrhicJSONEncoder, PyrrhicMessage
 from .common.preferences import PreferenceManager
-from .common.rom import Rom
+from .common.rom import Rom, RomImage
 
 from .comms.phy import get_all_interfaces
 from .comms.protocol import get_all_protocols, TranslatorParseError
@@ -33,8 +34,10 @@ from .comms.worker import CommsWorker
 
 _logger = logging.getLogger(__name__)
 
-class DefinitionFound(Exception):
-    pass
+# samples are sent to the log writer in batches, every so many samples
+# or seconds, whichever comes first
+_log_batch_size = 64
+_log_batch_interval = 0.25
 
 class PyrrhicController(object):
     "Top-level application controller"
@@ -55,11 +58,19 @@ class PyrrhicController(object):
         self._logger_frame = logger_frame
         self._comms_worker = None
         self._comms_translator = None
+        self._log_writer = None
+        self._log_pending = 0
+        self._log_sent_time = perf_counter()
+        self._capture_writer = None
+        self._capturing = False
 
         self._defmgr = DefinitionManager(
             ecuflashRoot=self._prefs['ECUFlashRepo'].Value,
-            rrlogger_path=self._prefs['RRLoggerDef'].Value
+            rrlogger_path=self._prefs['RRLoggerDef'].Value,
+            lazy=True
         )
+        self._def_watcher = None
+        self._start_definition_watcher()
 
         pub.subscribe(self.live_tune_pull, 'livetune.state.pull.init')
         pub.subscribe(self.live_tune_push, 'livetune.state.push.init')
@@ -73,13 +84,50 @@ class PyrrhicController(object):
         ecuflash_repo_dir = self._prefs['ECUFlashRepo'].Value
         rrlogger_file = self._prefs['RRLoggerDef'].Value
 
-        if ecuflash_repo_dir:
-            self._defmgr.load_ecuflash_repository(ecuflash_repo_dir)
-        if rrlogger_file:
-            self._defmgr.load_rrlogger_file(rrlogger_file)
+        # only reload definition files that have changed
+        self._defmgr.refresh(ecuflash_repo_dir, rrlogger_file)
+        self._start_definition_watcher()
 
         self._editor_frame.refresh_tree()
 
+    def _start_definition_watcher(self):
+        "(Re)start the definition file watcher, if enabled"
+
+        self.stop_definition_watcher()
+
+        if self._prefs['WatchDefinitions'].Value:
+            self._def_watcher = DefinitionWatcher(
+                self._prefs['ECUFlashRepo'].Value,
+                self._prefs['RRLoggerDef'].Value
+            )
+            self._def_watcher.start()
+
+    def stop_definition_watcher(self):
+        if self._def_watcher is not None:
+            self._def_watcher.join()
+            self._def_watcher = None
+
+    def check_definitions(self):
+        "Timer event handler that checks the definition watcher for updates"
+        if self._def_watcher is None:
+            return
+
+        try:
+            item = self._def_watcher.OutQueue.get(False)
+        except Empty:
+            return
+
+        if item.Message == 'DefinitionsChanged':
+            if self._defmgr.refresh():
+                _logger.info('Definition files changed, reloaded definitions')
+                self._editor_frame.refresh_tree()
+
+        elif item.Message == 'Exception':
+            _logger.warning(
+                'Stopped watching definition files: {}'.format(item.Data)
+            )
+            self._def_watcher = None
+
     def save_prefs(self):
 
         with open(_prefs_file, 'w') as fp:
@@ -96,36 +144,17 @@ class PyrrhicController(object):
             )
             return
 
-        defn = None
-
         _logger.debug('Loading ROM image {}'.format(fpath))
 
-        # load raw image bytes
-        with open(fpath, 'rb') as fp:
-            rom_bytes = fp.read()
+        # map raw image bytes
+        image = RomImage(fpath)
 
-        # inspect bytes at all internal ID addresses specified in definitions
-        try:
-            for addr in self._defmgr.ECUFlashEditorSearchTree:
-                len_tree = self._defmgr.ECUFlashEditorSearchTree[addr]
-
-                for nbytes in len_tree:
-                    vals = len_tree[nbytes]
+        d = self._defmgr.identify_rom(image.OriginalBytes)
 
-                    id_bytes = rom_bytes[addr:addr + nbytes]
-                    if id_bytes in vals:
-                        defn = vals[id_bytes]
-                        raise DefinitionFound
-
-        except DefinitionFound:
-            defn.resolve_dependencies(self._defmgr.ECUFlashDefs)
-            d = ROMDefinition(EditorDef=defn)
-            self._roms[fpath] = Rom(fpath, rom_bytes, d)
+        if d is not None:
+            self._roms[fpath] = Rom(fpath, image, d)
             return
 
-        except Exception as e:
-            raise
-
         self._editor_frame.error_box(
             'Undefined ROM',
             'Unable to find matching definition for ROM'
@@ -174,6 +203,13 @@ class PyrrhicController(object):
         if self._comms_worker:
             _logger.debug('Killing communication thread')
 
+            # hand the remaining samples to the log writer, which the
+            # comms thread closes on exit
+            self._send_log_samples()
+            self._log_writer = None
+            self._capture_writer = None
+            self._capturing = False
+
             # signal comms thread to stop
             self._comms_worker.join()
 
@@ -195,6 +231,8 @@ class PyrrhicController(object):
 
     def check_comms(self):
         "Idle event handler that checks logging thread for updates."
+        self._check_writers()
+
         if self._comms_worker is not None:
             try:
                 item = self._comms_worker.OutQueue.get(False)
@@ -210,7 +248,9 @@ class PyrrhicController(object):
                 elif msg == 'LogQueryResponse':
 
                     try:
-                        self._comms_translator.extract_values(data)
+                        self._comms_translator.extract_values(
+                            data, timestamp=time
+                        )
                     except TranslatorParseError as e:
                         pub.sendMessage('logger.status',
                             center=str(e), temporary=True
@@ -222,6 +262,38 @@ class PyrrhicController(object):
                     )
                     pub.sendMessage('logger.params.updated')
 
+                    if self._log_writer is not None:
+                        self._log_pending += 1
+                        if (
+                            self._log_pending >= _log_batch_size
+                            or perf_counter() - self._log_sent_time
+                                >= _log_batch_interval
+                        ):
+                            self._send_log_samples()
+
+                elif msg == 'OutputFile':
+                    self._send_log_samples()
+                    self._log_writer = data
+                    self._send_log_columns()
+
+                elif msg == 'OutputFileError':
+                    _logger.warning('Unable to open log file: {}'.format(data))
+                    pub.sendMessage('logger.status',
+                        center='Unable to open log file', temporary=True
+                    )
+
+                elif msg == 'CaptureFile':
+                    self._capture_writer = data
+
+                elif msg == 'CaptureFileError':
+                    self._capturing = False
+                    _logger.warning(
+                        'Unable to open capture file: {}'.format(data)
+                    )
+                    pub.sendMessage('logger.status',
+                        center='Unable to open capture file', temporary=True
+                    )
+
                 elif msg == 'LiveTuneResponse':
 
                     try:
@@ -257,11 +329,21 @@ class PyrrhicController(object):
     def update_log_params(self):
         if self._comms_worker is not None:
 
-            # get new request and push it to worker thread
+            # samples of the previous query are dropped from the buffer
+            # when it's resized, send them to the log writer first
+            self._send_log_samples()
+
+            # get new request and push it to worker thread, along with
+            # the header of its raw capture segment
             req = self._comms_translator.generate_log_request()
+            if self._capturing:
+                self._comms_worker.InQueue.put(
+                    PyrrhicMessage('CaptureInfo', self._capture_info())
+                )
             self._comms_worker.InQueue.put(
                 PyrrhicMessage('LogQuery', req)
             )
+            self._send_log_columns()
 
             # send enabled parameters to logger frame for gauge updates
             params = self._comms_translator.EnabledParams
@@ -293,6 +375,129 @@ class PyrrhicController(object):
 
             self._comms_translator.generate_livetune
 
+    def start_log_file(self, fpath):
+        """Stream the logged samples to a file.
+
+        Arguments:
+        - `fpath`: path of the log file
+        """
+        if self._comms_worker is not None:
+            self._comms_worker.InQueue.put(
+                PyrrhicMessage('SetOutputFile', fpath)
+            )
+
+    def stop_log_file(self):
+        "Stop streaming the logged samples to a file"
+        if self._comms_worker is not None:
+            self._send_log_samples()
+            self._comms_worker.InQueue.put(
+                PyrrhicMessage('SetOutputFile', None)
+            )
+
+    def start_capture(self, fpath):
+        """Capture the raw log query responses to a file, to be decoded
+        later (refer to `pyrrhic.comms.capture`).
+
+        Only a preview of the responses is decoded while capturing, so a
+        log file started with `start_log_file` only receives samples at
+        the preview rate in the meantime. Decode the capture file (e.g.
+        with `CaptureReader.decode` and `write_csv`) for every sample.
+
+        Arguments:
+        - `fpath`: path of the capture file
+        """
+        if self._comms_worker is not None:
+            self._capturing = True
+            self._comms_worker.InQueue.put(
+                PyrrhicMessage('SetCaptureFile', (fpath, self._capture_info()))
+            )
+
+    def stop_capture(self):
+        "Stop capturing the raw log query responses"
+        if self._comms_worker is not None:
+            self._capturing = False
+            self._comms_worker.InQueue.put(
+                PyrrhicMessage('SetCaptureFile', None)
+            )
+
+    def _capture_info(self):
+        "Returns the capture segment header `dict` of the current log query"
+        plan = getattr(self._comms_translator, 'DecodePlan', None)
+        if plan is None:
+            return None
+
+        return {
+            'logger': self._comms_translator.Definition.LoggerDef.Identifier,
+            'params': [x.Identifier for x in plan.Params],
+            'switches': [x.Identifier for x in plan.Switches],
+        }
+
+    def _send_log_columns(self):
+        "Send the columns of the current log query to the log writer"
+        if self._log_writer is None or self._comms_translator is None:
+            return
+
+        params = {
+            x.Identifier: x for x in (
+                self._comms_translator.EnabledParams
+                + self._comms_translator.EnabledSwitches
+            )
+        }
+        columns = []
+        for identifier in self._comms_translator.Buffer.Columns:
+            p = params[identifier]
+            scaling = getattr(p, 'Scaling', None)
+            units = scaling.units if scaling is not None else None
+            columns.append((identifier, p.Name, units or ''))
+
+        self._log_writer.InQueue.put(PyrrhicMessage('Columns', columns))
+
+    def _send_log_samples(self):
+        "Send a copy of the samples since the last batch to the log writer"
+        if self._log_writer is not None and self._log_pending:
+            times, values = self._comms_translator.Buffer.last(
+                self._log_pending
+            )
+            self._log_writer.InQueue.put(
+                PyrrhicMessage('Samples', (times.copy(), values.copy()))
+            )
+
+        self._log_pending = 0
+        self._log_sent_time = perf_counter()
+
+    def _check_writers(self):
+        "Report the status of the log and capture file writers"
+        for attr, label in (
+            ('_log_writer', 'Logged {} samples'),
+            ('_capture_writer', 'Captured {} responses'),
+        ):
+            writer = getattr(self, attr)
+            if writer is None:
+                continue
+
+            try:
+                item = writer.OutQueue.get(False)
+            except Empty:
+                continue
+
+            if item.Message == 'LogWriterStats':
+                stats = item.Data
+                pub.sendMessage('logger.status',
+                    right='{} ({:.1f} MB/s)'.format(
+                        label.format(stats['samples']),
+                        stats['throughput']/1e6
+                    )
+                )
+
+            elif item.Message == 'Exception':
+                _logger.warning(
+                    'Writing to {} stopped: {}'.format(writer.FilePath, item.Data)
+                )
+                pub.sendMessage('logger.status',
+                    center='File writing stopped', temporary=True
+                )
+                setattr(self, attr, None)
+
     def _logger_init(self, init_data):
         """
         Arguments:
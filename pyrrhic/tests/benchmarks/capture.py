@@ -0,0 +1,93 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark raw response capture and deferred decoding.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.capture [frames [directory]]
+
+For each query size, `frames` random responses are stored with
+`RawCapture` (the only work left on the acquisition side), and the
+capture file is then decoded in bulk with `CaptureReader.decode`. Both
+are compared to decoding every response live with `DecodePlan.update`.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ...comms.capture import CaptureReader, RawCapture
+from ...comms.protocol.base import DecodePlan
+from .logdecode import generate_params
+
+class MockLoggerDef(object):
+    def __init__(self, params, switches):
+        self.AllParameters = {x.Identifier: x for x in params}
+        self.AllSwitches = {x.Identifier: x for x in switches}
+
+def main(frames=1000000, directory=None):
+    frames = int(frames)
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+
+        for num_params in (10, 50, 200):
+            params, switches = generate_params(num_params)
+            plan = DecodePlan(params, switches)
+            logger_def = MockLoggerDef(params, switches)
+            fpath = os.path.join(tmpdir, 'bench.raw')
+
+            responses = [
+                os.urandom(len(plan.Addresses)) for _ in range(256)
+            ]
+
+            cap = RawCapture(fpath)
+            cap.start_segment(
+                plan.Addresses,
+                params=[x.Identifier for x in plan.Params],
+                switches=[x.Identifier for x in plan.Switches]
+            )
+
+            start = time.perf_counter()
+            for i in range(frames):
+                cap.append(responses[i & 0xFF])
+            capture = frames/(time.perf_counter() - start)
+            cap.close()
+
+            # random float params may be inf/nan, don't warn about them
+            with np.errstate(all='ignore'):
+                start = time.perf_counter()
+                num = 0
+                for _, times, _ in CaptureReader(fpath).decode(logger_def):
+                    num += len(times)
+                bulk = num/(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for i in range(min(frames, 20000)):
+                    plan.update(responses[i & 0xFF])
+                live = min(frames, 20000)/(time.perf_counter() - start)
+
+            print('{:4d} params ({:4d} bytes): capture {:9.0f}/s  '
+                'bulk decode {:10.0f}/s  live decode {:8.0f}/s  '
+                '({:.1f} MB)'.format(
+                    num_params, len(plan.Addresses), capture, bulk, live,
+                    os.path.getsize(fpath)/1e6
+                )
+            )
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
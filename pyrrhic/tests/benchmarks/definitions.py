@@ -0,0 +1,141 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark resolving every definition in an ECUFlash repository.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.definitions [repository]
+
+If no repository is given, a synthetic one is generated, with a base
+definition, several layers of intermediate definitions (each including
+a couple of definitions from the layer below it) and leaf definitions
+that only override a few tables, similar to the layout of the public
+Subaru definition repositories.
+
+Loading and resolution are timed separately.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from ...common.definitions import DefinitionManager
+
+_storagetypes = ['uint8', 'uint16', 'int8', 'int16', 'float']
+
+def generate_repository(directory, num_tables=400, num_layers=6,
+        layer_width=4, num_leaves=400):
+    """Write a synthetic ECUFlash definition repository.
+
+    Arguments:
+    - `directory`: top-level directory to write the repository into
+
+    Keywords [Default]:
+    - `num_tables` [`400`]: number of tables defined in the base
+    - `num_layers` [`6`]: number of layers of intermediate definitions
+    - `layer_width` [`4`]: number of definitions in each layer
+    - `num_leaves` [`400`]: number of leaf (ROM) definitions
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def write(xmlid, includes, body, romid=''):
+        with open(os.path.join(directory, '{}.xml'.format(xmlid)), 'w') as fp:
+            fp.write('<rom>\n<romid>\n<xmlid>{}</xmlid>\n{}</romid>\n'.format(
+                xmlid, romid
+            ))
+            fp.writelines('<include>{}</include>\n'.format(x) for x in includes)
+            fp.write(body)
+            fp.write('</rom>\n')
+
+    # base definition, with all scalings and the category/level of tables
+    body = []
+    for i, stype in enumerate(_storagetypes):
+        body.append(
+            '<scaling name="S{}" units="u" toexpr="x*2" frexpr="x/2" '
+            'format="%.2f" storagetype="{}" endian="big"/>\n'.format(i, stype)
+        )
+    for i in range(num_tables):
+        body.append(
+            '<table name="T{0}" category="C{1}" type="{2}D" level="1" '
+            'scaling="S{3}">\n'
+            '<description>T{0}</description>\n'
+            '<table name="X" type="X Axis" scaling="S1"/>\n'
+            '<table name="Y" type="Y Axis" scaling="S1"/>\n'
+            '</table>\n'.format(i, i % 20, 2 + i % 2, i % len(_storagetypes))
+        )
+    write('BASE', [], ''.join(body))
+
+    # intermediate layers, each definition overriding some tables and
+    # including two definitions from the layer below
+    below = ['BASE']
+    for layer in range(num_layers):
+        current = []
+        for j in range(layer_width):
+            xmlid = 'L{}_{}'.format(layer, j)
+            includes = sorted({below[j % len(below)], below[(j + 1) % len(below)]})
+            body = ''.join(
+                '<table name="T{}" category="L{}C{}"/>\n'.format(i, layer, i % 7)
+                for i in range(j, num_tables, layer_width + layer)
+            )
+            write(xmlid, includes, body)
+            current.append(xmlid)
+        below = current
+
+    # leaf definitions, with addresses for every table
+    for k in range(num_leaves):
+        xmlid = 'R{:06d}'.format(k)
+        body = ''.join(
+            '<table name="T{0}" address="{1:x}">\n'
+            '<table name="X" type="X Axis" address="{2:x}" elements="8"/>\n'
+            '<table name="Y" type="Y Axis" address="{3:x}" elements="8"/>\n'
+            '</table>\n'.format(
+                i, 0x10000 + 0x100*i, 0x80000 + 0x20*i, 0x90000 + 0x20*i
+            )
+            for i in range(num_tables)
+        )
+        romid = (
+            '<internalidaddress>2000</internalidaddress>\n'
+            '<internalidhex>{:08X}</internalidhex>\n'.format(k)
+        )
+        write(xmlid, [below[k % len(below)]], body, romid)
+
+def main(directory=None):
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        if directory is None:
+            directory = tmpdir
+            generate_repository(directory)
+
+        start = time.perf_counter()
+        defmgr = DefinitionManager(cache_dir=None)
+        defmgr.load_ecuflash_repository(directory)
+        load_time = time.perf_counter() - start
+
+        defs = defmgr.ECUFlashDefs
+
+        start = time.perf_counter()
+        for d in defs.values():
+            d.resolve_dependencies(defs)
+        resolve_time = time.perf_counter() - start
+
+        num_tables = sum(len(x.AllTables) for x in defs.values())
+
+        print('{} definitions, {} tables'.format(len(defs), num_tables))
+        print('load     {:8.3f} s'.format(load_time))
+        print('resolve  {:8.3f} s'.format(resolve_time))
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
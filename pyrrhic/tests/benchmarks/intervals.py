@@ -0,0 +1,98 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark mapping ROM addresses to the tables defined at them.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.intervals [repository [xmlid]]
+
+If no repository is given, the synthetic one from
+`pyrrhic.tests.benchmarks.definitions` is generated, and its first leaf
+definition is used.
+
+Point (`at`) and range (`overlapping`) queries of the definition's
+`AddressIndex` are timed against a linear scan over every table and
+axis of the definition.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from ...common.definitions import DefinitionManager
+from ...common.enums import DataType
+from .definitions import generate_repository
+
+def linear_scan(tables, start, end):
+    "Returns a `list` of every table or axis in `tables` overlapping the range"
+    ret = []
+    for tab in tables:
+        for t in [tab] + list(tab.Axes or []):
+            if t.Address is None or t.Datatype == DataType.STATIC:
+                continue
+            if t.Address < end and t.Address + t.NumBytes > start:
+                ret.append(t)
+    return ret
+
+def main(directory=None, xmlid='R000000', num_queries=2000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        if directory is None:
+            directory = tmpdir
+            generate_repository(directory, num_leaves=1)
+
+        defmgr = DefinitionManager(cache_dir=None)
+        defmgr.load_ecuflash_repository(directory)
+        defs = defmgr.ECUFlashDefs
+        d = defs[xmlid]
+        d.resolve_dependencies(defs)
+
+        tables = list(d.DefinedTables.values())
+
+        start = time.perf_counter()
+        index = d.AddressIndex
+        build_time = time.perf_counter() - start
+
+        lo = min(x[0] for x in index)
+        hi = max(x[1] for x in index)
+        rng = random.Random(0)
+        points = [rng.randrange(lo, hi) for _ in range(num_queries)]
+        ranges = [(x, x + rng.randrange(1, 0x400)) for x in points]
+
+        def timeit(func, args):
+            start = time.perf_counter()
+            for a in args:
+                func(*a)
+            return (time.perf_counter() - start)/len(args)*1e6
+
+        print('{}: {} intervals'.format(xmlid, len(index)))
+        print('build               {:10.3f} ms'.format(build_time*1e3))
+        print('at          index   {:10.2f} us'.format(
+            timeit(index.at, [(x,) for x in points])
+        ))
+        print('at          linear  {:10.2f} us'.format(
+            timeit(lambda x: linear_scan(tables, x, x + 1), [(x,) for x in points])
+        ))
+        print('overlapping index   {:10.2f} us'.format(
+            timeit(index.overlapping, ranges)
+        ))
+        print('overlapping linear  {:10.2f} us'.format(
+            timeit(lambda s, e: linear_scan(tables, s, e), ranges)
+        ))
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
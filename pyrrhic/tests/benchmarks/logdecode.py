@@ -0,0 +1,134 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark decoding logger query responses.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.logdecode [seconds]
+
+Decodes random responses to queries of 10, 50 and 200 enabled
+parameters (a quarter of them 2-byte, an eighth 4-byte, plus 8
+switches, with 4 distinct scaling expressions), and reports samples/sec
+of:
+- `reference`: the previous per-address `extract_values` loop, then
+    reading the display value of every param (converted one by one)
+- `plan`: `DecodePlan.update`, which converts the display values in
+    batches, then reading the display value of every param
+- `decode`: `DecodePlan.decode` of a single response into a record
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from ...common.enums import DataType, LoggerEndpoint, _dtype_size_map
+from ...common.structures import Scaling, StdParam, SwitchParam
+from ...comms.protocol.base import DecodePlan
+
+_exprs = ['x*0.25', 'x-40', '(x*100)/255', 'x*14.7/128']
+
+def generate_params(num_params, num_switches=8):
+    "Returns a `2-tuple` of `list`s (`params`, `switches`)"
+    params = []
+    addr = 0x1000
+
+    for i in range(num_params):
+        if i % 8 == 7:
+            dtype = DataType.FLOAT
+        elif i % 4 == 3:
+            dtype = DataType.UINT16
+        else:
+            dtype = DataType.UINT8
+
+        scaling = Scaling('S', None, disp_expr=_exprs[i % len(_exprs)])
+        params.append(StdParam(
+            None, 'P{}'.format(i), 'P{}'.format(i), '', dtype,
+            LoggerEndpoint.ECU, Addresses=[addr], ECUBit=0, ECUByteIndex=0,
+            Scalings={'S': scaling}, Scaling=scaling
+        ))
+        addr += _dtype_size_map[dtype]
+
+    switches = [
+        SwitchParam(
+            None, 'S{}'.format(i), 'S{}'.format(i), '', DataType(i % 8),
+            LoggerEndpoint.ECU, Addresses=[0x100 + i//8], ECUBit=i % 8,
+            ECUByteIndex=0
+        )
+        for i in range(num_switches)
+    ]
+
+    return params, switches
+
+def reference_extract(addr_map, params, switches, resp):
+    "The per-address decode used before `DecodePlan`"
+    for a in addr_map:
+        addr_map[a] = resp[0:1]
+        resp = resp[1:]
+
+    for s in switches:
+        raw_byte = addr_map[s.Addresses[0]]
+        s.RawValue = bool((int.from_bytes(raw_byte, 'big') >> s.Datatype) & 0x01)
+
+    for p in params:
+        psize = _dtype_size_map[p.Datatype]
+        addrs = range(p.Addresses[0], p.Addresses[0] + psize)
+        p.RawValue = b''.join([addr_map[a] for a in addrs])
+
+def rate(func, responses, duration):
+    "Returns the samples/sec of `func` over `responses`, run for `duration`"
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for resp in responses:
+            func(resp)
+        count += len(responses)
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count/elapsed
+
+def main(duration=1.0):
+    duration = float(duration)
+
+    for num_params in (10, 50, 200):
+        params, switches = generate_params(num_params)
+        plan = DecodePlan(params, switches)
+        addr_map = {a: None for a in plan.Addresses}
+
+        responses = [os.urandom(len(plan.Addresses)) for _ in range(64)]
+
+        def reference(resp):
+            reference_extract(addr_map, params, switches, resp)
+            return [x.Value for x in params]
+
+        def update(resp):
+            plan.update(resp)
+            return [x.Value for x in params]
+
+        # random float params may be inf/nan, don't warn about them
+        with np.errstate(all='ignore'):
+            ref = rate(reference, responses, duration)
+            upd = rate(update, responses, duration)
+            dec = rate(plan.decode, responses, duration)
+
+        print('{:4d} params ({:4d} bytes): reference {:10.0f}/s  '
+            'plan {:10.0f}/s  decode {:10.0f}/s'.format(
+                num_params, len(plan.Addresses), ref, upd, dec
+            )
+        )
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,90 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark streaming logged samples to disk.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.logwrite [seconds [directory]]
+
+Batches of samples are copied out of a `SampleBuffer` and queued to a
+`LogWriter` for the given number of seconds (per column count), as
+fast as possible. Reported are the time the producer spends per batch
+(which is all the acquisition side ever waits for), the sustained
+throughput of the writer thread, and the rate of exporting the file to
+CSV.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ...common.helpers import PyrrhicMessage
+from ...comms.logfile import LogWriter, export_csv
+from ...comms.protocol.base import SampleBuffer
+
+def main(duration=2.0, directory=None, batch_size=64):
+    duration = float(duration)
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmpdir:
+
+        for num_cols in (10, 50, 200):
+            fpath = os.path.join(tmpdir, 'bench.log')
+            columns = [('P{}'.format(i), 'Param {}'.format(i), 'u')
+                for i in range(num_cols)]
+
+            buf = SampleBuffer([x[0] for x in columns])
+            sample = np.random.rand(num_cols)
+
+            writer = LogWriter(fpath)
+            writer.start()
+            writer.InQueue.put(PyrrhicMessage('Columns', columns))
+
+            send = []
+            t = 0.0
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                for _ in range(batch_size):
+                    t += 0.01
+                    buf.append(sample, t)
+
+                tic = time.perf_counter()
+                times, values = buf.last(batch_size)
+                writer.InQueue.put(
+                    PyrrhicMessage('Samples', (times.copy(), values.copy()))
+                )
+                send.append(time.perf_counter() - tic)
+
+            writer.join()
+            stats = writer.Stats
+
+            csv_path = os.path.join(tmpdir, 'bench.csv')
+            tic = time.perf_counter()
+            rows = export_csv(fpath, csv_path)
+            export = time.perf_counter() - tic
+
+            print('{:4d} cols: send {:6.1f} us/batch (max {:7.1f})  '
+                'write {:7.1f} MB/s {:10.0f} samples/s  '
+                'csv {:9.0f} rows/s'.format(
+                    num_cols, np.mean(send)*1e6, np.max(send)*1e6,
+                    stats['throughput']/1e6, stats['samples']/stats['busy'],
+                    rows/export
+                )
+            )
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,154 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmark peak memory and load time of the RomRaider logger loader.
+
+Usage:
+    python -m pyrrhic.tests.benchmarks.rrlogger [logger.xml]
+
+If no logger definition file is given, a synthetic one roughly the size
+of the full RomRaider logger definition is generated.
+
+Each case is run in a fresh interpreter, so that peak RSS is measured
+independently:
+- `import`: interpreter with `pyrrhic.common.definitions` imported, the
+    baseline that is subtracted from the other cases
+- `tree`: the whole file held as an `ElementTree`, which is what the
+    previous (non-streaming) loader kept alive in its per-ECU dicts
+- `stream`: `DefinitionManager.load_rrlogger_file`
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+_case_code = '''
+import resource, sys, time
+import xml.etree.ElementTree as ET
+from pyrrhic.common.definitions import DefinitionManager
+
+case, fpath = sys.argv[1:3]
+start = time.perf_counter()
+
+if case == 'tree':
+    root = ET.parse(fpath)
+elif case == 'stream':
+    dm = DefinitionManager(cache_dir=None)
+    dm.load_rrlogger_file(fpath)
+
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+def generate_logger_file(fpath, num_params=600, num_ecuparams=1200, num_ecus=40):
+    """Write a synthetic SSM RomRaider logger definition file.
+
+    Arguments:
+    - `fpath`: output file path
+
+    Keywords [Default]:
+    - `num_params` [`600`]: number of `parameter` elements
+    - `num_ecuparams` [`1200`]: number of `ecuparam` elements
+    - `num_ecus` [`40`]: number of `ecu` elements per `ecuparam`, each
+        covering 4 ECU ids
+    """
+    with open(fpath, 'w') as fp:
+        fp.write('<logger>\n<protocols>\n<protocol id="SSM">\n<parameters>\n')
+
+        for i in range(num_params):
+            fp.write(
+                '<parameter id="P{0}" name="Param {0}" desc="P{0}" '
+                'ecubyteindex="{1}" ecubit="{2}" target="1">\n'
+                '<address length="2">0x{3:06X}</address>\n'
+                '<conversions>\n'
+                '<conversion units="u" expr="x*0.25" format="0.00" '
+                'gauge_min="0" gauge_max="100" gauge_step="10"/>\n'
+                '<conversion units="v" expr="x*2" format="0.00"/>\n'
+                '</conversions>\n</parameter>\n'.format(
+                    i, 8 + i//8, i % 8, 0x100 + 2*i
+                )
+            )
+
+        fp.write('</parameters>\n<switches>\n')
+        for i in range(num_params):
+            fp.write(
+                '<switch id="S{0}" name="Switch {0}" desc="S{0}" '
+                'byte="0x{1:06X}" bit="{2}" ecubyteindex="{3}" '
+                'target="1"/>\n'.format(i, 0x1000 + i//8, i % 8, 8 + i//8)
+            )
+
+        fp.write('</switches>\n<dtcodes>\n')
+        for i in range(num_params):
+            fp.write(
+                '<dtcode id="D{0}" name="DTC {0}" desc="D{0}" '
+                'tmpaddr="0x{1:06X}" memaddr="0x{2:06X}" bit="{3}"/>\n'.format(
+                    i, 0x2000 + i//8, 0x3000 + i//8, i % 8
+                )
+            )
+
+        fp.write('</dtcodes>\n<ecuparams>\n')
+        for i in range(num_ecuparams):
+            fp.write(
+                '<ecuparam id="E{0}" name="Ext {0}" desc="E{0}" '
+                'target="1">\n'.format(i)
+            )
+            for j in range(num_ecus):
+                ids = ','.join(
+                    '{:010X}'.format(0x4000000000 + 4*j + k) for k in range(4)
+                )
+                fp.write(
+                    '<ecu id="{}"><address length="2">0xFF{:04X}</address>'
+                    '</ecu>\n'.format(ids, (i + j) & 0xFFFF)
+                )
+            fp.write(
+                '<conversions>\n'
+                '<conversion units="u" expr="x/4" format="0.00" '
+                'storagetype="uint16"/>\n'
+                '</conversions>\n</ecuparam>\n'
+            )
+
+        fp.write('</ecuparams>\n</protocol>\n</protocols>\n</logger>\n')
+
+def run_case(case, fpath):
+    "Returns a `2-tuple` (`seconds`, `peak RSS in kB`) for the given case"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )))
+    out = subprocess.run(
+        [sys.executable, '-c', _case_code, case, fpath],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[0]), int(out[1])
+
+def main(fpath=None):
+    with tempfile.TemporaryDirectory() as tmpdir:
+
+        if fpath is None:
+            fpath = os.path.join(tmpdir, 'logger.xml')
+            generate_logger_file(fpath)
+
+        print('{} ({:.1f} MB)'.format(fpath, os.path.getsize(fpath)/1e6))
+
+        _, base_rss = run_case('import', fpath)
+
+        for case in ('tree', 'stream'):
+            elapsed, rss = run_case(case, fpath)
+            print('{:8s} {:8.3f} s {:10.1f} MB peak RSS (+{:.1f} MB)'.format(
+                case, elapsed, rss/1024, (rss - base_rss)/1024
+            ))
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,158 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from unittest import mock
+
+from ...common import definitions
+from ...common.cache import PersistentCache, file_stat, fingerprint
+from ...common.definitions import DefinitionManager
+from ..benchmarks.definitions import generate_repository
+
+class TestPersistentCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self._tmpdir.name, 'sub', 'cache.pickle')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_roundtrip(self):
+        cache = PersistentCache(self.fpath, version=3)
+        self.assertEqual(len(cache), 0)
+
+        cache['a'] = {'b': [1, 2]}
+        cache.save()
+
+        self.assertEqual(dict(PersistentCache(self.fpath, version=3)), {
+            'a': {'b': [1, 2]}
+        })
+
+    def test_version(self):
+        cache = PersistentCache(self.fpath, version=3)
+        cache['a'] = 1
+        cache.save()
+
+        self.assertEqual(len(PersistentCache(self.fpath, version=4)), 0)
+
+    def test_corrupt(self):
+        os.makedirs(os.path.dirname(self.fpath))
+        with open(self.fpath, 'wb') as fp:
+            fp.write(b'not a pickle')
+
+        with self.assertLogs('pyrrhic.common.cache', 'WARNING'):
+            cache = PersistentCache(self.fpath)
+        self.assertEqual(len(cache), 0)
+
+    def test_atomic_save(self):
+        cache = PersistentCache(self.fpath)
+        cache['a'] = 1
+        cache.save()
+
+        # a write interrupted part way leaves the previous file intact
+        cache['a'] = 2
+        with mock.patch.object(pickle, 'dump', side_effect=OSError('full')):
+            with self.assertLogs('pyrrhic.common.cache', 'WARNING'):
+                cache.save()
+
+        self.assertEqual(PersistentCache(self.fpath)['a'], 1)
+
+    def test_fingerprint(self):
+        fpath = os.path.join(self._tmpdir.name, 'file')
+        with open(fpath, 'w') as fp:
+            fp.write('abc')
+
+        stat = file_stat(fpath)
+        self.assertEqual(stat[1], 3)
+        self.assertEqual(
+            fingerprint({fpath: stat}), fingerprint({fpath: file_stat(fpath)})
+        )
+        self.assertNotEqual(
+            fingerprint({fpath: stat}), fingerprint({fpath: (stat[0] + 1, 3)})
+        )
+
+class TestRepositoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self._tmpdir.name, 'ecuflash')
+        self.cache_dir = os.path.join(self._tmpdir.name, 'cache')
+        generate_repository(
+            self.repo, num_tables=5, num_layers=1, layer_width=2, num_leaves=3
+        )
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def load(self):
+        "Returns a `2-tuple` (`manager`, `list` of parsed paths)"
+        parsed = []
+        parse = definitions._parse_ecuflash_files
+
+        def record_parse(paths, *args, **kwargs):
+            parsed.extend(paths)
+            return parse(paths, *args, **kwargs)
+
+        with mock.patch.object(
+            definitions, '_parse_ecuflash_files', side_effect=record_parse
+        ):
+            defmgr = DefinitionManager(
+                self.repo, cache_dir=self.cache_dir, parse_workers=1
+            )
+        return defmgr, parsed
+
+    def test_hit(self):
+        _, parsed = self.load()
+        self.assertEqual(len(parsed), 1 + 2 + 3)
+
+        defmgr, parsed = self.load()
+        self.assertEqual(parsed, [])
+        self.assertEqual(len(defmgr.ECUFlashDefs), 1 + 2 + 3)
+        self.assertIn(0x2000, defmgr.ECUFlashEditorSearchTree)
+
+    def test_miss(self):
+        self.load()
+        fpath = os.path.join(self.repo, 'R000001.xml')
+        stat = os.stat(fpath)
+
+        # modification time changed
+        os.utime(fpath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        _, parsed = self.load()
+        self.assertEqual(parsed, [fpath])
+
+        # size changed, with the modification time restored
+        with open(fpath, 'a') as fp:
+            fp.write('\n')
+        os.utime(fpath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        _, parsed = self.load()
+        self.assertEqual(parsed, [fpath])
+
+    def test_version(self):
+        self.load()
+
+        with mock.patch.object(
+            definitions, '_ecuflash_cache_version',
+            definitions._ecuflash_cache_version + 1
+        ):
+            _, parsed = self.load()
+        self.assertEqual(len(parsed), 1 + 2 + 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,722 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+from unittest import mock
+
+from ...common import definitions
+from ...common.definitions import (
+    DefinitionManager, DefinitionWatcher, ECUFlashDef, _parse_ecuflash_file,
+    _parse_ecuflash_files, _parse_ecuflash_header, _parse_rrlogger_file,
+    _rrlogger_conversion_attrs, _rrlogger_dtcode_attrs, _rrlogger_param_record,
+    _rrlogger_record, _rrlogger_switch_attrs, _scan_ecuflash_repository
+)
+from ...common.enums import LoggerProtocol
+from ..benchmarks.definitions import generate_repository
+from ..benchmarks.rrlogger import generate_logger_file
+
+def touch(fpath, seconds=1):
+    "Push the modification time of `fpath` forward by `seconds`"
+    stat = os.stat(fpath)
+    os.utime(fpath, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds*10**9))
+
+def leaf_definition(xmlid, include, k):
+    "Returns the XML of a leaf definition with a single table"
+    return (
+        '<rom>\n<romid>\n<xmlid>{}</xmlid>\n'
+        '<internalidaddress>2000</internalidaddress>\n'
+        '<internalidhex>{:08X}</internalidhex>\n</romid>\n'
+        '<include>{}</include>\n'
+        '<table name="T0" address="10000"/>\n</rom>\n'.format(
+            xmlid, k, include
+        )
+    )
+
+def image(k):
+    "Returns a ROM image with the internal id of leaf definition `k`"
+    data = bytearray(b'\xFF'*0x4000)
+    data[0x2000:0x2004] = k.to_bytes(4, 'big')
+    return bytes(data)
+
+class TestIdentifyRom(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self._tmpdir.name, 'ecuflash')
+        self.cache_dir = os.path.join(self._tmpdir.name, 'cache')
+        generate_repository(
+            self.repo, num_tables=10, num_layers=2, layer_width=2, num_leaves=4
+        )
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def manager(self):
+        return DefinitionManager(
+            self.repo, cache_dir=self.cache_dir, parse_workers=1
+        )
+
+    def test_identify(self):
+        romdef = self.manager().identify_rom(image(2))
+        self.assertEqual(romdef.EditorDef.Info['internalidhex'], '00000002')
+        self.assertEqual(len(romdef.EditorDef.AllTables), 10)
+        self.assertIsNone(self.manager().identify_rom(b'\xFF'*0x4000))
+
+    def test_cached(self):
+        self.manager().identify_rom(image(1))
+
+        # a fresh manager neither identifies nor resolves the image again
+        defmgr = self.manager()
+        with mock.patch.object(
+            ECUFlashDef, 'resolve_dependencies'
+        ) as resolve:
+            romdef = defmgr.identify_rom(image(1))
+
+        resolve.assert_not_called()
+        self.assertEqual(romdef.EditorDef.Info['internalidhex'], '00000001')
+        self.assertEqual(len(romdef.EditorDef.AllTables), 10)
+
+    def test_invalidated(self):
+        self.manager().identify_rom(image(1))
+
+        touch(os.path.join(self.repo, 'R000001.xml'))
+
+        defmgr = self.manager()
+        with mock.patch.object(
+            ECUFlashDef, 'resolve_dependencies'
+        ) as resolve:
+            defmgr.identify_rom(image(1))
+
+        resolve.assert_called_once()
+
+class TestRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self._tmpdir.name, 'ecuflash')
+        self.cache_dir = os.path.join(self._tmpdir.name, 'cache')
+        generate_repository(
+            self.repo, num_tables=10, num_layers=2, layer_width=2, num_leaves=4
+        )
+        self.defmgr = self.manager()
+
+        # record the files parsed by each refresh
+        self.parsed = []
+        parse = definitions._parse_ecuflash_files
+
+        def record_parse(paths, *args, **kwargs):
+            self.parsed.extend(paths)
+            return parse(paths, *args, **kwargs)
+
+        patcher = mock.patch.object(
+            definitions, '_parse_ecuflash_files', side_effect=record_parse
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def manager(self):
+        return DefinitionManager(
+            self.repo, cache_dir=self.cache_dir, parse_workers=1
+        )
+
+    def path(self, xmlid):
+        return os.path.join(self.repo, '{}.xml'.format(xmlid))
+
+    def write(self, xmlid, include, k):
+        with open(self.path(xmlid), 'w') as fp:
+            fp.write(leaf_definition(xmlid, include, k))
+        touch(self.path(xmlid))
+
+    def test_unchanged(self):
+        self.assertEqual(self.defmgr.refresh_ecuflash_repository(), set())
+        self.assertEqual(self.parsed, [])
+
+    def test_touch(self):
+        defs = self.defmgr.ECUFlashDefs
+        touch(self.path('R000001'))
+
+        # the file is parsed again, but its contents haven't changed
+        self.assertEqual(self.defmgr.refresh_ecuflash_repository(), set())
+        self.assertEqual(self.parsed, [self.path('R000001')])
+        self.assertIs(self.defmgr.ECUFlashDefs['R000001'], defs['R000001'])
+
+    def test_modify(self):
+        defs = self.defmgr.ECUFlashDefs
+        for d in defs.values():
+            d.resolve_dependencies(defs)
+        self.assertEqual(
+            defs['R000001']._linearize(defs)[0].Identifier, 'L1_1'
+        )
+
+        self.write('R000001', 'L1_0', 1)
+
+        self.assertEqual(
+            self.defmgr.refresh_ecuflash_repository(), {'R000001'}
+        )
+        self.assertEqual(self.parsed, [self.path('R000001')])
+
+        # the includes of the modified definition are resolved again, all
+        # other definitions are kept as-is
+        new_defs = self.defmgr.ECUFlashDefs
+        new_defs['R000001'].resolve_dependencies(new_defs)
+        ancestors = [
+            x.Identifier for x in new_defs['R000001']._linearize(new_defs)
+        ]
+        self.assertEqual(ancestors[0], 'L1_0')
+        self.assertNotIn('L1_1', ancestors)
+        self.assertIsNot(new_defs['R000001'], defs['R000001'])
+        for xmlid in ('BASE', 'L1_0', 'L1_1', 'R000000'):
+            self.assertIs(new_defs[xmlid], defs[xmlid])
+
+    def test_modify_parent(self):
+        with open(self.path('L1_0'), 'a') as fp:
+            fp.write('<!-- changed -->\n')
+        touch(self.path('L1_0'))
+
+        # comments don't change the parsed record
+        self.assertEqual(self.defmgr.refresh_ecuflash_repository(), set())
+
+        with open(self.path('L1_0')) as fp:
+            text = fp.read()
+        with open(self.path('L1_0'), 'w') as fp:
+            fp.write(text.replace('category="L1C', 'category="L1X'))
+        touch(self.path('L1_0'), 2)
+
+        # every definition including it is invalidated
+        self.assertEqual(
+            self.defmgr.refresh_ecuflash_repository(),
+            {'L1_0', 'R000000', 'R000002'}
+        )
+        self.assertEqual(self.parsed, [self.path('L1_0')]*2)
+
+    def test_add_delete(self):
+        self.write('R000009', 'L1_0', 9)
+
+        self.assertEqual(
+            self.defmgr.refresh_ecuflash_repository(), {'R000009'}
+        )
+        self.assertEqual(self.parsed, [self.path('R000009')])
+        self.assertIn('R000009', self.defmgr.ECUFlashDefs)
+        self.assertEqual(self.defmgr.RomIdentifier.identify(image(9)), 'R000009')
+
+        os.remove(self.path('R000009'))
+
+        self.assertEqual(
+            self.defmgr.refresh_ecuflash_repository(), {'R000009'}
+        )
+        self.assertEqual(self.parsed, [self.path('R000009')])
+        self.assertNotIn('R000009', self.defmgr.ECUFlashDefs)
+
+    def test_snapshot(self):
+        defs = self.defmgr.ECUFlashDefs
+        defs['R000000'].resolve_dependencies(defs)
+        self.write('R000009', 'L1_0', 9)
+        self.defmgr.refresh_ecuflash_repository()
+
+        # the refreshed snapshot, resolved definitions included, is
+        # loaded by the next manager without parsing anything
+        self.parsed.clear()
+        defmgr = self.manager()
+        self.assertEqual(self.parsed, [])
+        self.assertEqual(
+            set(defmgr.ECUFlashDefs), set(self.defmgr.ECUFlashDefs)
+        )
+        self.assertEqual(
+            len(defmgr.ECUFlashDefs['R000000'].AllTables), 10
+        )
+
+    def test_rrlogger(self):
+        fpath = os.path.join(self._tmpdir.name, 'logger.xml')
+        generate_logger_file(fpath, num_params=4, num_ecuparams=2, num_ecus=1)
+
+        self.assertFalse(self.defmgr.refresh_rrlogger_file(fpath + '.none'))
+        self.assertTrue(self.defmgr.refresh_rrlogger_file(fpath))
+        self.assertFalse(self.defmgr.refresh_rrlogger_file())
+
+        generate_logger_file(fpath, num_params=5, num_ecuparams=2, num_ecus=1)
+        touch(fpath)
+
+        self.assertTrue(self.defmgr.refresh_rrlogger_file())
+        base = list(self.defmgr.RRLoggerDefs.values())[0]['Base']
+        self.assertEqual(len(base.Parameters), 5 + 2)
+
+class TestDefinitionWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self._tmpdir.name, 'ecuflash')
+        self.logger_path = os.path.join(self._tmpdir.name, 'logger.xml')
+        generate_repository(
+            self.repo, num_tables=2, num_layers=1, layer_width=1, num_leaves=2
+        )
+        generate_logger_file(
+            self.logger_path, num_params=2, num_ecuparams=1, num_ecus=1
+        )
+
+        self.watcher = DefinitionWatcher(
+            self.repo, self.logger_path, interval=0.02
+        )
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.join(1.0)
+        self._tmpdir.cleanup()
+
+    def assertChanged(self):
+        "Assert that exactly one `DefinitionsChanged` message is sent"
+        msg = self.watcher.OutQueue.get(timeout=2.0)
+        self.assertEqual(msg.Message, 'DefinitionsChanged')
+
+        # a few more polls go by without another message
+        time.sleep(0.1)
+        self.assertTrue(self.watcher.OutQueue.empty())
+
+    def test_changes(self):
+        time.sleep(0.1)
+        self.assertTrue(self.watcher.OutQueue.empty())
+
+        fpath = os.path.join(self.repo, 'R000009.xml')
+        with open(fpath, 'w') as fp:
+            fp.write(leaf_definition('R000009', 'L0_0', 9))
+        self.assertChanged()
+
+        touch(fpath)
+        self.assertChanged()
+
+        os.remove(fpath)
+        self.assertChanged()
+
+        touch(self.logger_path)
+        self.assertChanged()
+
+    def test_stop(self):
+        self.watcher.join(1.0)
+        self.assertFalse(self.watcher.is_alive())
+
+        # changes after stopping aren't reported
+        touch(os.path.join(self.repo, 'R000000.xml'))
+        time.sleep(0.1)
+        self.assertTrue(self.watcher.OutQueue.empty())
+
+class TestParseFiles(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        generate_repository(
+            cls._tmpdir.name, num_tables=5, num_layers=1, layer_width=2,
+            num_leaves=8
+        )
+        cls.paths = list(_scan_ecuflash_repository(cls._tmpdir.name))
+        cls.serial = _parse_ecuflash_files(cls.paths, max_workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def test_serial(self):
+        self.assertEqual(
+            self.serial, [_parse_ecuflash_file(x) for x in self.paths]
+        )
+
+    def test_parallel(self):
+        with mock.patch.object(definitions, '_parallel_parse_threshold', 2):
+            with mock.patch.object(
+                definitions, 'ProcessPoolExecutor',
+                wraps=definitions.ProcessPoolExecutor
+            ) as executor:
+                records = _parse_ecuflash_files(self.paths, max_workers=2)
+
+        executor.assert_called_once()
+        self.assertEqual(records, self.serial)
+
+    def test_fallback(self):
+        with mock.patch.object(definitions, '_parallel_parse_threshold', 2):
+            with mock.patch.object(
+                definitions, 'ProcessPoolExecutor',
+                side_effect=OSError('no semaphores')
+            ):
+                with self.assertLogs('pyrrhic.common.definitions', 'WARNING'):
+                    records = _parse_ecuflash_files(self.paths, max_workers=2)
+
+        self.assertEqual(records, self.serial)
+
+class TestLazyLoad(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        generate_repository(
+            self._tmpdir.name, num_tables=10, num_layers=2, layer_width=2,
+            num_leaves=4
+        )
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def manager(self, lazy):
+        return DefinitionManager(
+            self._tmpdir.name, cache_dir=None, parse_workers=1, lazy=lazy
+        )
+
+    def summary(self, tabledef):
+        "Returns a comparable `tuple` of the resolved properties of a table"
+        return (
+            tabledef.Category, tabledef.Description, tabledef.Level,
+            tabledef.Scaling.name if tabledef.Scaling else None,
+            tabledef.Datatype, tabledef.Length, tabledef.Address,
+            tuple(self.summary(x) for x in tabledef.Axes or ()),
+        )
+
+    def test_load_body(self):
+        lazy = self.manager(True).ECUFlashDefs
+        eager = self.manager(False).ECUFlashDefs
+
+        self.assertFalse(any(x.IsLoaded for x in lazy.values()))
+        self.assertTrue(all(x.IsLoaded for x in eager.values()))
+
+        lazy['R000002'].resolve_dependencies(lazy)
+
+        # only the def and its ancestors are loaded
+        loaded = {k for k, v in lazy.items() if v.IsLoaded}
+        self.assertEqual(
+            loaded, {'R000002', 'L1_0', 'L0_0', 'L0_1', 'BASE'}
+        )
+
+        for xmlid in eager:
+            lazy[xmlid].resolve_dependencies(lazy)
+            eager[xmlid].resolve_dependencies(eager)
+
+            self.assertEqual(lazy[xmlid].Info, eager[xmlid].Info)
+            self.assertEqual(
+                set(lazy[xmlid].AllScalings), set(eager[xmlid].AllScalings)
+            )
+            self.assertEqual(
+                {k: self.summary(v) for k, v in lazy[xmlid].AllTables.items()},
+                {k: self.summary(v) for k, v in eager[xmlid].AllTables.items()},
+            )
+
+    def test_source_changed(self):
+        lazy = self.manager(True).ECUFlashDefs
+
+        # the file now defines another def
+        fpath = lazy['R000001'].Source
+        with open(fpath) as fp:
+            text = fp.read()
+        with open(fpath, 'w') as fp:
+            fp.write(text.replace('R000001', 'R000099'))
+
+        with self.assertRaises(ValueError):
+            lazy['R000001'].load_body()
+
+class TestParseHeader(unittest.TestCase):
+
+    # A includes B before its body, and C after it
+    _defs = {
+        'A': '<include>B</include>\n<table name="T" address="10"/>\n'
+            '<table name="U" address="20"/>\n<include>C</include>\n',
+        'B': '<scaling name="S" toexpr="x" frexpr="x" storagetype="uint8"/>\n'
+            '<table name="T" category="B" type="1D" scaling="S"/>\n'
+            '<table name="U" category="B" type="1D" scaling="S"/>\n',
+        'C': '<scaling name="S" toexpr="x" frexpr="x" storagetype="uint8"/>\n'
+            '<table name="T" category="C" type="1D" scaling="S"/>\n',
+    }
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        for xmlid, body in self._defs.items():
+            self.write(xmlid, body)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def path(self, xmlid):
+        return os.path.join(self._tmpdir.name, '{}.xml'.format(xmlid))
+
+    def write(self, xmlid, body):
+        with open(self.path(xmlid), 'w') as fp:
+            fp.write('<rom>\n<romid><xmlid>{}</xmlid></romid>\n{}</rom>\n'.format(
+                xmlid, body
+            ))
+
+    def test_stops_early(self):
+        # the body isn't read, so a broken end of the file goes unnoticed
+        with open(self.path('A'), 'a') as fp:
+            fp.write('<broken' + ' '*(8*definitions._header_chunk_size))
+
+        record = _parse_ecuflash_header(self.path('A'))
+        self.assertEqual(record['xmlids'], ['A'])
+        self.assertEqual(record['includes'], ['B'])
+        self.assertIsNone(record['tables'])
+        with self.assertRaises(ET.ParseError):
+            _parse_ecuflash_file(self.path('A'))
+
+    def test_include_after_body(self):
+        defmgr = DefinitionManager(
+            self._tmpdir.name, cache_dir=None, parse_workers=1, lazy=True
+        )
+        defs = defmgr.ECUFlashDefs
+        self.assertEqual(list(defs['A'].Parents), ['B'])
+
+        # the include following the body is picked up with the body
+        defs['A'].resolve_dependencies(defs)
+        self.assertEqual(list(defs['A'].Parents), ['B', 'C'])
+        self.assertEqual(
+            [x.Identifier for x in defs['A']._linearize(defs)], ['C', 'B']
+        )
+        self.assertEqual(defs['A'].AllTables['T'].Category, 'C')
+        self.assertEqual(defs['A'].AllTables['U'].Category, 'B')
+
+        # and changes to it invalidate the def
+        self.write('C', self._defs['C'].replace('"C"', '"D"'))
+        touch(self.path('C'))
+        self.assertEqual(defmgr.refresh_ecuflash_repository(), {'A', 'C'})
+
+class TestLinearize(unittest.TestCase):
+
+    # D includes B and C, which both include A
+    _includes = {'A': [], 'B': ['A'], 'C': ['A'], 'D': ['B', 'C']}
+    _tables = {
+        'A': '<scaling name="S" toexpr="x" frexpr="x" storagetype="uint8"/>\n'
+            '<table name="T" category="A" type="1D" level="1" scaling="S"/>\n',
+        'B': '<table name="T" category="B"/>\n',
+        'C': '<table name="T" level="3"/>\n',
+        'D': '<table name="T" address="100"/>\n',
+    }
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+        for xmlid, includes in self._includes.items():
+            fpath = os.path.join(self._tmpdir.name, '{}.xml'.format(xmlid))
+            with open(fpath, 'w') as fp:
+                fp.write('<rom>\n<romid><xmlid>{}</xmlid></romid>\n'.format(
+                    xmlid
+                ))
+                fp.writelines(
+                    '<include>{}</include>\n'.format(x) for x in includes
+                )
+                fp.write(self._tables[xmlid])
+                fp.write('</rom>\n')
+
+        self.defs = DefinitionManager(
+            self._tmpdir.name, cache_dir=None, parse_workers=1
+        ).ECUFlashDefs
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_diamond(self):
+        ancestors = self.defs['D']._linearize(self.defs)
+
+        # latest include first, depth-first, and the shared ancestor is
+        # only visited once
+        self.assertEqual([x.Identifier for x in ancestors], ['C', 'A', 'B'])
+        self.assertIs(self.defs['D']._linearize(self.defs), ancestors)
+        self.assertEqual(
+            [x.Identifier for x in self.defs['B']._linearize(self.defs)],
+            ['A']
+        )
+
+    def test_resolve(self):
+        self.defs['D'].resolve_dependencies(self.defs)
+        table = self.defs['D'].AllTables['T']
+
+        # properties come from the first ancestor in linearized order
+        # that defines them
+        self.assertEqual(table.Level, 3)
+        self.assertEqual(table.Category, 'A')
+        self.assertEqual(table.Address, 0x100)
+
+_logger_xml = """<logger>
+<protocols>
+<protocol id="SSM">
+<parameters>
+<parameter id="P1" name="Speed" desc="P1" ecubyteindex="8" ecubit="0" target="1">
+<address length="2">0x000010</address>
+<conversions>
+<conversion units="km/h" expr="x" format="0" gauge_min="0" gauge_max="300"/>
+<conversion expr="x*0.621371" format="0" storagetype="uint16"/>
+</conversions>
+</parameter>
+<parameter id="P2" name="Calculated" desc="P2" target="1">
+<depends><ref parameter="P1"/></depends>
+<conversions><conversion units="u" expr="P1*2" format="0"/></conversions>
+</parameter>
+</parameters>
+<switches>
+<switch id="S1" name="Switch" desc="S1" byte="0x000061" bit="7" ecubyteindex="10" target="1"/>
+</switches>
+<dtcodes>
+<dtcode id="D1" name="DTC" desc="D1" tmpaddr="0x00008E" memaddr="0x0000A4" bit="0"/>
+</dtcodes>
+<ecuparams>
+<ecuparam id="E1" name="Ext" desc="E1" target="1">
+<ecu id="4b12785207,4B12785307"><address length="2">0xFF6B4C</address></ecu>
+<ecu id="2F12785206"><address>0xFF1234</address><address>0xFF1235</address></ecu>
+<conversions><conversion units="u" expr="x/4" format="0.00" storagetype="uint16"/></conversions>
+</ecuparam>
+</ecuparams>
+</protocol>
+<protocol id="OBD">
+<parameters>
+<parameter id="O1" name="OBD" desc="O1" target="1"/>
+</parameters>
+</protocol>
+<protocol id="UNKNOWN">
+<parameters>
+<parameter id="U1" name="Unknown" desc="U1" target="1"/>
+</parameters>
+</protocol>
+</protocols>
+</logger>
+"""
+
+def parse_rrlogger_tree(filepath):
+    """Returns the records of a RomRaider logger definition file, built
+    the way the previous loader did, from the whole `ElementTree`"""
+    _defs = {}
+
+    for xml_protocol in ET.parse(filepath).iter('protocol'):
+        protocol = xml_protocol.attrib.get('id', None)
+        if protocol not in [x.name for x in LoggerProtocol]:
+            continue
+
+        protocol = LoggerProtocol[protocol]
+        base = {'params': {}, 'scalings': {}, 'switches': {}, 'dtcodes': {}}
+        _defs.setdefault(protocol, {'Base': base})
+
+        if protocol != LoggerProtocol.SSM:
+            continue
+
+        params = (
+            list(xml_protocol.iter('parameter'))
+            + list(xml_protocol.iter('ecuparam'))
+        )
+        for param in params:
+            if list(param.iter('depends')):
+                continue
+
+            ident = param.attrib['id']
+            param_scalings = {}
+            for idx, conv in enumerate(param.iter('conversion')):
+                name = conv.attrib.get('units', 'Conv{}'.format(idx))
+                param_scalings['{}_{}'.format(ident, name)] = (
+                    _rrlogger_record(conv, _rrlogger_conversion_attrs)
+                )
+
+            record = _rrlogger_param_record(param)
+            base['params'][ident] = {
+                'param': record, 'scalings': param_scalings
+            }
+
+            for ecu in param.iter('ecu'):
+                for ecuid in ecu.attrib['id'].upper().split(','):
+                    ecudef = _defs[protocol].setdefault(
+                        ecuid, {'params': {}, 'scalings': {}}
+                    )
+                    ecudef['params'][ident] = {
+                        'param': record,
+                        'scalings': param_scalings,
+                        'addrs': [
+                            int(x.text, base=16)
+                            for x in ecu.findall('address')
+                        ],
+                    }
+
+            base['scalings'].update(param_scalings)
+
+        base['switches'] = {
+            x.attrib['id']: _rrlogger_record(x, _rrlogger_switch_attrs)
+            for x in xml_protocol.iter('switch')
+        }
+        base['dtcodes'] = {
+            x.attrib['id']: _rrlogger_record(x, _rrlogger_dtcode_attrs)
+            for x in xml_protocol.iter('dtcode')
+        }
+
+    return _defs
+
+class TestParseRRLogger(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self._tmpdir.name, 'logger.xml')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_small(self):
+        with open(self.fpath, 'w') as fp:
+            fp.write(_logger_xml)
+
+        with self.assertLogs('pyrrhic.common.definitions', 'WARNING'):
+            defs = _parse_rrlogger_file(self.fpath)
+
+        self.assertEqual(defs, parse_rrlogger_tree(self.fpath))
+        self.assertEqual(
+            set(defs[LoggerProtocol.SSM]),
+            {'Base', '4B12785207', '4B12785307', '2F12785206'}
+        )
+
+        base = defs[LoggerProtocol.SSM]['Base']
+        self.assertEqual(set(base['params']), {'P1', 'E1'})
+        self.assertEqual(
+            set(base['scalings']), {'P1_km/h', 'P1_Conv1', 'E1_u'}
+        )
+        self.assertEqual(base['params']['P1']['param']['addresses'], [0x10])
+        self.assertEqual(base['params']['P1']['param']['length'], 2)
+        self.assertEqual(
+            defs[LoggerProtocol.SSM]['2F12785206']['params']['E1']['addrs'],
+            [0xFF1234, 0xFF1235]
+        )
+
+        # all ECU ids of an `ecu` element share the same record
+        self.assertIs(
+            defs[LoggerProtocol.SSM]['4B12785207']['params']['E1']['param'],
+            base['params']['E1']['param']
+        )
+
+    def test_generated(self):
+        generate_logger_file(
+            self.fpath, num_params=20, num_ecuparams=10, num_ecus=3
+        )
+        self.assertEqual(
+            _parse_rrlogger_file(self.fpath), parse_rrlogger_tree(self.fpath)
+        )
+
+    def test_load(self):
+        with open(self.fpath, 'w') as fp:
+            fp.write(_logger_xml)
+
+        defmgr = DefinitionManager(cache_dir=None)
+        with self.assertLogs('pyrrhic.common.definitions', 'WARNING'):
+            defmgr.load_rrlogger_file(self.fpath)
+
+        ssm = defmgr.RRLoggerDefs[LoggerProtocol.SSM]
+        ecudef = ssm['4B12785207']
+        ecudef.resolve_dependencies(ssm)
+        self.assertEqual(set(ecudef.AllParameters), {'P1', 'E1'})
+        self.assertEqual(set(ecudef.AllSwitches), {'S1'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,299 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+import tempfile
+import unittest
+
+from unittest import mock
+
+import numpy as np
+
+from sympy import lambdify, sympify
+
+from ... import submod_dir
+from ...common import expressions
+from ...common.cache import PersistentCache
+from ...common.expressions import *
+
+def patch_inverse_cache():
+    """Point the cache of derived inverses at a temporary directory, to
+    keep inverses derived by the tests out of the user's cache. Returns a
+    function undoing the patch, e.g. for `unittest.addModuleCleanup`.
+    """
+    tmpdir = tempfile.TemporaryDirectory()
+    patcher = mock.patch.multiple(
+        expressions,
+        _inverse_cache=PersistentCache(
+            os.path.join(tmpdir.name, 'inverses.pickle')
+        ),
+        _unsaved_inverses=0,
+    )
+    patcher.start()
+
+    def restore():
+        patcher.stop()
+        tmpdir.cleanup()
+
+    return restore
+
+# representative expressions from the ECUFlash and RomRaider definitions
+_expressions = [
+    'x',
+    'x*0.01',
+    'x/128',
+    'x*.0078125',
+    '(x-128)/2',
+    'x-40',
+    '(x-40)*1.8+32',
+    'x*100/255',
+    '(x*0.01)-40',
+    '14.7/(1+x*.0078125)',
+    'x*14.7/128',
+    '-x+5',
+    '-(x*0.5)',
+    'x^2*0.5-3',
+    'x**2/4',
+    '2^-1*x',
+    '1e-3*x',
+    '10^(x/20)',
+    'exp(x/100)',
+    'sqrt(abs(x))',
+    'log(x+1)',
+    'log10(x+1)',
+    'x%7',
+    'pi*x/180',
+    'floor(x/3)',
+    'ceiling(x/3)',
+]
+
+# any attribute holding an expression in the definition files
+_expr_attr_re = re.compile(rb'\b(?:toexpr|frexpr|expr)="([^"]*)"')
+
+def bundled_expressions():
+    "Returns a `set` of all expressions in the bundled definitions"
+    exprs = set()
+    defs_dir = os.path.join(submod_dir, 'SubaruDefs')
+
+    for root, dirs, files in os.walk(defs_dir):
+        for f in files:
+            if os.path.splitext(f)[1].lower() != '.xml':
+                continue
+
+            with open(os.path.join(root, f), 'rb') as fp:
+                exprs.update(
+                    x.decode('utf-8', 'replace')
+                    for x in _expr_attr_re.findall(fp.read())
+                )
+
+    return exprs
+
+class TestCompileNative(unittest.TestCase):
+
+    # inputs covering the range of raw values of all integer storage types
+    inputs = np.concatenate([
+        np.arange(-128, 256, dtype=float),
+        np.linspace(-40000, 70000, 512),
+    ])
+
+    def assertConforms(self, expr):
+        "Assert the compiled expression matches sympy over all inputs"
+        try:
+            native = compile_native(expr)
+        except ExpressionError:
+            # handled by the sympy fallback, nothing to compare
+            return
+
+        reference = lambdify('x', sympify(expr), 'numpy')
+
+        with np.errstate(all='ignore'):
+            expected = np.broadcast_to(
+                np.asarray(reference(self.inputs), dtype=float),
+                self.inputs.shape
+            )
+            actual = np.broadcast_to(
+                np.asarray(native(self.inputs), dtype=float),
+                self.inputs.shape
+            )
+
+        np.testing.assert_allclose(
+            actual, expected, rtol=1e-9, atol=1e-12, equal_nan=True,
+            err_msg='Expression {}'.format(expr)
+        )
+
+        # scalars must work as well as arrays
+        for x in (0, 1, 100):
+            with np.errstate(all='ignore'):
+                self.assertTrue(np.allclose(
+                    native(x), reference(x), equal_nan=True
+                ), msg='Expression {} at x={}'.format(expr, x))
+
+    def test_representative(self):
+        for expr in _expressions:
+            with self.subTest(expr=expr):
+                compile_native(expr)
+                self.assertConforms(expr)
+
+    def test_bundled_defs(self):
+        exprs = bundled_expressions()
+
+        if not exprs:
+            self.skipTest('Bundled definitions not available')
+
+        for expr in sorted(exprs):
+            with self.subTest(expr=expr):
+                self.assertConforms(expr)
+
+    def test_rejects_unsafe(self):
+        for expr in [
+            '__import__("os")',
+            'x.real',
+            'open("f")',
+            'x if x else 1',
+            '[x]',
+            'lambda: x',
+            'y*2',
+            'x and 1',
+            'x << 2',
+            'exp(x, 2)',
+        ]:
+            with self.subTest(expr=expr):
+                self.assertRaises(ExpressionError, compile_native, expr)
+
+class TestCompileExpression(unittest.TestCase):
+
+    def test_shared(self):
+        self.assertIs(
+            compile_expression('x * 0.01'), compile_expression('x*0.01')
+        )
+
+    def test_fallback(self):
+        # outside the native grammar, compiled by sympy
+        f = compile_expression('Max(x, 5)')
+        self.assertEqual(f(1), 5)
+        self.assertEqual(f(10), 10)
+
+    def test_native_failure(self):
+        # any failure of the native compiler falls back to sympy
+        with mock.patch.object(
+            expressions, 'compile_native', side_effect=AttributeError
+        ):
+            with self.assertLogs('pyrrhic.common.expressions', 'WARNING'):
+                f = compile_expression('x*3+0.125')
+        self.assertEqual(f(2), 6.125)
+
+class TestInvertExpression(unittest.TestCase):
+
+    raw = np.arange(0, 256, dtype=float)
+
+    def setUp(self):
+        self.addCleanup(patch_inverse_cache())
+
+    def assertRoundTrips(self, expr, inverse):
+        to_disp = compile_expression(expr)
+        to_raw = compile_expression(inverse)
+
+        with np.errstate(all='ignore'):
+            np.testing.assert_allclose(
+                to_raw(to_disp(self.raw)), self.raw, rtol=1e-9, atol=1e-9,
+                err_msg='Expression {}, inverse {}'.format(expr, inverse)
+            )
+
+    def test_closed_form(self):
+        for expr in [
+            'x',
+            'x*0.01',
+            'x/128',
+            '(x-128)/2',
+            '(x-40)*1.8+32',
+            '(x*0.01)-40',
+            '14.7/(1+x*.0078125)',
+            '-x+5',
+            '2^-1*x',
+            'pi*x/180',
+            '1/(x+1)',
+        ]:
+            with self.subTest(expr=expr):
+                inverse = invert_expression(expr)
+                self.assertIsNotNone(inverse)
+                self.assertRoundTrips(expr, inverse)
+
+    def test_solve(self):
+        for expr in ['10^(x/20)', 'exp(x/100)']:
+            with self.subTest(expr=expr):
+                inverse = invert_expression(expr)
+                self.assertIsNotNone(inverse)
+                self.assertRoundTrips(expr, inverse)
+
+    def test_not_invertible(self):
+        for expr in ['x*0', 'x^2*0.5-3', 'x%7']:
+            with self.subTest(expr=expr):
+                self.assertIsNone(invert_expression(expr))
+
+    def test_cached(self):
+        inverse = invert_expression('x * 0.25')
+        self.assertEqual(expressions._inverse_cache['x*0.25'], inverse)
+
+        # persisted to disk
+        save_inverses()
+        cache = PersistentCache(expressions._inverse_cache.Path)
+        self.assertEqual(cache['x*0.25'], inverse)
+
+    def test_batched_save(self):
+        path = expressions._inverse_cache.Path
+
+        with mock.patch.object(expressions, '_inverse_save_batch', 3):
+            invert_expression('x*3')
+            invert_expression('x*4')
+            invert_expression('x*3')
+            self.assertFalse(os.path.exists(path))
+
+            # the third new inverse saves the batch
+            invert_expression('x*5')
+            self.assertEqual(len(PersistentCache(path)), 3)
+
+            invert_expression('x*6')
+            self.assertEqual(len(PersistentCache(path)), 3)
+
+        save_inverses()
+        self.assertEqual(len(PersistentCache(path)), 4)
+
+class TestNumericInverse(unittest.TestCase):
+
+    def test_exhaustive(self):
+        to_disp = compile_expression('x^2/100')
+        to_raw = numeric_inverse(to_disp, 0, 255)
+        raw = np.arange(0, 256, dtype=float)
+
+        np.testing.assert_array_equal(to_raw(to_disp(raw)), raw)
+        self.assertEqual(to_raw(to_disp(100)), 100)
+
+    def test_bisection(self):
+        to_disp = compile_expression('exp(x/1e6)')
+        to_raw = numeric_inverse(to_disp, -2**31, 2**31 - 1, integer=False)
+        raw = np.array([-1e6, 0, 12345, 2e6])
+
+        np.testing.assert_allclose(to_raw(to_disp(raw)), raw, atol=1e-3)
+
+    def test_not_monotonic(self):
+        to_disp = compile_expression('abs(x-100)')
+        to_raw = numeric_inverse(to_disp, 0, 255)
+
+        for y in (0, 3, 50, 150):
+            self.assertEqual(to_disp(to_raw(y)), y)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import random
+import unittest
+
+from ...common.intervals import IntervalIndex, IntervalSet
+
+class TestIntervalSet(unittest.TestCase):
+
+    def test_add(self):
+        s = IntervalSet([(10, 20), (30, 40)])
+        self.assertEqual(list(s), [(10, 20), (30, 40)])
+
+        # adjacent and overlapping intervals are merged
+        s.add(20, 25)
+        s.add(28, 31)
+        self.assertEqual(list(s), [(10, 25), (28, 40)])
+        s.add(0, 100)
+        self.assertEqual(list(s), [(0, 100)])
+
+        # empty intervals are ignored
+        s.add(200, 200)
+        self.assertEqual(len(s), 1)
+
+    def test_remove(self):
+        s = IntervalSet([(10, 20), (30, 40)])
+        s.remove(15, 35)
+        self.assertEqual(list(s), [(10, 15), (35, 40)])
+        s.remove(36, 38)
+        self.assertEqual(list(s), [(10, 15), (35, 36), (38, 40)])
+        s.remove(0, 100)
+        self.assertFalse(s)
+
+    def test_overlaps(self):
+        s = IntervalSet([(10, 20)])
+        self.assertTrue(s.overlaps(0, 11))
+        self.assertTrue(s.overlaps(19, 30))
+        self.assertFalse(s.overlaps(0, 10))
+        self.assertFalse(s.overlaps(20, 30))
+        self.assertFalse(s.overlaps(15, 15))
+        self.assertIn(10, s)
+        self.assertNotIn(20, s)
+
+    def test_random(self):
+        rng = random.Random(0)
+        s = IntervalSet()
+        expected = set()
+
+        for _ in range(2000):
+            start = rng.randrange(200)
+            end = start + rng.randrange(10)
+
+            if rng.random() < 0.6:
+                s.add(start, end)
+                expected.update(range(start, end))
+            else:
+                s.remove(start, end)
+                expected.difference_update(range(start, end))
+
+            covered = {x for start, end in s for x in range(start, end)}
+            self.assertEqual(covered, expected)
+            self.assertEqual(s.Size, len(expected))
+
+            # intervals stay sorted, disjoint and non-adjacent
+            intervals = list(s)
+            for (_, end), (start, _) in zip(intervals, intervals[1:]):
+                self.assertLess(end, start)
+
+class TestIntervalIndex(unittest.TestCase):
+
+    def test_queries(self):
+        index = IntervalIndex([
+            (0x100, 0x110, 'a'),
+            (0x108, 0x120, 'b'),
+            (0x200, 0x210, 'c'),
+            (0x000, 0x400, 'd'),
+            (0x300, 0x300, 'empty'),
+        ])
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.at(0x10A), ['d', 'a', 'b'])
+        self.assertEqual(index.at(0x110), ['d', 'b'])
+        self.assertEqual(index.at(0x400), [])
+        self.assertEqual(index.overlapping(0x10F, 0x201), ['d', 'a', 'b', 'c'])
+        self.assertEqual(index.overlapping(0x120, 0x200), ['d'])
+        self.assertEqual(index.overlapping(0x150, 0x150), [])
+
+    def test_random(self):
+        rng = random.Random(0)
+        intervals = []
+        for i in range(500):
+            start = rng.randrange(10000)
+            intervals.append((start, start + rng.randrange(1, 200), i))
+
+        index = IntervalIndex(intervals)
+
+        for _ in range(500):
+            x = rng.randrange(-10, 10300)
+            self.assertEqual(
+                sorted(index.at(x)),
+                sorted(v for start, end, v in intervals if start <= x < end)
+            )
+
+            start = rng.randrange(-10, 10300)
+            end = start + rng.randrange(1, 300)
+            self.assertEqual(
+                sorted(index.overlapping(start, end)),
+                sorted(v for a, b, v in intervals if a < end and b > start)
+            )
+
+if __name__ == '__main__':
+    unittest.main()
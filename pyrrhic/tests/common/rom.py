@@ -0,0 +1,441 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import mmap
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ...common.definitions import DefinitionManager
+from ...common.intervals import IntervalSet
+from ...common.rom import Rom, RomImage
+from ...common.structures import RamTable, RomTable
+from ..benchmarks.definitions import generate_repository
+from .expressions import patch_inverse_cache
+
+def setUpModule():
+    unittest.addModuleCleanup(patch_inverse_cache())
+
+class TestRomImage(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self._tmpdir.name, 'rom.bin')
+        self.data = bytes(range(256))*(4*mmap.PAGESIZE//256)
+
+        with open(self.fpath, 'wb') as fp:
+            fp.write(self.data)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_copy_on_write(self):
+        image = RomImage(self.fpath)
+
+        self.assertTrue(image.IsMapped)
+        self.assertFalse(image.IsModified)
+        self.assertEqual(image.OriginalBytes, self.data)
+        self.assertRaises(TypeError, image.OriginalBytes.__setitem__, 0, 1)
+
+        image.Bytes[10] = 0xFF
+        self.assertTrue(image.IsModified)
+        self.assertEqual(image.OriginalBytes, self.data)
+
+        # the file is never touched until written back
+        with open(self.fpath, 'rb') as fp:
+            self.assertEqual(fp.read(), self.data)
+
+    def test_write_back(self):
+        image = RomImage(self.fpath)
+        original = image.OriginalBytes[mmap.PAGESIZE:mmap.PAGESIZE + 4]
+
+        offs = 2*mmap.PAGESIZE + 1
+        image.Bytes[offs:offs + 2] = b'\xAA\xBB'
+        image.Bytes[0] = 0xFF
+        self.assertEqual(
+            list(image._modified_pages()),
+            [(0, mmap.PAGESIZE), (2*mmap.PAGESIZE, 3*mmap.PAGESIZE)]
+        )
+
+        image.write_back()
+
+        expected = bytearray(self.data)
+        expected[offs:offs + 2] = b'\xAA\xBB'
+        expected[0] = 0xFF
+
+        with open(self.fpath, 'rb') as fp:
+            self.assertEqual(fp.read(), expected)
+
+        # the original data follows the file
+        self.assertFalse(image.IsModified)
+        self.assertEqual(image.OriginalBytes, expected)
+        self.assertEqual(original, self.data[mmap.PAGESIZE:mmap.PAGESIZE + 4])
+
+    def test_in_memory(self):
+        image = RomImage(self.fpath, self.data)
+
+        self.assertFalse(image.IsMapped)
+        image.Bytes[0] = 0xFF
+        self.assertTrue(image.IsModified)
+        self.assertRaises(ValueError, image.write_back)
+
+    def test_empty(self):
+        open(self.fpath, 'wb').close()
+        image = RomImage(self.fpath)
+
+        self.assertFalse(image.IsMapped)
+        self.assertEqual(len(image), 0)
+
+class _RomTestCase(unittest.TestCase):
+    "Base class of tests using a `Rom` of a synthetic definition"
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        repo = os.path.join(cls._tmpdir.name, 'ecuflash')
+        generate_repository(
+            repo, num_tables=20, num_layers=2, layer_width=2, num_leaves=2
+        )
+
+        defmgr = DefinitionManager(repo, cache_dir=None, parse_workers=1)
+        data = bytearray(0x100000)
+        data[0x2000:0x2004] = (1).to_bytes(4, 'big')
+        cls.data = bytes(data)
+        cls.romdef = defmgr.identify_rom(cls.data)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def setUp(self):
+        self.rom = Rom('rom.bin', self.data, self.romdef)
+
+    def table(self, name):
+        "Returns the `RomTable` of the table named `name`"
+        tabledef = self.romdef.EditorDef.AllTables[name]
+        return self.rom.Tables[tabledef.Category][name]
+
+class TestLazyTables(_RomTestCase):
+
+    def test_deferred(self):
+        tables = self.rom.Tables
+
+        self.assertEqual(sum(len(x) for x in tables.values()), 20)
+        self.assertFalse(any(x.Loaded for x in tables.values()))
+        self.assertFalse(any(x.Loaded for x in self.rom.RAMTables.values()))
+
+        category = next(iter(tables.values()))
+        name = next(iter(category))
+        table = category[name]
+
+        self.assertIsInstance(table, RomTable)
+        self.assertIs(category[name], table)
+        self.assertEqual(list(category.Loaded), [name])
+
+    def test_ram_table_by_address(self):
+        tabledef = self.romdef.EditorDef.AllTables['T3']
+        table = self.rom.get_ram_table_by_address(tabledef.Address)
+
+        self.assertIsInstance(table, RamTable)
+        self.assertIs(table, self.rom.RAMTables[tabledef.Category]['T3'])
+        self.assertIs(
+            table._rom_table, self.rom.Tables[tabledef.Category]['T3']
+        )
+        self.assertRaises(ValueError, self.rom.get_ram_table_by_address, 1)
+
+class TestModifiedRanges(_RomTestCase):
+
+    def test_writes(self):
+        table = self.table('T2')
+        other = self.table('T3')
+        self.assertFalse(self.rom.IsModified)
+
+        table.add_raw(1, 0, 1)
+        self.assertTrue(table.IsModified)
+        self.assertFalse(other.IsModified)
+        self.assertTrue(self.rom.IsModified)
+        self.assertEqual(len(self.rom.ModifiedRanges), 1)
+
+        # writing back the original value clears the modification
+        table.add_raw(-1, 0, 1)
+        self.assertFalse(table.IsModified)
+        self.assertFalse(self.rom.IsModified)
+
+    def test_axes(self):
+        table = self.table('T2')
+        table.Axes[0].step(0)
+
+        self.assertFalse(table.Axes[1].IsModified)
+        self.assertTrue(table.Axes[0].IsModified)
+        self.assertTrue(table.IsModified)
+
+        table.revert()
+        self.assertFalse(table.IsModified)
+        self.assertFalse(self.rom.IsModified)
+
+    def test_matches_bytes(self):
+        table = self.table('T4')
+        table.step(0, 0)
+        table.step(0, 1, decrement=True)
+        table.revert()
+        table.step(1, 1)
+
+        expected = IntervalSet(
+            (i, i + 1) for i, (a, b) in enumerate(
+                zip(self.rom.OriginalBytes, self.rom.Bytes)
+            ) if a != b
+        )
+        self.assertTrue(expected)
+        self.assertEqual(self.rom.ModifiedRanges, expected)
+
+class TestCellOps(_RomTestCase):
+
+    def test_selections(self):
+        table = self.table('T1')
+        mask = np.zeros(table.Values.shape, dtype=bool)
+        mask[2:4, 1:5] = True
+
+        for cells in [mask, np.nonzero(mask), list(zip(*np.nonzero(mask)))]:
+            table.set_cells(10, cells)
+            np.testing.assert_array_equal(table.DisplayValues[mask], 10)
+            np.testing.assert_array_equal(table.DisplayValues[~mask], 0)
+            table.revert()
+
+        self.assertRaises(ValueError, table.set_cells, 1, mask[1:])
+        self.assertRaises(IndexError, table.set_cells, 1, [(8, 0)])
+
+    def test_matches_cell_ops(self):
+        table = self.table('T3')
+        cells = [(i, j) for i in range(1, 7) for j in range(2, 5)]
+
+        table.set_cells(np.arange(len(cells))*3.0, cells)
+        table.add_cells(-7, cells)
+        table.mult_cells(1.5, cells)
+        expected = table.Values.copy()
+        table.revert()
+
+        for k, (i, j) in enumerate(cells):
+            table.set_cell(k*3.0, i, j)
+            table.add_cell(-7, i, j)
+            table.mult_cell(1.5, i, j)
+        np.testing.assert_array_equal(table.Values, expected)
+
+    def test_round_and_bound(self):
+        table = self.table('T0')
+        table.set_cells([3.1, 2.9, 1e6, -1e6], [(0, 0), (0, 1), (0, 2), (0, 3)])
+
+        # x*2 scaling, values are rounded to the nearest raw value
+        self.assertEqual(list(table.Values[0, :4]), [2, 1, 255, 0])
+
+        table.step_cells([(0, 2), (0, 3)])
+        table.add_raw_cells(-1, [(0, 2), (0, 3)])
+        self.assertEqual(list(table.Values[0, :4]), [2, 1, 254, 0])
+
+    def test_raw_view(self):
+        table = self.table('T1')
+        view = table._raw_view()
+
+        self.assertEqual(view.shape, table.Values.shape)
+        self.assertEqual(view.dtype, np.dtype('>u2'))
+        self.assertIs(table._raw_view(), view)
+
+        # writes go straight into the ROM image
+        view[1, 0] = 0x1234
+        offs = table.Definition.Address + 2*8
+        self.assertEqual(self.rom.Bytes[offs:offs + 2], b'\x12\x34')
+
+    def test_modified(self):
+        table = self.table('T4')
+        table.add_cells(0.5, [(1, 1), (6, 6)])
+
+        addr = table.Definition.Address
+        modified = self.rom.ModifiedRanges
+        self.assertEqual(len(modified), 2)
+        self.assertTrue(modified.overlaps(addr + 4*9, addr + 4*10))
+        self.assertTrue(modified.overlaps(addr + 4*54, addr + 4*55))
+        self.assertEqual(table.Values[1, 1], 0.25)
+
+class TestValuesCache(_RomTestCase):
+
+    def test_cached(self):
+        table = self.table('T1')
+        values = table.Values
+        display = table.DisplayValues
+
+        self.assertIs(table.Values, values)
+        self.assertIs(table.DisplayValues, display)
+        self.assertRaises(ValueError, values.__setitem__, (0, 0), 1)
+        self.assertRaises(ValueError, display.__setitem__, (0, 0), 1)
+
+        version = table.Version
+        table.set_cell(10, 1, 2)
+        self.assertGreater(table.Version, version)
+        self.assertIsNot(table.DisplayValues, display)
+        self.assertEqual(table.DisplayValues[1, 2], 10)
+        self.assertEqual(table.Values[1, 2], 5)
+
+        display = table.DisplayValues
+        table.revert()
+        self.assertEqual(table.DisplayValues[1, 2], 0)
+
+        # axes are versioned independently
+        axis_display = table.Axes[0].DisplayValues
+        table.Axes[0].step(3)
+        self.assertIsNot(table.Axes[0].DisplayValues, axis_display)
+        self.assertEqual(table.Axes[0].DisplayValues[3], 2)
+
+    def test_shared_bytes(self):
+        # two tables defined over the same bytes, e.g. a shared axis
+        a = self.table('T1')
+        b = RomTable(self.rom, a.Definition)
+        display = b.DisplayValues
+        self.assertEqual(display[1, 2], 0)
+
+        a.set_cell(10, 1, 2)
+        self.assertEqual(b.Values[1, 2], 5)
+        self.assertIsNot(b.DisplayValues, display)
+        self.assertEqual(b.DisplayValues[1, 2], 10)
+
+    def test_ram_table(self):
+        tabledef = self.romdef.EditorDef.AllTables['T3']
+        rom_table = self.rom.Tables[tabledef.Category]['T3']
+        table = self.rom.RAMTables[tabledef.Category]['T3']
+
+        # unallocated tables follow the ROM table
+        self.assertEqual(table.DisplayValues[0, 0], 0)
+        rom_table.set_cell(4, 0, 0)
+        self.assertEqual(table.DisplayValues[0, 0], 4)
+
+        table.initialize_bytes(memoryview(bytearray(rom_table.Bytes)))
+        table.set_cell(8, 0, 0)
+        self.assertEqual(table.DisplayValues[0, 0], 8)
+        self.assertEqual(rom_table.DisplayValues[0, 0], 4)
+
+        table.revert()
+        self.assertEqual(table.DisplayValues[0, 0], 4)
+
+class TestInterpolation(_RomTestCase):
+
+    def setUp(self):
+        super(TestInterpolation, self).setUp()
+        tabledef = self.romdef.EditorDef.AllTables['T4']
+        self.table = self.rom.Tables[tabledef.Category]['T4']
+
+    def block(self, rows, cols):
+        return [(i, j) for i in rows for j in cols]
+
+    def test_horizontal(self):
+        table = self.table
+        table.set_cells([10, 50, 7, 9], [(2, 1), (2, 5), (3, 0), (3, 4)])
+        version = table.Version
+
+        # row 3 has a gap in its selection and is left alone
+        table.interpolate_h(
+            self.block([2], range(1, 6)) + [(3, 0), (3, 1), (3, 4)]
+        )
+        self.assertEqual(table.Version, version + 1)
+        np.testing.assert_allclose(
+            table.DisplayValues[2, :7], [0, 10, 20, 30, 40, 50, 0]
+        )
+        np.testing.assert_allclose(
+            table.DisplayValues[3, :5], [7, 0, 0, 0, 9]
+        )
+
+    def test_vertical(self):
+        table = self.table
+        table.set_cells([-4, 4], [(0, 6), (4, 6)])
+        table.interpolate_v(self.block(range(5), [6]))
+
+        np.testing.assert_allclose(
+            table.DisplayValues[:6, 6], [-4, -2, 0, 2, 4, 0]
+        )
+
+    def test_2d(self):
+        table = self.table
+        table.set_cells([0, 30, 60, 90], [(1, 2), (1, 5), (3, 2), (3, 5)])
+        table.interpolate_2d(self.block(range(1, 4), range(2, 6)))
+
+        expected = (np.arange(3)*30)[:, None] + np.arange(4)*10
+        np.testing.assert_allclose(table.DisplayValues[1:4, 2:6], expected)
+
+        # selections that aren't rectangular are left alone
+        table.set_cell(0, 2, 3)
+        table.interpolate_2d(self.block(range(1, 4), range(2, 6))[1:])
+        self.assertEqual(table.DisplayValues[2, 3], 0)
+
+    def test_weighted(self):
+        table = self.table
+        xaxis = table.Axes[0]
+        xaxis.set_cells([0, 2, 4, 6, 8, 16, 32, 64], [(i, 0) for i in range(8)])
+        table.set_cells([0, 100], [(0, 4), (0, 6)])
+
+        table.interpolate_h(self.block([0], range(4, 7)), weighted=True)
+        self.assertAlmostEqual(table.DisplayValues[0, 5], 100/3, places=4)
+
+        table.interpolate_2d(self.block([0], range(4, 7)))
+        self.assertAlmostEqual(table.DisplayValues[0, 5], 50)
+
+    def test_axis(self):
+        axis = self.table.Axes[1]
+        axis.set_cells([100, 400], [(0, 0), (3, 0)])
+        axis.interpolate_v([(i, 0) for i in range(4)])
+
+        np.testing.assert_array_equal(
+            axis.DisplayValues[:5], [100, 200, 300, 400, 0]
+        )
+
+class TestAddressIndex(_RomTestCase):
+
+    def test_tables_at(self):
+        tabledef = self.romdef.EditorDef.AllTables['T5']
+        table = self.rom.Tables[tabledef.Category]['T5']
+
+        self.assertEqual(self.rom.tables_at(tabledef.Address), [table])
+        self.assertEqual(
+            self.rom.tables_at(tabledef.Address + table.NumBytes - 1), [table]
+        )
+        self.assertEqual(self.rom.tables_at(0), [])
+
+        for axis in table.Axes:
+            self.assertEqual(
+                self.rom.tables_at(axis.Definition.Address), [axis]
+            )
+
+    def test_tables_overlapping(self):
+        index = self.romdef.EditorDef.AddressIndex
+
+        # every table and axis of the definition is indexed
+        self.assertEqual(len(index), 3*20)
+
+        tables = self.rom.tables_overlapping(0, 0x100000)
+        self.assertEqual(len(tables), len(index))
+        self.assertEqual(
+            [x.Definition.Address for x in tables],
+            sorted(x.Definition.Address for x in tables)
+        )
+
+        t0 = self.romdef.EditorDef.AllTables['T0']
+        t1 = self.romdef.EditorDef.AllTables['T1']
+        self.assertEqual(
+            [x.Definition for x in self.rom.tables_overlapping(
+                t0.Address + t0.NumBytes - 1, t1.Address + 1
+            )],
+            [t0, t1]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
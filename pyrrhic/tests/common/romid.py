@@ -0,0 +1,96 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+
+from ...common.romid import RomIdentifier
+
+def _image(size, **ids):
+    "Returns a ROM image of `size` bytes with ids written at addresses"
+    data = bytearray(size)
+    for addr, val in ids.values():
+        data[addr:addr + len(val)] = val
+    return bytes(data)
+
+class TestRomIdentifier(unittest.TestCase):
+
+    def setUp(self):
+        self.identifier = RomIdentifier([
+            (0x2000, b'A2UI001L', 'A2UI001L'),
+            (0x2000, b'\x12\x34\x56\x78', '12345678'),
+            (0x2004, b'\x9A\xBC\xDE\xF0', '9ABCDEF0'),
+            (0x10, b'LOW', 'LOW'),
+        ])
+
+    def test_identify(self):
+        self.assertEqual(len(self.identifier), 4)
+        self.assertEqual(
+            self.identifier.identify(_image(0x4000, a=(0x2000, b'A2UI001L'))),
+            'A2UI001L'
+        )
+        self.assertEqual(
+            self.identifier.identify(
+                _image(0x4000, a=(0x2000, b'\x12\x34\x56\x78'))
+            ),
+            '12345678'
+        )
+        self.assertEqual(
+            self.identifier.identify(_image(0x4000, a=(0x10, b'LOW'))), 'LOW'
+        )
+        self.assertIsNone(self.identifier.identify(_image(0x4000)))
+
+    def test_truncated(self):
+        # ids past the end of the image never match
+        self.assertIsNone(self.identifier.identify(b'\x00'*0x2002))
+        self.assertIsNone(self.identifier.identify(b''))
+
+    def test_identify_many(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            expected = {}
+
+            for i in range(20):
+                fpath = os.path.join(tmpdir, '{:02d}.bin'.format(i))
+                if i % 2:
+                    data, xmlid = _image(0x4000, a=(0x10, b'LOW')), 'LOW'
+                else:
+                    data, xmlid = _image(0x4000), None
+
+                with open(fpath, 'wb') as fp:
+                    fp.write(data)
+                expected[fpath] = xmlid
+
+            # empty files can't be memory-mapped
+            fpath = os.path.join(tmpdir, 'empty.bin')
+            open(fpath, 'wb').close()
+            expected[fpath] = None
+
+            for workers in (1, 2):
+                with self.subTest(workers=workers):
+                    self.assertEqual(
+                        self.identifier.identify_many(
+                            expected, max_workers=workers
+                        ),
+                        expected
+                    )
+
+            self.assertEqual(
+                self.identifier.identify_directory(tmpdir, max_workers=1),
+                expected
+            )
+
+if __name__ == '__main__':
+    unittest.main()
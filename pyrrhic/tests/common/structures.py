@@ -0,0 +1,130 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+
+from ...common.enums import DataType
+from ...common.structures import Scaling
+from .expressions import patch_inverse_cache
+
+def setUpModule():
+    unittest.addModuleCleanup(patch_inverse_cache())
+
+class _Parent(object):
+    Identifier = 'test'
+
+class TestScalingLookup(unittest.TestCase):
+
+    dtypes = {
+        DataType.UINT8: np.uint8,
+        DataType.INT8: np.int8,
+        DataType.UINT16: '>u2',
+        DataType.INT16: '>i2',
+    }
+
+    def test_to_disp(self):
+        for expr in ['x*0.01', '(x-40)*1.8+32', '14.7/(1+x*.0078125)', 'x%7']:
+            scaling = Scaling('S', _Parent(), disp_expr=expr)
+            reference = Scaling('S', _Parent(), disp_expr=expr, lookup=False)
+
+            for dtype, np_dtype in self.dtypes.items():
+                with self.subTest(expr=expr, dtype=dtype):
+                    info = np.iinfo(np_dtype)
+                    raw = np.arange(info.min, info.max + 1).astype(np_dtype)
+
+                    self.assertIsNotNone(scaling.lookup_table(dtype))
+
+                    with np.errstate(all='ignore'):
+                        expected = reference.to_disp(raw.astype(float), dtype)
+
+                    np.testing.assert_allclose(
+                        scaling.to_disp(raw, dtype), expected
+                    )
+                    self.assertAlmostEqual(
+                        scaling.to_disp(int(raw[3]), dtype),
+                        reference.to_disp(float(raw[3]))
+                    )
+
+    def test_unsupported(self):
+        scaling = Scaling('S', _Parent(), disp_expr='x*2')
+        self.assertIsNone(scaling.lookup_table(DataType.UINT32))
+        self.assertIsNone(scaling.lookup_table(DataType.FLOAT))
+        self.assertEqual(scaling.to_disp(1.5, DataType.FLOAT), 3.0)
+
+    def test_to_raw(self):
+        scaling = Scaling(
+            'S', _Parent(), disp_expr='(x-40)*1.8+32', raw_expr='(x-32)/1.8+40'
+        )
+        raw = np.arange(-128, 128)
+
+        np.testing.assert_array_equal(
+            scaling.to_raw(scaling.to_disp(raw, DataType.INT8), DataType.INT8),
+            raw
+        )
+
+        # nearest raw value
+        self.assertEqual(scaling.to_raw(41.5, DataType.INT8), 45)
+
+    def test_to_raw_expression(self):
+        # the inverse expression is used over the lookup table, even when
+        # it disagrees with it
+        scaling = Scaling('S', _Parent(), disp_expr='x*2', raw_expr='x/2+1')
+        self.assertEqual(scaling.to_raw(8, DataType.UINT8), 5)
+
+        # ties are rounded to even, whether the inverse is given or derived
+        for raw_expr in ('x/2', None):
+            with self.subTest(raw_expr=raw_expr):
+                scaling = Scaling(
+                    'S', _Parent(), disp_expr='x*2', raw_expr=raw_expr
+                )
+                self.assertEqual(scaling.to_raw(7, DataType.UINT8), 4)
+                np.testing.assert_array_equal(
+                    scaling.to_raw(np.array([5, 7, 9.5]), DataType.UINT8),
+                    [2, 4, 5]
+                )
+                self.assertEqual(scaling.to_raw(7), 3.5)
+
+    def test_to_raw_lookup_ties(self):
+        # no inverse expression exists, the lookup table is searched
+        scaling = Scaling('S', _Parent(), disp_expr='x^2')
+        np.testing.assert_array_equal(
+            scaling.to_raw(np.array([12.5, 20.5, 12.6, 20.4]), DataType.UINT8),
+            [4, 4, 4, 4]
+        )
+        self.assertEqual(scaling.to_raw(6.5, DataType.UINT8), 2)
+
+    def test_to_raw_not_monotonic(self):
+        scaling = Scaling('S', _Parent(), disp_expr='x%7', raw_expr='x')
+        self.assertEqual(scaling.to_raw(3, DataType.UINT8), 3)
+
+    def test_bloblist(self):
+        scaling = Scaling(
+            'S', _Parent(),
+            disp_expr={'00': 'Off', '01': 'On'},
+            raw_expr={'Off': '00', 'On': '01'},
+        )
+
+        self.assertEqual(scaling.to_disp('01'), 'On')
+        self.assertEqual(scaling.to_raw('Off'), '00')
+        self.assertEqual(
+            list(scaling.to_disp(np.array(['00', '01', '01']))),
+            ['Off', 'On', 'On']
+        )
+        self.assertRaises(KeyError, scaling.to_disp, '02')
+
+if __name__ == '__main__':
+    unittest.main()
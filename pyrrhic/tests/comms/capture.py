@@ -0,0 +1,162 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from ...common.enums import DataType
+from ...comms.capture import CaptureReader, RawCapture
+from ...comms.protocol.base import DecodePlan
+from .protocol.base import make_param, make_switch
+
+class MockLoggerDef(object):
+    def __init__(self, params, switches):
+        self.AllParameters = {x.Identifier: x for x in params}
+        self.AllSwitches = {x.Identifier: x for x in switches}
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self.tmpdir.name, 'test.raw')
+
+        self.params = [
+            make_param('P1', DataType.UINT8, [0x10], a='x*2'),
+            make_param('P2', DataType.UINT16, [0x20, 0x21], a='x/4'),
+        ]
+        self.switches = [make_switch('S1', 3, 0x30)]
+        self.logger_def = MockLoggerDef(self.params, self.switches)
+
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def capture(self, segments, chunk_size=3):
+        """Capture the given `list` of (`plan`, `responses`), returning the
+        (`start`, `end`) epoch time of the capture"""
+        start = time.time()
+        cap = RawCapture(self.fpath, chunk_size=chunk_size, fsync_interval=0)
+
+        for plan, resps in segments:
+            cap.start_segment(
+                plan.Addresses,
+                params=[x.Identifier for x in plan.Params],
+                switches=[x.Identifier for x in plan.Switches],
+            )
+            for r in resps:
+                cap.append(r)
+
+        # responses of the wrong size are dropped
+        cap.append(b'\x00')
+        self.assertEqual(cap.Dropped, 1)
+
+        cap.close()
+        self.assertEqual(cap.Writer.Stats['samples'], cap.Records)
+        return start, time.time()
+
+    def responses(self, plan, n):
+        size = len(plan.Addresses)
+        return [
+            self.rng.integers(0, 256, size, dtype=np.uint8).tobytes()
+            for _ in range(n)
+        ]
+
+    def test_segments(self):
+        plan_a = DecodePlan(self.params, self.switches)
+        plan_b = DecodePlan(self.params[1:], [])
+        resps_a = self.responses(plan_a, 10)
+        resps_b = self.responses(plan_b, 4)
+
+        start, end = self.capture([(plan_a, resps_a), (plan_b, resps_b)])
+
+        reader = CaptureReader(self.fpath)
+        seg_a, seg_b = reader.Segments
+
+        self.assertEqual(len(seg_a), 10)
+        self.assertEqual(len(seg_b), 4)
+        self.assertEqual(seg_a.Addresses, list(plan_a.Addresses))
+        self.assertEqual(seg_b.Params, ['P2'])
+        self.assertEqual(seg_a.data().tobytes(), b''.join(resps_a))
+        self.assertEqual(seg_b.data(1, 3).tobytes(), b''.join(resps_b[1:3]))
+
+        times = np.concatenate([seg_a.times(), seg_b.times()])
+        self.assertTrue((np.diff(times) >= 0).all())
+        self.assertTrue(start - 1 <= times[0] and times[-1] <= end + 1)
+
+    def test_decode(self):
+        plan = DecodePlan(self.params, self.switches)
+        resps = self.responses(plan, 25)
+        self.capture([(plan, resps)])
+
+        reader = CaptureReader(self.fpath)
+        batches = list(reader.decode(self.logger_def, chunk_size=10))
+
+        self.assertEqual([len(x[1]) for x in batches], [10, 10, 5])
+        self.assertEqual(
+            [x[0] for x in batches[0][0]], ['P1', 'P2', 'S1']
+        )
+        self.assertEqual(
+            [x[0] for x in reader.columns(self.logger_def)], ['P1', 'P2', 'S1']
+        )
+
+        # decoding in bulk matches decoding each response live
+        values = np.hstack([x[2] for x in batches])
+        for i, r in enumerate(resps):
+            frame = plan.update(r)
+            np.testing.assert_array_equal(values[:2, i], frame.Values)
+            np.testing.assert_array_equal(values[2:, i], frame.States)
+
+    def test_mismatched_definition(self):
+        plan = DecodePlan(self.params, self.switches)
+        self.capture([(plan, self.responses(plan, 2))])
+
+        # the definition of P1 has changed since the capture
+        self.logger_def.AllParameters['P1'] = make_param(
+            'P1', DataType.UINT8, [0x11], a='x*2'
+        )
+        with self.assertRaises(ValueError):
+            list(CaptureReader(self.fpath).decode(self.logger_def))
+
+    def test_truncated(self):
+        plan_a = DecodePlan(self.params, self.switches)
+        plan_b = DecodePlan(self.params[1:], [])
+        self.capture([
+            (plan_a, self.responses(plan_a, 5)),
+            (plan_b, self.responses(plan_b, 5)),
+        ])
+
+        # cut the file short in the middle of the last record
+        size = os.path.getsize(self.fpath)
+        with open(self.fpath, 'r+b') as fp:
+            fp.truncate(size - 3)
+
+        seg_a, seg_b = CaptureReader(self.fpath).Segments
+        self.assertEqual((len(seg_a), len(seg_b)), (5, 4))
+
+        # and in the middle of the second segment header
+        with open(self.fpath, 'r+b') as fp:
+            fp.truncate(size - 5*(8 + len(plan_b.Addresses)) - 10)
+
+        with self.assertLogs('pyrrhic.comms.capture', 'WARNING'):
+            segments = CaptureReader(self.fpath).Segments
+        self.assertEqual([len(x) for x in segments], [5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ...common.helpers import PyrrhicMessage
+from ...comms.logfile import LogReader, LogWriter, _magic, export_csv
+
+class TestLogFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self.tmpdir.name, 'test.log')
+
+        self.columns = [('P1', 'Engine Speed', 'rpm'), ('S1', 'Clutch', '')]
+        self.times = 1000 + np.arange(10)*0.05
+        self.values = np.vstack([np.arange(10)*100.0, np.arange(10) % 2])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, batches, columns=None):
+        writer = LogWriter(self.fpath, fsync_interval=0)
+        writer.start()
+
+        # wait for the checkpoint after each message
+        msgs = [PyrrhicMessage('Columns', columns or self.columns)]
+        msgs.extend(PyrrhicMessage('Samples', x) for x in batches)
+        for m in msgs:
+            writer.InQueue.put(m)
+            self.assertEqual(
+                writer.OutQueue.get(timeout=5).Message, 'LogWriterStats'
+            )
+
+        writer.join()
+        return writer
+
+    def test_round_trip(self):
+        writer = self.write([
+            (self.times[:4], self.values[:, :4]),
+            (self.times[4:], self.values[:, 4:]),
+        ])
+        self.assertEqual(writer.Stats['samples'], 10)
+        self.assertEqual(writer.Stats['bytes'], os.path.getsize(self.fpath))
+
+        reader = LogReader(self.fpath)
+        batches = list(reader.batches())
+
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(batches[0][0], self.columns)
+        np.testing.assert_array_equal(
+            np.hstack([x[2] for x in batches]), self.values
+        )
+        np.testing.assert_array_equal(
+            np.hstack([x[1] for x in batches]), self.times
+        )
+
+        self.assertTrue(reader.Intact)
+        self.assertTrue(reader.Footer['closed'])
+        self.assertEqual(reader.Footer['samples'], 10)
+
+    def test_truncated(self):
+        self.write([
+            (self.times[:4], self.values[:, :4]),
+            (self.times[4:], self.values[:, 4:]),
+        ])
+
+        # cut the file short in the middle of the last blocks
+        size = os.path.getsize(self.fpath)
+        with open(self.fpath, 'r+b') as fp:
+            fp.truncate(size - 100)
+
+        reader = LogReader(self.fpath)
+        with self.assertLogs('pyrrhic.comms.logfile', 'WARNING'):
+            batches = list(reader.batches())
+
+        self.assertFalse(reader.Intact)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0][1].tolist(), self.times[:4].tolist())
+
+        # the checkpoint after the first batch survived
+        self.assertEqual(reader.Footer['samples'], 4)
+        self.assertFalse(reader.Footer['closed'])
+
+    def test_mismatched_samples(self):
+        writer = LogWriter(self.fpath)
+        writer.start()
+        writer.InQueue.put(PyrrhicMessage('Columns', self.columns))
+        writer.InQueue.put(
+            PyrrhicMessage('Samples', (self.times, self.values[:1]))
+        )
+        writer.join()
+
+        msgs = []
+        while not writer.OutQueue.empty():
+            msgs.append(writer.OutQueue.get())
+        self.assertEqual(msgs[-1].Message, 'Exception')
+        self.assertIsInstance(msgs[-1].Data, ValueError)
+
+    def test_export_csv(self):
+        self.write([(self.times[:5], self.values[:, :5])])
+
+        # append a second session logging a different set of params
+        with open(self.fpath, 'rb') as fp:
+            first = fp.read()
+        self.write(
+            [(self.times[5:], self.values[:1, 5:] + 0.5)],
+            columns=[('P2', 'Boost', 'psi')]
+        )
+        with open(self.fpath, 'rb') as fp:
+            second = fp.read()
+        with open(self.fpath, 'wb') as fp:
+            fp.write(first + second[len(_magic):])
+
+        csv_path = os.path.join(self.tmpdir.name, 'test.csv')
+        self.assertEqual(export_csv(self.fpath, csv_path), 10)
+
+        with open(csv_path, newline='') as fp:
+            rows = list(csv.reader(fp))
+
+        self.assertEqual(
+            rows[0], ['Time', 'Engine Speed (rpm)', 'Clutch', 'Boost (psi)']
+        )
+        self.assertEqual(rows[1], ['0', '0', '0', ''])
+        self.assertEqual(rows[2], ['50', '100', '1', ''])
+        self.assertEqual(rows[6], ['250', '', '', '500.5'])
+        self.assertEqual(len(rows), 11)
+
+if __name__ == '__main__':
+    unittest.main()
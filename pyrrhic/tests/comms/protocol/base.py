@@ -0,0 +1,275 @@
+#   Copyright (C) 2021  Shamit Som <shamitsom@gmail.com>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU Affero General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the GNU Affero General Public License
+#   along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import struct
+import unittest
+
+import numpy as np
+
+from ....common.enums import DataType, LoggerEndpoint
+from ....common.structures import Scaling, StdParam, SwitchParam
+from ....comms.protocol.base import (
+    DecodePlan, SampleBuffer, TranslatorParseError
+)
+
+def make_param(identifier, dtype, addrs, **exprs):
+    scalings = {
+        k: Scaling(k, None, disp_expr=v) for k, v in exprs.items()
+    }
+    return StdParam(
+        None, identifier, identifier, '', dtype, LoggerEndpoint.ECU,
+        Addresses=addrs, ECUBit=0, ECUByteIndex=0, Scalings=scalings,
+        Scaling=next(iter(scalings.values()), None)
+    )
+
+def make_switch(identifier, bit, addr):
+    return SwitchParam(
+        None, identifier, identifier, '', DataType(bit), LoggerEndpoint.ECU,
+        Addresses=[addr], ECUBit=bit, ECUByteIndex=0
+    )
+
+class TestDecodePlan(unittest.TestCase):
+
+    def setUp(self):
+        self.params = [
+            make_param('P1', DataType.UINT8, [0x10]),
+            make_param('P2', DataType.UINT16, [0x20]),
+            make_param('P3', DataType.FLOAT, [0x30, 0x31, 0x32, 0x33]),
+            make_param('P4', DataType.INT16, [0x11]),
+            make_param('P5', DataType.UINT16, [0x40, 0x41, 0x42]),
+        ]
+        self.switches = [
+            make_switch('S1', 0, 0x50),
+            make_switch('S2', 7, 0x50),
+            make_switch('S3', 3, 0x10),
+        ]
+        self.plan = DecodePlan(self.params, self.switches)
+
+    def response(self, values):
+        "Returns a response with the given bytes at each address"
+        return bytes(values.get(a, 0) for a in self.plan.Addresses)
+
+    def test_addresses(self):
+        self.assertEqual(
+            self.plan.Addresses,
+            [0x50, 0x10, 0x20, 0x21, 0x30, 0x31, 0x32, 0x33, 0x11, 0x12]
+        )
+        self.assertEqual(self.plan.Params, self.params[:4])
+        self.assertEqual(self.plan.Dtype.itemsize, 1 + 2 + 4 + 2)
+
+    def test_decode(self):
+        fval = struct.pack('>f', 1.5)
+        values = {
+            0x10: 0x88, 0x20: 0x12, 0x21: 0x34, 0x11: 0xFF, 0x12: 0xFE,
+            0x50: 0x80,
+        }
+        values.update({0x30 + i: x for i, x in enumerate(fval)})
+        resp = self.response(values)
+
+        decoded = self.plan.decode(resp)
+        self.assertEqual(decoded['P1'], 0x88)
+        self.assertEqual(decoded['P2'], 0x1234)
+        self.assertEqual(decoded['P3'], 1.5)
+        self.assertEqual(decoded['P4'], -2)
+
+        np.testing.assert_array_equal(
+            self.plan.decode_switches(resp), [False, True, True]
+        )
+
+        # many responses at once
+        many = np.frombuffer(resp*3, dtype=np.uint8).reshape(3, -1)
+        np.testing.assert_array_equal(self.plan.decode(many)['P2'], [0x1234]*3)
+        self.assertEqual(self.plan.decode_switches(many).shape, (3, 3))
+
+    def test_update(self):
+        self.params[4].RawValue = b'\x00'
+        resp = self.response({0x20: 0xAB, 0x21: 0xCD, 0x50: 0x01})
+        self.plan.update(resp)
+
+        self.assertEqual(self.params[1].RawValue, b'\xAB\xCD')
+        self.assertEqual(self.params[2].RawValue, b'\x00'*4)
+        self.assertIsNone(self.params[4].RawValue)
+        self.assertEqual(
+            [x.RawValue for x in self.switches], [True, False, False]
+        )
+
+    def test_invalid_size(self):
+        self.assertRaises(TranslatorParseError, self.plan.update, b'\x00')
+
+    def test_empty(self):
+        plan = DecodePlan([], [])
+        self.assertEqual(plan.Addresses, [])
+        self.assertEqual(plan.decode(b'').shape, ())
+        plan.update(b'')
+
+class TestScaling(unittest.TestCase):
+
+    def setUp(self):
+        self.params = [
+            make_param('P1', DataType.UINT8, [0x10], a='x-40'),
+            make_param('P2', DataType.UINT16, [0x20], a='x*0.25', b='x*2'),
+            make_param('P3', DataType.INT16, [0x30], a='x*0.25'),
+            make_param('P4', DataType.FLOAT, [0x40], a='x*0.25'),
+            make_param('P5', DataType.UINT8, [0x50]),
+            make_param('P6', DataType.UINT8, [0x51], a='x-40'),
+        ]
+        self.switches = [make_switch('S1', 1, 0x60)]
+        self.plan = DecodePlan(self.params, self.switches)
+
+        values = {0x10: 50, 0x20: 0x01, 0x21: 0x00, 0x30: 0xFF, 0x31: 0xFC,
+            0x50: 7, 0x51: 41, 0x60: 0x02}
+        values.update(
+            {0x40 + i: x for i, x in enumerate(struct.pack('>f', 10.0))}
+        )
+        self.resp = bytes(values.get(a, 0) for a in self.plan.Addresses)
+
+    def test_groups(self):
+        # params sharing an expression and data type are converted together
+        groups = self.plan._scaling_groups()
+        self.assertEqual(
+            sorted(x[0].tolist() for x in groups),
+            [[0, 5], [1], [2], [3]]
+        )
+
+    def test_frame(self):
+        frame = self.plan.update(self.resp)
+
+        np.testing.assert_array_equal(
+            frame.Values, [10, 64, -1, 2.5, np.nan, 1]
+        )
+        self.assertEqual(frame['P2'], 64)
+        self.assertTrue(frame['S1'])
+        self.assertEqual(frame.Params, self.params)
+
+        # consumers read the batch-converted values
+        self.assertEqual(
+            [p.Value for p in self.params], [10, 64, -1, 2.5, 7, 1]
+        )
+
+        # which match converting each param on its own
+        for p in self.params:
+            disp = p.Value
+            p.RawValue = p.RawValue
+            self.assertEqual(p.Value, disp)
+
+    def test_change_scaling(self):
+        self.plan.update(self.resp)
+        self.params[1].Scaling = 'b'
+        self.assertEqual(self.params[1].Value, 512)
+
+        frame = self.plan.update(self.resp)
+        self.assertEqual(frame['P2'], 512)
+        self.assertEqual(frame['P3'], -1)
+
+    def test_many(self):
+        many = np.frombuffer(self.resp*4, dtype=np.uint8).reshape(4, -1)
+        values = self.plan.scale(many)
+
+        self.assertEqual(values.shape, (4, len(self.params)))
+        np.testing.assert_array_equal(values[:, 1], [64]*4)
+
+class TestSampleBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buf = SampleBuffer(['A', 'B'], capacity=4)
+
+    def fill(self, n, t0=0):
+        for i in range(n):
+            self.buf.append([i, 10*i], timestamp=t0 + i)
+
+    def test_empty(self):
+        times, values = self.buf.last()
+        self.assertEqual(len(self.buf), 0)
+        self.assertEqual(times.shape, (0, ))
+        self.assertEqual(values.shape, (2, 0))
+        self.assertIsNone(self.buf.Latest)
+
+    def test_wrap(self):
+        for n in range(1, 11):
+            self.buf.clear()
+            self.fill(n)
+            held = list(range(max(0, n - 4), n))
+
+            times, values = self.buf.last()
+            self.assertEqual(len(self.buf), len(held))
+            self.assertEqual(times.tolist(), held)
+            self.assertEqual(values[0].tolist(), held)
+            self.assertEqual(
+                self.buf.column('B', 2).tolist(), [10*x for x in held[-2:]]
+            )
+
+    def test_views(self):
+        self.fill(6)
+        times, values = self.buf.last(3)
+
+        # windows share memory with the buffer and can't be written
+        self.assertTrue(np.shares_memory(values, self.buf._values))
+        self.assertTrue(np.shares_memory(times, self.buf._times))
+        with self.assertRaises(ValueError):
+            values[0, 0] = 1
+
+        # appending writes into the preallocated storage
+        storage = self.buf._values
+        self.fill(3)
+        self.assertIs(self.buf._values, storage)
+
+    def test_time_windows(self):
+        self.fill(6, t0=100)
+
+        times, values = self.buf.between(103, 104)
+        self.assertEqual(times.tolist(), [103, 104])
+        self.assertEqual(values[1].tolist(), [30, 40])
+
+        times, _ = self.buf.since(1)
+        self.assertEqual(times.tolist(), [104, 105])
+
+        # timestamps never go backwards
+        self.buf.append([0, 0], timestamp=50)
+        self.assertEqual(self.buf.Latest, 105)
+
+    def test_resize(self):
+        self.fill(3)
+        self.buf.resize(['B', 'C'], capacity=2)
+
+        times, values = self.buf.last()
+        self.assertEqual(self.buf.Columns, ['B', 'C'])
+        self.assertEqual(times.tolist(), [1, 2])
+        self.assertEqual(values[0].tolist(), [10, 20])
+        self.assertTrue(np.isnan(values[1]).all())
+
+        self.buf.append([30, 3], timestamp=3)
+        np.testing.assert_array_equal(self.buf.column('C'), [np.nan, 3])
+        self.assertEqual(self.buf.column('B').tolist(), [20, 30])
+
+    def test_record(self):
+        params = [
+            make_param('P1', DataType.UINT8, [0x10], a='x'),
+            make_param('P2', DataType.UINT8, [0x11], a='x*2'),
+        ]
+        switches = [make_switch('S1', 0, 0x12)]
+        plan = DecodePlan(params, switches)
+        buf = SampleBuffer(plan.Columns, capacity=8)
+
+        for i in range(3):
+            values = {0x10: i, 0x11: i, 0x12: i & 1}
+            resp = bytes(values[a] for a in plan.Addresses)
+            buf.record(plan.update(resp, timestamp=i))
+
+        _, values = buf.last()
+        self.assertEqual(buf.Columns, ['P1', 'P2', 'S1'])
+        self.assertEqual(values.tolist(), [[0, 1, 2], [0, 2, 4], [0, 1, 0]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -42,6 +42,13 @@ class EditorFrame(bEditorFrame):
             wx.EVT_TIMER, self._pop_status, self._status_timer
         )
 
+        # poll for changes to definition files
+        self._defs_timer = wx.Timer(self)
+        self.Bind(
+            wx.EVT_TIMER, self._check_definitions, self._defs_timer
+        )
+        self._defs_timer.Start(1000) # ms
+
         pub.subscribe(self._enable_livetune, 'editor.livetune.enable')
         pub.subscribe(self.OnTogglePane, 'editor.toggle_panel')
         pub.subscribe(self.toggle_table, 'editor.table.toggle')
@@ -143,7 +150,12 @@ class EditorFrame(bEditorFrame):
     def _pop_status(self, event=None):
         self._status_bar.PopStatusText()
 
+    def _check_definitions(self, event=None):
+        self._controller.check_definitions()
+
     def OnClose(self, event):
+        self._defs_timer.Stop()
+        self._controller.stop_definition_watcher()
         self._controller.save_prefs()
         self.m_mgr.UnInit()
         event.Skip()
@@ -213,20 +213,20 @@ class TablePanel(bTablePanel):
 
         if self._current_selection:
             table, cells = self._current_selection
-            for i, j in cells:
 
-                _func_map = {
-                    'inc': (table.step, (i, j), {}),
-                    'dec': (table.step, (i, j), {'decrement': True}),
-                    'inc_raw': (table.add_raw, (1, i, j), {}),
-                    'dec_raw': (table.add_raw, (-1, i, j), {}),
-                    'set': (table.set_cell, (val, i, j), {}),
-                    'add': (table.add_cell, (val, i, j), {}),
-                    'mult': (table.mult_cell, (val, i, j), {}),
-                }
+            # the whole selection is edited in one pass
+            _func_map = {
+                'inc': (table.step_cells, (cells,), {}),
+                'dec': (table.step_cells, (cells,), {'decrement': True}),
+                'inc_raw': (table.add_raw_cells, (1, cells), {}),
+                'dec_raw': (table.add_raw_cells, (-1, cells), {}),
+                'set': (table.set_cells, (val, cells), {}),
+                'add': (table.add_cells, (val, cells), {}),
+                'mult': (table.mult_cells, (val, cells), {}),
+            }
 
-                f, args, kwargs = _func_map[func]
-                f(*args, **kwargs)
+            f, args, kwargs = _func_map[func]
+            f(*args, **kwargs)
 
             self.populate()
 
@@ -278,53 +278,7 @@ class TablePanel(bTablePanel):
         if table == self._table.Axes[1]:
             return
 
-        # create temporary array with only selected values
-        shape = table.DisplayValues.shape
-        if len(shape) == 2:
-            array = [[None]*shape[1] for x in range(shape[0])]
-        else:
-            cells = [(i, None) for i, j in cells]
-            array = [[None]*shape[0]]
-
-        for cell in cells:
-            idx1, idx2 = cell
-            if idx2 is not None:
-                array[idx1][idx2] = table.DisplayValues[cell]
-            else:
-                array[0][idx1] = table.DisplayValues[idx1]
-
-        # interpolate row-wise for each row individualy
-        for i, row in enumerate(array):
-            vals = []
-            col = None
-
-            for j, val in enumerate(row):
-                if val is not None:
-                    if not vals:
-                        col = j
-                    vals.append(val)
-
-                else:
-                    # encountered last value in this row
-                    if all([x is None for x in row[j:]]):
-                        break
-
-                    # if a `None` is encountered between values,
-                    # skip interpolation for this row
-                    if vals and any([x is not None for x in row[j:]]):
-                        array[i] = [None]*len(row)
-                        break
-
-            if len(vals) <= 1:
-                continue
-
-            min, max = vals[0], vals[-1]
-            step = (max - min)/(len(vals) - 1)
-
-            for j in range(1, len(vals) - 1):
-                interp = min + step*j
-                table.set_cell(interp, i, col + j)
-
+        table.interpolate_h(cells)
         self.populate()
 
     def OnInterpolateV(self, event=None):
@@ -336,57 +290,16 @@ class TablePanel(bTablePanel):
         if table == self._table.Axes[0]:
             return
 
-        # create temporary array with only selected values
-        shape = table.DisplayValues.shape
-        if len(shape) == 2:
-            array = [[None]*shape[0] for x in range(shape[1])]
-        else:
-            cells = [(i, None) for i, j in cells]
-            array = [[None]*shape[0]]
-
-        for cell in cells:
-            idx1, idx2 = cell
-            if idx2 is not None:
-                array[idx2][idx1] = table.DisplayValues[cell]
-            else:
-                array[0][idx1] = table.DisplayValues[idx1]
-
-        # interpolate row-wise for each row individualy
-        for j, col in enumerate(array):
-            vals = []
-            row = None
-
-            for i, val in enumerate(col):
-                if val is not None:
-                    if not vals:
-                        row = i
-                    vals.append(val)
-
-                else:
-                    # encountered last value in this row
-                    if all([x is None for x in col[i:]]):
-                        break
-
-                    # if a `None` is encountered between values,
-                    # skip interpolation for this col
-                    if vals and any([x is not None for x in col[i:]]):
-                        array[j] = [None]*len(col)
-                        break
-
-            if len(vals) <= 1:
-                continue
-
-            min, max = vals[0], vals[-1]
-            step = (max - min)/(len(vals) - 1)
-
-            for i in range(1, len(vals) - 1):
-                interp = min + step*i
-                table.set_cell(interp, row + i, j)
-
+        table.interpolate_v(cells)
         self.populate()
 
     def OnInterpolate2D(self, event=None):
-        raise NotImplementedError # TODO
+        if not self._current_selection:
+            return
+
+        table, cells = self._current_selection
+        table.interpolate_2d(cells)
+        self.populate()
 
     def OnKeyDown(self, event):
         _func_map = {
@@ -114,12 +114,12 @@ class RomViewModel(dv.PyDataViewModel):
             categories = []
             for category in node.Tables:
                 container = node.Tables[category]
-                tables = container.values()
+                tables = container.Definitions.values()
 
                 # only append category if some of its tables fall within
                 # the currently selected user level
                 if not all(
-                    [usrlvl.value < x.Definition.Level.value  for x in tables]
+                    [usrlvl.value < x.Level.value  for x in tables]
                 ):
                     categories.append(self.ObjectToItem(container))
             for x in categories: children.append(x)
@@ -160,7 +160,7 @@ class RomViewModel(dv.PyDataViewModel):
         # node is a category
         elif isinstance(node, TableContainer):
             attr.SetBold(
-                any([x.IsModified for x in node.values()])
+                any([x.IsModified for x in node.Loaded.values()])
             )
             return True
 
@@ -305,12 +305,12 @@ class RamViewModel(dv.PyDataViewModel):
             categories = []
             for category in self._rom.RAMTables:
                 container = self._rom.RAMTables[category]
-                tables = container.values()
+                tables = container.Definitions.values()
 
                 # only append category if some of its tables fall within
                 # the currently selected user level
                 if not all(
-                    [usrlvl.value < x.Definition.Level.value  for x in tables]
+                    [usrlvl.value < x.Level.value  for x in tables]
                 ):
                     categories.append(self.ObjectToItem(container))
             for x in categories: children.append(x)
@@ -337,15 +337,17 @@ class RamViewModel(dv.PyDataViewModel):
             col_db = wx.ColourDatabase()
 
             if isinstance(node, TableContainer):
-                allocatable = any([self._allocatable(x) for x in node.values()])
+                allocatable = any([
+                    self._allocatable(x) for x in node.Definitions.values()
+                ])
                 has_allocations = any([
-                    x.RomAddress in self._livetune.AllocatedTables
-                    for x in node.values()
+                    x.Address in self._livetune.AllocatedTables
+                    for x in node.Definitions.values()
                 ])
                 modified = any([
                     x.RomAddress in self._livetune.AllocatedTables
                     and x.IsModified
-                    for x in node.values()
+                    for x in node.Loaded.values()
                 ])
                 attr.SetItalic(not allocatable)
                 attr.SetColour(